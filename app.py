@@ -3,37 +3,15 @@ from flask import (
     flash, redirect, send_from_directory, request,
     render_template, url_for, current_app, make_response
 )
-import os, logging
-from logging.handlers import RotatingFileHandler
-from flask_login import current_user
+import os
 from vigi import create_app
 from vigi.extensions import db
 from flask_wtf.csrf import CSRFError
 
-# ==========================================================
-# 🧩 إعداد نظام السجلات
-# ==========================================================
-def setup_logging(app):
-    log_level = logging.DEBUG if app.debug else logging.INFO
-    ch = logging.StreamHandler()
-    ch.setLevel(log_level)
-    ch.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-
-    fh = RotatingFileHandler('app.log', maxBytes=10*1024*1024, backupCount=10)
-    fh.setLevel(logging.ERROR)
-    fh.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s'))
-
-    app.logger.addHandler(ch)
-    app.logger.addHandler(fh)
-    app.logger.setLevel(log_level)
-    app.logger.info("Logging setup complete.")
-
-
 # ==========================================================
 # 🚀 إنشاء التطبيق
 # ==========================================================
 app = create_app("config.Config")
-setup_logging(app)
 
 
 # ==========================================================
@@ -90,21 +68,6 @@ def offline_page():
     return resp
 
 
-# ==========================================================
-# 🪵 Logging requests
-# ==========================================================
-@app.after_request
-def log_request(response):
-    if request.path.startswith("/.well-known/appspecific"):
-        return response
-    user = current_user.username if current_user.is_authenticated else "Anonymous"
-    current_app.logger.info(
-        f"{request.method} {request.url} [{response.status_code}] "
-        f"User: {user} | IP: {request.remote_addr} | UA: {request.user_agent}"
-    )
-    return response
-
-
 # ==========================================================
 # 🧱 Error Handlers
 # ==========================================================
@@ -0,0 +1,59 @@
+# benchmarks/compare.py  —  diff two benchmark result files
+"""
+    python -m benchmarks.compare bench_base.json bench_new.json [--threshold 0.2] [--min-ms 2]
+
+Exits with status 1 when a case's p95 got slower by more than --threshold
+(relative) *and* by more than --min-ms (absolute), so CI can block the deploy.
+"""
+import argparse
+import json
+import sys
+
+
+def _key(row):
+    return (row.get("backend", "sqlite"), row["size"], row["endpoint"], row["variant"])
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("meta", {}), {_key(r): r for r in data.get("results", [])}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=0.20)
+    ap.add_argument("--min-ms", type=float, default=2.0)
+    args = ap.parse_args(argv)
+
+    base_meta, base = load(args.base)
+    new_meta, new = load(args.new)
+    print(f"base: {base_meta.get('commit')}  →  new: {new_meta.get('commit')}\n")
+    print(f"{'backend':<10} {'size':>7} {'endpoint':<24} {'variant':<26} {'p95 base':>10} {'p95 new':>10} {'Δ':>8}")
+
+    regressions = 0
+    for key in sorted(set(base) & set(new)):
+        b, n = base[key]["p95_ms"], new[key]["p95_ms"]
+        delta = (n - b) / b if b else 0.0
+        flag = ""
+        if delta > args.threshold and (n - b) > args.min_ms:
+            flag = "  ❌ REGRESSION"
+            regressions += 1
+        elif delta < -args.threshold and (b - n) > args.min_ms:
+            flag = "  ✅"
+        backend, size, endpoint, variant = key
+        print(f"{backend:<10} {size:>7} {endpoint:<24} {variant:<26} {b:>10.2f} {n:>10.2f} {delta:>+8.1%}{flag}")
+
+    for key in sorted(set(base) ^ set(new)):
+        print(f"(only in {'base' if key in base else 'new'}) {key}")
+
+    if regressions:
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%} / {args.min_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# ────────────────────────────────
+# benchmarks/run.py  —  reproducible latency/throughput benchmarks for hot endpoints
+# ────────────────────────────────
+"""
+Usage (from the repo root):
+
+    python -m benchmarks.run                              # SQLite, 1k + 50k lots
+    python -m benchmarks.run --sizes 1000,50000,500000
+    python -m benchmarks.run --pg-url postgresql+psycopg2://postgres:pw@localhost/vigifroid_bench
+    python -m benchmarks.run --only lots.index,api_json --iterations 50
+
+Each size gets a fresh database seeded deterministically (--seed). Results go
+to a JSON file (--out) that `python -m benchmarks.compare old.json new.json`
+can diff between commits.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# config.Config reads these at import time
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+import config  # noqa: E402
+from vigi import create_app  # noqa: E402
+from vigi.extensions import cache, db  # noqa: E402
+from vigi.perf.metrics import quantile  # noqa: E402
+from vigi.services import synthetic  # noqa: E402
+from models import AppSettings, User  # noqa: E402
+
+
+DEFAULT_SIZES = (1_000, 50_000)
+PDF_MAX_ROWS = 50_000  # export_pdf over the full table is skipped above this
+
+
+# ── Seeding ─────────────────────────────────────────
+def seed(n_lots: int, seed_value: int, today: date) -> dict:
+    """Same generator/bulk loader as `flask dev seed`, plus an admin to log in with."""
+    admin = User(username="bench_admin", email="bench@vigifroid.local",
+                 password=generate_password_hash("bench"), role="admin")
+    db.session.add(admin)
+    db.session.commit()
+
+    stats = synthetic.seed(synthetic.SeedSpec(
+        lots=n_lots, logs=max(100, n_lots // 10), seed=seed_value, today=today,
+    ))
+    return {"lots": stats["lots"], "logs": stats["logs"]}
+
+
+# ── Measuring ───────────────────────────────────────
+def _summary(samples, wall):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(quantile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(quantile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(quantile(samples, 0.99) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+        "rps": round(len(samples) / wall, 2) if wall else None,
+    }
+
+
+def measure(fn, iterations: int, warmup: int, before_each=None):
+    for _ in range(warmup):
+        if before_each:
+            before_each()
+        fn()
+    samples = []
+    wall0 = time.perf_counter()
+    for _ in range(iterations):
+        if before_each:
+            before_each()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return _summary(samples, time.perf_counter() - wall0)
+
+
+def _get(client, url, expect=200):
+    def call():
+        r = client.get(url, base_url="https://localhost")
+        if r.status_code != expect:
+            raise RuntimeError(f"GET {url} → {r.status_code}")
+        r.close()
+    return call
+
+
+def build_cases(app, client, n_lots: int, today: date):
+    per_page = 48
+    last_page = max(1, (n_lots + per_page - 1) // per_page)
+    cases = [
+        ("lots.index", "page 1", _get(client, "/lots/")),
+        ("lots.index", "search q=loctite", _get(client, "/lots/?q=loctite")),
+        ("lots.index", "status=warning", _get(client, "/lots/?status=warning")),
+        ("lots.index", f"deep page {last_page}", _get(client, f"/lots/?page={last_page}")),
+        ("api_json", "all", _get(client, "/lots/api.json")),
+        ("api_json", "status=expired", _get(client, "/lots/api.json?status=expired")),
+        ("export_csv", "all", _get(client, "/lots/export")),
+        ("export_csv", "q=graisse", _get(client, "/lots/export?q=graisse")),
+        ("logs.logs", "cold cache", _get(client, "/logs/"), lambda: cache.delete("logs_page")),
+        ("logs.logs", "warm cache", _get(client, "/logs/")),
+    ]
+    pdf_filter = "" if n_lots <= PDF_MAX_ROWS else "&status=warning"
+    for lang in ("fr", "ar"):
+        cases.append(("export_pdf", f"lang={lang}{pdf_filter.replace('&', ' ')}",
+                      _get(client, f"/lots/export/pdf?lang={lang}{pdf_filter}")))
+
+    export_day = min(today.day, 28)
+    run_day = today.replace(day=export_day)
+
+    def prepare_autoexport():
+        with app.app_context():
+            s = AppSettings.get()
+            s.auto_export_enabled = True
+            s.quality_emails = "quality@vigifroid.local"
+            s.export_day = export_day
+            s.export_format = "pdf" if n_lots <= PDF_MAX_ROWS else "csv"
+            s.last_export_month = None
+            db.session.commit()
+
+    def autoexport():
+        from vigi.services.reports import run_monthly_auto_export
+        with app.app_context():
+            if not run_monthly_auto_export(today=run_day):
+                raise RuntimeError("run_monthly_auto_export returned False")
+
+    cases.append(("run_monthly_auto_export", "pdf" if n_lots <= PDF_MAX_ROWS else "csv",
+                  autoexport, prepare_autoexport))
+    return cases
+
+
+def make_config(db_url: str):
+    return type("BenchConfig", (config.Config,), {
+        "SQLALCHEMY_DATABASE_URI": db_url,
+        "WTF_CSRF_ENABLED": False,
+        "RATELIMIT_ENABLED": False,
+        "MAIL_SUPPRESS_SEND": True,
+        "LOG_LEVEL": "WARNING",
+        "PERF_SERVER_TIMING": False,
+        "SLOW_QUERY_MS": 0,
+    })
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_size(db_url: str, n_lots: int, args) -> list:
+    app = create_app(make_config(db_url))
+    today = date.today()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        t0 = time.perf_counter()
+        counts = seed(n_lots, args.seed, today)
+        print(f"  seeded {counts} in {time.perf_counter() - t0:.1f}s")
+
+    client = app.test_client()
+    r = client.post("/auth/login", data={"username": "bench_admin", "password": "bench"},
+                    base_url="https://localhost")
+    if r.status_code not in (200, 302):
+        raise RuntimeError(f"login failed: {r.status_code}")
+
+    only = set(filter(None, (args.only or "").split(",")))
+    results = []
+    for case in build_cases(app, client, n_lots, today):
+        endpoint, variant, fn = case[:3]
+        before_each = case[3] if len(case) > 3 else None
+        if only and endpoint not in only:
+            continue
+        heavy = endpoint in ("export_pdf", "run_monthly_auto_export") or n_lots > PDF_MAX_ROWS
+        iterations = max(1, args.iterations // 5) if heavy else args.iterations
+        stats = measure(fn, iterations, args.warmup, before_each)
+        results.append({"size": n_lots, "endpoint": endpoint, "variant": variant, **stats})
+        print(f"  {endpoint:<24} {variant:<26} p50={stats['p50_ms']:>9.2f}ms "
+              f"p95={stats['p95_ms']:>9.2f}ms  {stats['rps']} req/s")
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    ap.add_argument("--seed", type=int, default=20240101)
+    ap.add_argument("--iterations", type=int, default=30)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--only", default="", help="comma-separated endpoints")
+    ap.add_argument("--pg-url", default=None,
+                    help="also run on this PostgreSQL database (its name must contain 'bench'; tables are dropped)")
+    ap.add_argument("--out", default="bench_results.json")
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    targets = []
+    tmpdir = tempfile.mkdtemp(prefix="vigi-bench-")
+    targets.append(("sqlite", lambda n: f"sqlite:///{os.path.join(tmpdir, f'bench_{n}.db')}"))
+    if args.pg_url:
+        if "bench" not in args.pg_url.rsplit("/", 1)[-1]:
+            ap.error("--pg-url database name must contain 'bench' (its tables are dropped)")
+        targets.append(("postgresql", lambda n: args.pg_url))
+
+    out = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "iterations": args.iterations,
+        },
+        "results": [],
+    }
+    for backend, url_for_size in targets:
+        for n in sizes:
+            print(f"▶ {backend} · {n} lots")
+            for row in run_size(url_for_size(n), n, args):
+                out["results"].append({"backend": backend, **row})
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2, ensure_ascii=False)
+    print(f"✅ results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,8 @@ class Config:
     BABEL_DEFAULT_LOCALE = "fr"
     BABEL_DEFAULT_TIMEZONE = "Africa/Casablanca"
     BABEL_TRANSLATION_DIRECTORIES = str(BASE_DIR / "translations")
-    ASSET_VERSION = "v1.0.0"
+    ASSET_VERSION = "v1.0.0"  # replaced by the manifest version after `flask assets build`
+    ASSETS_MANIFEST = os.environ.get("ASSETS_MANIFEST", "1") == "1"
 
     # ── Security / Sessions ──────────────────────────────
     SECRET_KEY = os.environ.get("SECRET_KEY")
@@ -41,25 +42,174 @@ class Config:
     )
 
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_size": 10,
-        "pool_timeout": 30,
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "30")),
         "pool_recycle": 1800,
         "pool_pre_ping": True,
     }
+    # SQLite profile (vigi/sqlite_profile.py), used when DATABASE_URL=sqlite:////path/to/vigifroid.db:
+    # the pool options above are replaced, these PRAGMAs run on every connection, and exports /
+    # lists read through a second, read-only engine on the same file (SQLITE_READ_SPLIT)
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "cache_size": -int(os.environ.get("SQLITE_CACHE_KB", "65536")),  # negative = KiB
+        "temp_store": "MEMORY",
+    }
+    SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "5"))
+    SQLITE_READ_SPLIT = os.environ.get("SQLITE_READ_SPLIT", "1") == "1"
+
+    # Read replicas (vigi/db_routing.py): binds "replica0", "replica1", … used for the
+    # SELECTs of DB_REPLICA_ENDPOINTS; the primary answers within DB_READ_YOUR_WRITES
+    # seconds after this browser wrote, and whenever a replica lags > DB_REPLICA_MAX_LAG
+    DB_REPLICA_URLS = [
+        u.strip().replace("postgres://", "postgresql+psycopg2://", 1)
+        for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()
+    ]
+    SQLALCHEMY_BINDS = {f"replica{i}": u for i, u in enumerate(DB_REPLICA_URLS)}
+    DB_REPLICA_ENDPOINTS = (
+        "main.index", "lots.index", "lots.grid", "lots.api_json", "lots.export_csv", "lots.export_pdf", "logs.logs",
+    )
+    DB_READ_YOUR_WRITES = float(os.environ.get("DB_READ_YOUR_WRITES", "5"))
+    DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", "5"))
+    DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", "10"))
+    # Pool telemetry (vigi.perf.pool) + optional adaptive sizing per worker
+    DB_POOL_TELEMETRY = os.environ.get("DB_POOL_TELEMETRY", "1") == "1"
+    DB_POOL_ADAPTIVE = os.environ.get("DB_POOL_ADAPTIVE", "0") == "1"
+    DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "2"))
+    DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "20"))
+    DB_POOL_ADAPT_INTERVAL = int(os.environ.get("DB_POOL_ADAPT_INTERVAL", "60"))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     # ── Files ────────────────────────────────────────────
     UPLOAD_FOLDER = str(BASE_DIR / "static" / "images")
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB
+    # Lot photos (vigi/services/images.py): master capped at IMAGE_MAX_SIDE px,
+    # WebP + JPEG variants per width, built by IMAGE_WORKERS background threads
+    IMAGE_MAX_SIDE = int(os.environ.get("IMAGE_MAX_SIDE", "1600"))
+    IMAGE_WIDTHS = os.environ.get("IMAGE_WIDTHS", "160,320,640")
+    IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", "80"))
+    IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+
+    # Blob storage (vigi/storage): "local" (UPLOAD_FOLDER on disk) or "s3" (needs boto3).
+    # Local files can be streamed by the front server instead of a worker:
+    # STORAGE_SERVE = "app" | "x-accel" (nginx) | "x-sendfile" (Apache/lighttpd)
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+    STORAGE_SERVE = os.environ.get("STORAGE_SERVE", "app")
+    STORAGE_ACCEL_PREFIX = os.environ.get("STORAGE_ACCEL_PREFIX", "/_protected/")
+    S3_BUCKET = os.environ.get("S3_BUCKET")
+    S3_PREFIX = os.environ.get("S3_PREFIX", "")
+    S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")  # MinIO / Ceph / R2 …
+    S3_REGION = os.environ.get("S3_REGION")
+    S3_PUBLIC_URL = os.environ.get("S3_PUBLIC_URL")      # CDN / public-read base for uploads
+    S3_PRESIGN_TTL = int(os.environ.get("S3_PRESIGN_TTL", "3600"))
+    # Copy of every auto-export report (storage namespace "reports")
+    REPORT_ARCHIVE = os.environ.get("REPORT_ARCHIVE", "1") == "1"
+    REPORT_ARCHIVE_FOLDER = os.environ.get("REPORT_ARCHIVE_FOLDER")  # default: instance/reports
+
+    # Offline replay (POST /lots/sync): max operations per batch, days a replayed key is remembered
+    SYNC_MAX_OPERATIONS = int(os.environ.get("SYNC_MAX_OPERATIONS", "200"))
+    SYNC_KEY_TTL_DAYS = int(os.environ.get("SYNC_KEY_TTL_DAYS", "14"))
+
+    # Live dashboard (vigi/live.py): GET /lots/events streams lot changes + counters.
+    # LIVE_BUS: auto (PostgreSQL NOTIFY, else LIVE_BUS_FILE polled every LIVE_POLL s) | pg | file | local.
+    # Each open stream holds a gunicorn thread: LIVE_MAX_STREAMS per process, keep it under GUNICORN_THREADS.
+    LIVE_EVENTS = os.environ.get("LIVE_EVENTS", "1") == "1"
+    LIVE_BUS = os.environ.get("LIVE_BUS", "auto")
+    LIVE_BUS_FILE = os.environ.get("LIVE_BUS_FILE")  # default: instance/live-events.log
+    LIVE_POLL = float(os.environ.get("LIVE_POLL", "0.5"))
+    LIVE_BUFFER = int(os.environ.get("LIVE_BUFFER", "256"))
+    LIVE_MAX_STREAMS = int(os.environ.get("LIVE_MAX_STREAMS", max(int(os.environ.get("GUNICORN_THREADS", "4")) - 2, 1)))
+    LIVE_STREAM_SECONDS = int(os.environ.get("LIVE_STREAM_SECONDS", "300"))
+    LIVE_HEARTBEAT = int(os.environ.get("LIVE_HEARTBEAT", "15"))
+
+    # `flask lots archive`: lots expired for more than LOTS_ARCHIVE_AFTER_DAYS move to lots_archive
+    LOTS_ARCHIVE_AFTER_DAYS = int(os.environ.get("LOTS_ARCHIVE_AFTER_DAYS", "365"))
+    LOTS_ARCHIVE_BATCH = int(os.environ.get("LOTS_ARCHIVE_BATCH", "500"))
+
+    # `flask backup create` (vigi/services/backup.py): SQLite is copied BACKUP_PAGES_PER_STEP
+    # pages at a time with BACKUP_STEP_SLEEP seconds between steps so writers are never held up
+    BACKUP_DIR = os.environ.get("BACKUP_DIR")  # default: instance/backups
+    BACKUP_PAGES_PER_STEP = int(os.environ.get("BACKUP_PAGES_PER_STEP", "1024"))
+    BACKUP_STEP_SLEEP = float(os.environ.get("BACKUP_STEP_SLEEP", "0.005"))
 
     # ── Misc ─────────────────────────────────────────────
     JSON_AS_ASCII = False
     PREFERRED_URL_SCHEME = "http"
 
-    # Cache (اختياري)
-    CACHE_TYPE = os.environ.get("CACHE_TYPE", "SimpleCache")
+    # Cache (اختياري): local LRU in front of a store shared by all workers
+    # (Redis with CACHE_REDIS_URL, else instance/cache on disk), see vigi/tiered_cache.py
+    CACHE_TYPE = os.environ.get("CACHE_TYPE", "vigi.tiered_cache.TieredCache")
     CACHE_DEFAULT_TIMEOUT = 300
     CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+    CACHE_DIR = os.environ.get("CACHE_DIR")  # default: instance/cache
+    # files kept in CACHE_DIR: past it every set lists the directory and evicts, so leave
+    # room for one lot card per lot × locale × status (Redis ignores it)
+    CACHE_THRESHOLD = int(os.environ.get("CACHE_THRESHOLD", "20000"))
+    CACHE_LOCAL_MAX = int(os.environ.get("CACHE_LOCAL_MAX", "1024"))
+    CACHE_LOCAL_TTL = float(os.environ.get("CACHE_LOCAL_TTL", "30"))  # bounds staleness if a message is lost
+    CACHE_BUS_POLL = float(os.environ.get("CACHE_BUS_POLL", "1.0"))    # filesystem store only
+    # current_user + settings row kept in process memory (seconds; 0 = off).
+    # Writes drop the entry at once in this worker, other workers within the TTL.
+    IDENTITY_CACHE_TTL = float(os.environ.get("IDENTITY_CACHE_TTL", "60"))
+    # rendered lot cards (templates/lots/_card.html); a new version/status/locale is a new key
+    LOTS_CARD_CACHE_TIMEOUT = int(os.environ.get("LOTS_CARD_CACHE_TIMEOUT", "3600"))
+    # compiled templates kept on disk, shared by the workers and across restarts ("" = off)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE_DIR")  # default: instance/jinja-cache
+
+    # Flask-Compress: dynamic responses only; static css/js come precompressed
+    # from `flask assets build` (vigi/assets.py)
+    COMPRESS_MIMETYPES = ["text/html", "application/json", "application/javascript"]
+
+    # Rate-limit counters: memory:// is per worker process; with several workers
+    # use a shared store, e.g. redis://localhost:6379/1
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI", "memory://")
+
+    # Pre-fork warm-up (gunicorn.conf.py): also load reportlab + Arabic fonts in the master
+    WARMUP_REPORTS = os.environ.get("WARMUP_REPORTS", "1") == "1"
+
+    # ── Logging ──────────────────────────────────────────
+    LOG_LEVEL = os.environ.get("LOG_LEVEL")          # default: DEBUG if app.debug else INFO
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")  # "json" | "text"
+    LOG_FILE = os.environ.get("LOG_FILE", "app.log")
+    # 2xx static / upload / SW fetches: log only this share (1.0 = all, 0 = none)
+    LOG_STATIC_SAMPLE_RATE = float(os.environ.get("LOG_STATIC_SAMPLE_RATE", "0.05"))
+    LOG_ROUTE_LEVELS = {
+        "healthz": "DEBUG",
+        "pool_check": "DEBUG",
+    }
+
+    # ── Perf instrumentation ─────────────────────────────
+    PERF_METRICS_ENABLED = os.environ.get("PERF_METRICS_ENABLED", "1") == "1"
+    PERF_SERVER_TIMING = os.environ.get("PERF_SERVER_TIMING", "1") == "1"  # sent to admins (everyone in debug)
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")  # Bearer token for Prometheus scrapes
+
+    # Slow-query log (disabled when SLOW_QUERY_MS is empty/0)
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "0") or 0)
+    SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG")  # default: instance/slow_queries.jsonl
+    SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "1") == "1"
+    SLOW_QUERY_EXPLAIN_INTERVAL = 300  # seconds between two EXPLAINs of the same fingerprint
+
+    # Traffic capture for `flask perf replay` (opt-in; metadata only, sensitive query values redacted)
+    TRAFFIC_CAPTURE = os.environ.get("TRAFFIC_CAPTURE", "0") == "1"
+    TRAFFIC_CAPTURE_FILE = os.environ.get("TRAFFIC_CAPTURE_FILE")  # default: instance/perf/traffic.jsonl
+    TRAFFIC_CAPTURE_SAMPLE = float(os.environ.get("TRAFFIC_CAPTURE_SAMPLE", "1.0"))
+
+    # On-demand profiler: admins add ?__profile=1 (or X-Profile: 1); no hooks at all when off
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+    PROFILER_DIR = os.environ.get("PROFILER_DIR")  # default: instance/profiles
+    PROFILER_ENGINE = os.environ.get("PROFILER_ENGINE", "auto")  # auto | pyinstrument | cprofile
+    PROFILER_KEEP = 50  # newest profiles kept on disk
+
+    # Span tracing (requests + traced CLI runs) → JSONL, no external collector
+    TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "0") == "1"
+    TRACING_FILE = os.environ.get("TRACING_FILE")  # default: instance/perf/traces.jsonl
+    TRACING_SAMPLE = float(os.environ.get("TRACING_SAMPLE", "1.0"))
+    TRACING_SQL = os.environ.get("TRACING_SQL", "1") == "1"  # one span per SQL statement
+    TRACING_MAX_SPANS = 2000  # per trace; extra spans are counted as "dropped"
 
     # CSRF
     WTF_CSRF_TIME_LIMIT = 3600 * 6  
@@ -0,0 +1,52 @@
+# conftest.py — shared fixtures: a Flask app on the global `db` (vigi.extensions)
+
+import pytest
+from flask import Flask
+
+from vigi.extensions import db
+
+
+@pytest.fixture(autouse=True)
+def _forget_extra_binds():
+    """Binds a test registers on `db` (replicas, the SQLite read-only bind) end with it."""
+    before = set(db.metadatas)
+    yield
+    for key in set(db.metadatas) - before:
+        del db.metadatas[key]
+
+
+@pytest.fixture()
+def make_app():
+    """
+    make_app(**config) → app with its context pushed and the tables created
+    (in-memory SQLite unless SQLALCHEMY_DATABASE_URI is given).
+
+        setup=fn            fn(app) right after db.init_app (extensions, routing)
+        tables=False        no create_all (tests bringing their own schema)
+        request_context     push a test request context instead of an app context
+    """
+    contexts = []
+
+    def make(setup=None, tables=True, request_context=False, **config):
+        app = Flask(__name__)
+        app.config.update(SECRET_KEY="x", SQLALCHEMY_DATABASE_URI="sqlite://")
+        app.config.update(config)
+        db.init_app(app)
+        if setup is not None:
+            setup(app)
+        ctx = app.test_request_context() if request_context else app.app_context()
+        ctx.push()
+        contexts.append(ctx)
+        if tables:
+            db.create_all()
+        return app
+
+    yield make
+    for ctx in reversed(contexts):
+        db.session.remove()
+        ctx.pop()
+
+
+@pytest.fixture()
+def app(make_app):
+    return make_app()
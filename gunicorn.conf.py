@@ -0,0 +1,73 @@
+# ────────────────────────────────
+# gunicorn.conf.py  —  pre-fork deployment (Linux)
+#     gunicorn -c gunicorn.conf.py wsgi:app
+# ────────────────────────────────
+"""
+The app is imported and built once in the master (preload_app), warmed up
+there (translations, templates, report stack), then gc.freeze() moves every
+object created so far out of the collector's reach: workers keep sharing those
+pages copy-on-write instead of dirtying them on each GC pass.
+
+Each worker then drops the DB connections it may have inherited and opens its
+own (vigi/warmup.py). The default cache (vigi/tiered_cache.py) keeps a local
+LRU per worker in front of a shared store and broadcasts invalidations;
+rate-limit state is per process unless RATELIMIT_STORAGE_URI points to Redis.
+Each open /lots/events stream (live dashboard, vigi/live.py) holds one of a
+worker's threads: raise GUNICORN_THREADS with the number of terminals left
+open, LIVE_MAX_STREAMS follows it (threads - 2 per worker).
+
+Env: WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_BIND, GUNICORN_TIMEOUT,
+     FORWARDED_ALLOW_IPS. Keep DB_POOL_SIZE >= GUNICORN_THREADS.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 9)))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers now and then (slow leaks, fragmentation); jitter avoids restarting all at once
+max_requests = 2000
+max_requests_jitter = 200
+
+# Talisman force_https relies on X-Forwarded-Proto from the reverse proxy
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# the app writes its own structured access lines (vigi/logging_setup.py)
+accesslog = None
+errorlog = "-"
+
+
+def when_ready(server):
+    from vigi.warmup import warm_shared
+
+    app = server.app.wsgi()
+    warm_shared(app)
+
+    gc.collect()
+    gc.freeze()
+
+    if workers > 1:
+        if app.config.get("CACHE_TYPE") in ("SimpleCache", "simple", "NullCache"):
+            server.log.warning("CACHE_TYPE=%s is per worker: invalidations won't reach other workers",
+                               app.config.get("CACHE_TYPE"))
+        if str(app.config.get("RATELIMIT_STORAGE_URI", "memory://")).startswith("memory://"):
+            server.log.warning("RATELIMIT_STORAGE_URI=memory:// counts limits per worker")
+
+
+def post_fork(server, worker):
+    from vigi.warmup import reset_after_fork
+
+    reset_after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    from vigi.warmup import warm_worker
+
+    warm_worker(worker.app.wsgi())
@@ -0,0 +1,36 @@
+"""add image_refs (content-addressed uploads + reference counts)
+
+Revision ID: 5d1e0c7a9b42
+Revises: b7d2708884ff
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5d1e0c7a9b42"
+down_revision = "b7d2708884ff"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "image_refs",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("refcount", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    # existing (timestamp-named) uploads keep their names; only their counts are recorded
+    op.execute("""
+        INSERT INTO image_refs (name, refcount, created_at)
+        SELECT image, COUNT(*), CURRENT_TIMESTAMP
+        FROM lots
+        WHERE image IS NOT NULL AND image <> ''
+        GROUP BY image;
+    """)
+
+
+def downgrade():
+    op.drop_table("image_refs")
@@ -0,0 +1,36 @@
+"""lots.version + idempotency_keys (offline batch replay)
+
+Revision ID: 8c3f9e21d4a7
+Revises: 5d1e0c7a9b42
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8c3f9e21d4a7"
+down_revision = "5d1e0c7a9b42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("lots") as batch_op:
+        batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("key", sa.String(length=64), primary_key=True),
+        sa.Column("result", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
+    with op.batch_alter_table("lots") as batch_op:
+        batch_op.drop_column("version")
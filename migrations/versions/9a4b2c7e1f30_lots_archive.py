@@ -0,0 +1,44 @@
+"""lots_archive (cold storage for long-expired lots)
+
+Revision ID: 9a4b2c7e1f30
+Revises: 8c3f9e21d4a7
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9a4b2c7e1f30"
+down_revision = "8c3f9e21d4a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "lots_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("lot_id", sa.Integer(), nullable=False),
+        sa.Column("lot_number", sa.String(length=255), nullable=False),
+        sa.Column("product_name", sa.String(length=200), nullable=False),
+        sa.Column("type", sa.String(length=100), nullable=False),
+        sa.Column("expiry_date", sa.Date(), nullable=False),
+        sa.Column("pn", sa.String(length=255), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("image", sa.String(length=255), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_lots_archive_lot_id", "lots_archive", ["lot_id"])
+    op.create_index("ix_lots_archive_lot_number", "lots_archive", ["lot_number"])
+    op.create_index("ix_lots_archive_expiry_date", "lots_archive", ["expiry_date"])
+    op.create_index("ix_lots_archive_pn", "lots_archive", ["pn"])
+
+
+def downgrade():
+    op.drop_index("ix_lots_archive_pn", table_name="lots_archive")
+    op.drop_index("ix_lots_archive_expiry_date", table_name="lots_archive")
+    op.drop_index("ix_lots_archive_lot_number", table_name="lots_archive")
+    op.drop_index("ix_lots_archive_lot_id", table_name="lots_archive")
+    op.drop_table("lots_archive")
@@ -33,6 +33,12 @@ class Lot(db.Model):
     pn = db.Column(db.String(255), nullable=False, unique=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     image = db.Column(db.String(255), nullable=True)
+    # bumped by SQLAlchemy on every UPDATE; offline edits replay against it (vigi/services/sync.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
+    archived = False
 
     def __repr__(self):
         return f"<Lot {self.lot_number} - {self.product_name} (PN: {self.pn})>"
@@ -49,6 +55,54 @@ class Lot(db.Model):
         return "valid"
 
 
+class ArchivedLot(db.Model):
+    """Lot moved out of `lots` long after expiry (`flask lots archive`)."""
+    __tablename__ = "lots_archive"
+
+    id = db.Column(db.Integer, primary_key=True)
+    lot_id = db.Column(db.Integer, nullable=False, index=True)  # id it had in `lots` (SQLite may reuse it)
+    lot_number = db.Column(db.String(255), nullable=False, index=True)
+    product_name = db.Column(db.String(200), nullable=False)
+    type = db.Column(db.String(100), nullable=False)
+    expiry_date = db.Column(db.Date, nullable=False, index=True)
+    pn = db.Column(db.String(255), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    image = db.Column(db.String(255), nullable=True)  # still counted in image_refs
+    version = db.Column(db.Integer, nullable=False, default=1)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    archived = True
+    status = "expired"
+
+    def __repr__(self):
+        return f"<ArchivedLot {self.lot_number} - {self.product_name} (PN: {self.pn})>"
+
+
+class ImageRef(db.Model):
+    """One row per stored upload (content-addressed name) and how many lots use it."""
+    __tablename__ = "image_refs"
+
+    name = db.Column(db.String(64), primary_key=True)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ImageRef {self.name} x{self.refcount}>"
+
+
+class IdempotencyKey(db.Model):
+    """Outcome of one replayed offline operation, keyed by the client's key (per user)."""
+    __tablename__ = "idempotency_keys"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    result = db.Column(db.Text, nullable=False)  # JSON, returned as-is when the key comes back
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.key} user={self.user_id}>"
+
+
 class Log(db.Model):
     __tablename__ = "logs"
 
@@ -127,9 +181,6 @@ class AppSettings(db.Model):
 
     @classmethod
     def get(cls):
-        instance = cls.query.first()
-        if not instance:
-            instance = cls()
-            db.session.add(instance)
-            db.session.commit()
-        return instance
+        """The singleton row (created on first use), cached per process: vigi/services/identity.py."""
+        from vigi.services.identity import settings
+        return settings()
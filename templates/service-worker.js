@@ -26,11 +26,9 @@ const PRECACHE_URLS = [
   "/static/lang/ar.json",
   "/static/lang/en.json",
   "/manifest.json",
-  "{{ url_for('static', filename='css/app.min.css', v=config.ASSET_VERSION) }}",
-  "{{ url_for('static', filename='js/app.min.js', v=config.ASSET_VERSION) }}",
-  "{{ url_for('static', filename='images/vigifroid_icon.png', v=config.ASSET_VERSION) }}",
-  "{{ url_for('static', filename='images/safran_icon.png', v=config.ASSET_VERSION) }}",
-  "{{ url_for('static', filename='manifest.json', v=config.ASSET_VERSION) }}",
+  {%- for url in precache_urls() %}
+  "{{ url }}",
+  {%- endfor %}
   "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css",
   "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js"
 ];
@@ -143,11 +141,12 @@ self.addEventListener("fetch", event => {
       try {
         return await fetch(req.clone());
       } catch {
+        let key = null;
         try {
-          const body = await req.clone().json().catch(()=>({}));
-          await savePendingOperation(req.url, req.method, body);
+          const op = await toOperation(req.clone());
+          if (op) key = await savePendingOperation(op);
         } catch {}
-        return new Response(JSON.stringify({ offline:true, saved:true }), {
+        return new Response(JSON.stringify({ offline:true, saved:!!key, key }), {
           headers:{ "Content-Type":"application/json" }
         });
       }
@@ -155,6 +154,28 @@ self.addEventListener("fetch", event => {
     return;
   }
 
+  const path = new URL(req.url).pathname;
+
+  // 📡 Live updates: a long-lived stream, straight to the network
+  if (path === "{{ url_for('lots.events') }}") return;
+
+  // 🧱 Listing fragments (filters/search/paging): Network-first, last copy offline
+  if (path === "{{ url_for('lots.grid') }}") {
+    event.respondWith((async () => {
+      const runtime = await caches.open(RUNTIME);
+      try {
+        const net = await fetch(req);
+        if (shouldCacheResponse(req.url, net)) {
+          try { await runtime.put(req, net.clone()); } catch {}
+        }
+        return net;
+      } catch {
+        return (await runtime.match(req)) || new Response("", { status: 504 });
+      }
+    })());
+    return;
+  }
+
   // 📄 Pages (navigate/document): Network-first
   if (req.mode === "navigate" || req.destination === "document") {
     event.respondWith((async () => {
@@ -197,7 +218,7 @@ self.addEventListener("fetch", event => {
       // ✅ مهم: فالأوفلاين الصور ما خاصهاش ترجع offline.html
       if (req.destination === "image") {
         const precache = await caches.open(PRECACHE);
-        return (await precache.match("/static/images/vigifroid_icon.png?v={{ config.ASSET_VERSION }}")) ||
+        return (await precache.match("{{ asset_url('images/vigifroid_icon.png') }}")) ||
                (await precache.match("/static/images/vigifroid_icon.png")) ||
                new Response("", { status: 504 });
       }
@@ -209,42 +230,106 @@ self.addEventListener("fetch", event => {
 });
 
 // ========== Save pending ops ==========
-async function savePendingOperation(url, method, body) {
+// Only lot writes can be replayed (POST /lots/sync); the photo stays behind until online.
+const SYNC_URL = "{{ url_for('lots.sync_operations') }}";
+const SYNC_BATCH = {{ config.SYNC_MAX_OPERATIONS|int }};
+const SKIP_FIELDS = ["csrf_token", "submit", "image"];
+
+async function toOperation(req) {
+  const path = new URL(req.url, self.location.origin).pathname;
+  const fields = {};
+  try {
+    const form = await req.formData();
+    for (const [k, v] of form.entries()) {
+      if (!SKIP_FIELDS.includes(k) && typeof v === "string") fields[k] = v;
+    }
+  } catch {}
+  const version = fields.version ? Number(fields.version) : null;
+  delete fields.version;
+
+  let m;
+  if (path === "/lots/add") return { op: "add", fields };
+  if ((m = /^\/lots\/edit\/(\d+)$/.exec(path))) return { op: "edit", lot_id: Number(m[1]), version, fields };
+  if ((m = /^\/lots\/delete\/(\d+)$/.exec(path))) return { op: "delete", lot_id: Number(m[1]), version };
+  return null;
+}
+
+async function savePendingOperation(op) {
   const db = await openDB();
+  const key = self.crypto.randomUUID();
   const tx = db.transaction(STORE_PENDING, "readwrite");
-  tx.objectStore(STORE_PENDING).add({ url, method, body, timestamp:new Date().toISOString() });
+  tx.objectStore(STORE_PENDING).add({ ...op, key, timestamp:new Date().toISOString() });
   await txComplete(tx);
-  console.log("💾 Pending op saved:", method, url);
+  console.log("💾 Pending op saved:", op.op, op.lot_id || "");
+  return key;
 }
 
 // ========== Sync pending ops ==========
 self.addEventListener("sync", e => {
   if (e.tag === "sync-pending-operations") e.waitUntil(syncPendingOperations());
 });
-async function syncPendingOperations() {
+
+let syncing = null;
+function syncPendingOperations() {
+  // one replay at a time: "sync" events and TRIGGER_SYNC messages can overlap
+  if (!syncing) syncing = replayPending().finally(() => { syncing = null; });
+  return syncing;
+}
+
+async function replayPending() {
   const db = await openDB();
-  const tx = db.transaction(STORE_PENDING, "readwrite");
-  const store = tx.objectStore(STORE_PENDING);
+  const read = db.transaction(STORE_PENDING, "readonly");
   const all = await new Promise((res,rej)=>{
-    const r=store.getAll(); r.onsuccess=()=>res(r.result); r.onerror=()=>rej(r.error);
+    const r=read.objectStore(STORE_PENDING).getAll(); r.onsuccess=()=>res(r.result); r.onerror=()=>rej(r.error);
   });
 
-  for (const op of all) {
+  // entries queued by older versions (no key/op) cannot be replayed
+  const stale = all.filter(o => !o.key || !o.op);
+  if (stale.length) {
+    const del = db.transaction(STORE_PENDING,"readwrite");
+    stale.forEach(o => del.objectStore(STORE_PENDING).delete(o.id));
+    await txComplete(del);
+  }
+  const pending = all.filter(o => o.key && o.op);
+  if (!pending.length) return;
+
+  let token;
+  try {
+    const r = await fetch(SYNC_URL, { credentials:"same-origin", cache:"no-store" });
+    if (!r.ok) return;  // logged out / not admin: keep the queue
+    token = (await r.json()).csrf_token;
+  } catch { return; }
+
+  const results = [];
+  for (let i = 0; i < pending.length; i += SYNC_BATCH) {
+    const batch = pending.slice(i, i + SYNC_BATCH);
+    let body;
     try {
-      const r = await fetch(op.url,{
-        method: op.method,
-        headers: { "Content-Type":"application/json" },
-        body: JSON.stringify(op.body)
+      const r = await fetch(SYNC_URL, {
+        method: "POST",
+        credentials: "same-origin",
+        headers: { "Content-Type":"application/json", "X-CSRFToken": token },
+        body: JSON.stringify({ operations: batch.map(({ id, timestamp, ...op }) => op) })
       });
-      if (r.ok) {
-        const del = db.transaction(STORE_PENDING,"readwrite");
-        del.objectStore(STORE_PENDING).delete(op.id);
-        await txComplete(del);
-        console.log("✅ Synced:", op.method, op.url);
-      }
+      if (!r.ok) { console.warn("❌ Sync rejected:", r.status); break; }
+      body = await r.json();
     } catch (err) {
-      console.warn("❌ Sync fail:", op.url, err);
+      console.warn("❌ Sync fail:", err);
+      break;
     }
+
+    // every answered key is final (applied, conflict, invalid, not_found): drop it from the queue
+    const answered = new Set(body.results.map(x => x.key));
+    const del = db.transaction(STORE_PENDING,"readwrite");
+    batch.forEach(o => { if (answered.has(o.key)) del.objectStore(STORE_PENDING).delete(o.id); });
+    await txComplete(del);
+    results.push(...body.results);
+  }
+
+  if (results.length) {
+    console.log("✅ Synced:", results.length, "operation(s)");
+    const clients = await self.clients.matchAll({ type:"window" });
+    clients.forEach(c => c.postMessage({ type:"SYNC_RESULT", results }));
   }
 }
 
@@ -0,0 +1,50 @@
+# test_assets.py — fingerprinted, precompressed static assets
+
+import gzip
+import json
+
+from flask import Flask
+
+from vigi.assets import build, init_assets, load_manifest, minify_css
+
+
+def test_minify_css_keeps_rules():
+    css = "/* c */\n.a  >  .b {\n  color : red ;\n  margin: 0 auto;\n}\n@media (max-width: 576px) { .c { top: 0 } }"
+    assert minify_css(css) == ".a>.b{color:red;margin:0 auto}@media (max-width: 576px){.c{top:0}}"
+
+
+def test_build_writes_hashed_files_and_siblings(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "app.css").write_text(".x { color: red; }\n" * 100)
+
+    manifest = build(str(tmp_path), use_brotli=False)
+    out = manifest["files"]["css/app.css"]
+    assert out.startswith("dist/css/app.") and out.endswith(".css")
+    assert (tmp_path / out).read_text().startswith(".x{color:red}")
+    assert gzip.decompress((tmp_path / (out + ".gz")).read_bytes()) == (tmp_path / out).read_bytes()
+    assert load_manifest(str(tmp_path))["version"] == manifest["version"]
+
+    # a changed source gets a new name; the old build is pruned
+    (tmp_path / "css" / "app.css").write_text(".y{}")
+    second = build(str(tmp_path), use_brotli=False)
+    assert second["files"]["css/app.css"] != out
+    assert not (tmp_path / out).exists()
+    assert json.loads((tmp_path / "dist" / "manifest.json").read_text())["files"] == second["files"]
+
+
+def test_dist_route_stays_inside_the_static_folder(tmp_path):
+    static = tmp_path / "static"
+    (static / "css").mkdir(parents=True)
+    (static / "css" / "app.css").write_text(".x { color: red; }\n" * 100)
+    (tmp_path / ".env").write_text("SECRET_KEY=leak")
+    manifest = build(str(static), use_brotli=False)
+
+    app = Flask(__name__, static_folder=str(static))
+    init_assets(app)
+    client = app.test_client()
+    built = client.get("/static/" + manifest["files"]["css/app.css"], headers={"Accept-Encoding": "gzip"})
+    assert built.status_code == 200 and built.headers["Content-Encoding"] == "gzip"
+
+    for path in ("/static/dist/../../.env", "/static/dist/..%2F..%2F.env", "/static/dist/%2E%2E/%2E%2E/.env"):
+        resp = client.get(path)
+        assert resp.status_code == 404 and b"leak" not in resp.data
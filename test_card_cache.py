@@ -0,0 +1,48 @@
+# test_card_cache.py — lot cards rendered once per (lot, version, status, locale)
+
+import os
+from datetime import date
+
+import pytest
+from flask import Flask, render_template
+from flask_login import AnonymousUserMixin
+
+from vigi.extensions import babel, cache
+from models import Lot
+
+TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+
+@pytest.fixture()
+def render():
+    app = Flask(__name__, template_folder=TEMPLATES)
+    app.config.update(SECRET_KEY="x", CACHE_TYPE="SimpleCache")
+    cache.init_app(app)
+    babel.init_app(app)
+    locale = {"lang": "fr"}
+
+    def _render(lot):
+        return render_template(
+            "lots/_card.html", lot=lot, config=app.config, current_user=AnonymousUserMixin(),
+            get_locale=lambda: locale["lang"], uploaded_placeholder=lambda name: "",
+            fmt_date=lambda d: d.strftime("%d/%m/%Y"),
+        )
+
+    with app.test_request_context():
+        yield _render, locale
+
+
+def test_card_is_reused_until_its_version_or_locale_changes(render):
+    _render, locale = render
+    lot = Lot(id=5, lot_number="L5", product_name="Loctite", type="tt", pn="PN5",
+              expiry_date=date(2099, 1, 1), version=1)
+    assert "Loctite" in _render(lot)
+
+    lot.product_name = "Renamed"  # same version: served from the cache
+    assert "Loctite" in _render(lot)
+    lot.version = 2
+    assert "Renamed" in _render(lot)
+
+    lot.product_name = "Again"
+    locale["lang"] = "ar"
+    assert "Again" in _render(lot)
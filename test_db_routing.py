@@ -0,0 +1,61 @@
+# test_db_routing.py — SELECTs on a replica bind, writes (and reads after them) on the primary
+
+from datetime import date
+
+import pytest
+
+from vigi.db_routing import init_db_routing, read_replica
+from vigi.extensions import db
+from models import Lot
+
+
+def _numbers():
+    return [lot.lot_number for lot in Lot.query.order_by(Lot.id)]
+
+
+def _touch():
+    db.session.execute(Lot.__table__.update().values(quantity=2))
+    db.session.commit()
+    return "ok"
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    def setup(app):
+        app.add_url_rule("/lots", "lots", lambda: ",".join(_numbers()))
+        app.add_url_rule("/touch", "touch", _touch, methods=["POST"])
+        init_db_routing(app, db)
+
+    app = make_app(
+        setup=setup,
+        tables=False,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_BINDS={"replica0": f"sqlite:///{tmp_path / 'replica.db'}"},
+        DB_REPLICA_ENDPOINTS=("lots",),
+    )
+    for engine, name in ((db.engines[None], "primary"), (db.engines["replica0"], "replica")):
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(Lot.__table__.insert().values(
+                lot_number=name, product_name=name, type="tt", expiry_date=date(2027, 1, 1), pn=name))
+    return app
+
+
+def test_reads_go_to_the_replica_only_when_asked(app):
+    assert _numbers() == ["primary"]
+    with read_replica():
+        assert _numbers() == ["replica"]
+
+
+def test_a_session_that_wrote_reads_its_own_writes(app):
+    with read_replica():
+        db.session.add(Lot(lot_number="new", product_name="new", type="tt", expiry_date=date(2027, 1, 1), pn="new"))
+        db.session.commit()
+        assert _numbers() == ["primary", "new"]
+
+
+def test_endpoint_routing_and_read_your_writes_window(app):
+    client = app.test_client()
+    assert client.get("/lots").text == "replica"
+    client.post("/touch")
+    assert client.get("/lots").text == "primary"
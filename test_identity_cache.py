@@ -0,0 +1,46 @@
+# test_identity_cache.py — user_loader / settings row served from memory, dropped on commit
+
+import pytest
+from sqlalchemy import event
+
+from vigi.extensions import db
+from vigi.services import identity
+from models import AppSettings, User
+
+
+@pytest.fixture()
+def app(make_app):
+    app = make_app(setup=identity.init_identity_cache, IDENTITY_CACHE_TTL=60)
+    identity.invalidate()
+    db.session.add(User(id=1, username="admin", email="a@a.com", password="-", role="admin"))
+    db.session.commit()
+    return app
+
+
+def _count_queries():
+    seen = []
+    event.listen(db.engine, "before_cursor_execute", lambda *a: seen.append(a[2]))
+    return seen
+
+
+def test_user_is_loaded_once_and_reloaded_after_a_write(app):
+    assert identity.load_user(1).role == "admin"
+    db.session.remove()
+
+    queries = _count_queries()
+    user = identity.load_user(1)
+    assert user.username == "admin" and queries == []
+
+    user.role = "employee"  # attached: changes still commit
+    db.session.commit()
+    db.session.remove()
+    assert identity.load_user(1).role == "employee"
+
+
+def test_settings_row_is_created_once_then_cached(app):
+    row = AppSettings.get()
+    assert AppSettings.query.count() == 1
+    db.session.remove()
+
+    queries = _count_queries()
+    assert AppSettings.get().id == row.id and queries == []
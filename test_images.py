@@ -0,0 +1,147 @@
+# test_images.py — lot photo pipeline (bounded decode + responsive variants + image_refs)
+
+import io
+import os
+from datetime import date
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+from vigi.extensions import db
+from vigi.services import images
+from vigi.services.images import build_variants, decode_upload, remove_variants, variant_name, variants
+from vigi.storage import LocalStorage
+from models import ArchivedLot, ImageRef, Lot
+
+
+def _jpeg(w, h):
+    buf = io.BytesIO()
+    Image.new("RGB", (w, h), (200, 40, 40)).save(buf, "JPEG")
+    buf.seek(0)
+    return buf
+
+
+def test_decode_upload_caps_the_longest_side():
+    img = decode_upload(_jpeg(4000, 3000), 1600)
+    assert img.mode == "RGB"
+    assert max(img.size) == 1600
+
+
+def test_variants_are_listed_once_built(tmp_path):
+    store = LocalStorage(str(tmp_path))
+    img = decode_upload(_jpeg(800, 600), 1600)
+    assert variants(store, "a.jpg", "160,320,640,1280") is None
+
+    assert build_variants(img, store, "a.jpg", "160,320,640,1280") == [160, 320, 640]
+    found = variants(store, "a.jpg", "160,320,640,1280")
+    assert found["widths"] == [160, 320, 640]
+    assert found["placeholder"].startswith("data:image/webp;base64,")
+    with Image.open(tmp_path / variant_name("a.jpg", 320, "jpeg")) as v:
+        assert v.size == (320, 240)
+
+    remove_variants(store, "a.jpg", "160,320,640,1280")
+    assert variants(store, "a.jpg", "160,320,640,1280") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_gc_only_considers_unreferenced_upload_files(tmp_path):
+    from vigi.services.images import iter_orphans, upload_stem
+
+    keep, drop = "a" * 32, "b" * 32
+    for name in (f"{keep}.jpg", f"{keep}_w320.webp", f"{drop}.jpg", f"{drop}_ph.webp",
+                 "img_20250101120000.jpg", "favicon-16x16_vigifroid.png"):
+        (tmp_path / name).write_bytes(b"x")
+
+    assert upload_stem(f"{drop}_w640.jpg") == drop
+    assert upload_stem("favicon-16x16_vigifroid.png") is None
+
+    store = LocalStorage(str(tmp_path))
+    orphans = sorted(key for key, _ in iter_orphans(store, {keep}, grace_seconds=-1))
+    assert orphans == [f"{drop}.jpg", f"{drop}_ph.webp", "img_20250101120000.jpg"]
+    assert list(iter_orphans(store, {keep}, grace_seconds=3600)) == []
+
+
+def test_gc_ages_a_photo_by_its_master(tmp_path):
+    from vigi.services.images import iter_orphans
+
+    reused, old, uploading = "a" * 32, "b" * 32, "c" * 32
+    for name in (f"{reused}.jpg", f"{reused}_w320.webp", f"{reused}_ph.webp",
+                 f"{old}.jpg", f"{old}_ph.webp", f"{uploading}.jpg.tmp42", f"{uploading}_ph.webp"):
+        (tmp_path / name).write_bytes(b"x")
+        os.utime(tmp_path / name, (1, 1))
+    os.utime(tmp_path / f"{reused}.jpg")         # re-uploaded while unreferenced: master touched
+    os.utime(tmp_path / f"{uploading}_ph.webp")  # no master yet: its newest file counts
+
+    store = LocalStorage(str(tmp_path))
+    orphans = sorted(key for key, _ in iter_orphans(store, set(), grace_seconds=3600))
+    assert orphans == [f"{old}.jpg", f"{old}_ph.webp"]
+
+
+class _Inline:
+    def submit(self, fn):
+        fn()
+
+
+def test_reupload_rebuilds_variants_lost_to_gc(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(IMAGE_WIDTHS="160,320")
+    monkeypatch.setattr(images, "_get_executor", lambda workers: _Inline())
+    store = LocalStorage(str(tmp_path))
+
+    name = images.save_upload(app, _jpeg(800, 600), store)
+    assert variants(store, name, "160,320")["widths"] == [160, 320]
+
+    remove_variants(store, name, "160,320")  # what a gc racing the re-upload leaves behind
+    assert images.save_upload(app, _jpeg(800, 600), store) == name
+    assert variants(store, name, "160,320")["widths"] == [160, 320]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [name, images.placeholder_name(name)]
+        + [variant_name(name, w, fmt) for w in (160, 320) for fmt in ("webp", "jpeg")]
+    )
+
+
+def test_lookups_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "_missing", images.LocalLRU(3, ttl=images.MISSING_TTL))
+    store = LocalStorage(str(tmp_path))
+    for i in range(10):
+        assert variants(store, f"{i}.jpg", "160") is None
+    assert len(images._missing) == 3
+
+
+@pytest.fixture()
+def session(app):
+    return db.session
+
+
+def _refs():
+    return {r.name: r.refcount for r in ImageRef.query}
+
+
+def test_acquire_release_never_below_zero(session):
+    images.acquire(session, "a.jpg")
+    images.acquire(session, "a.jpg")
+    images.acquire(session, None)
+    images.release(session, "a.jpg")
+    session.commit()
+    assert _refs() == {"a.jpg": 1}
+    images.release(session, "a.jpg")
+    images.release(session, "a.jpg")
+    session.commit()
+    assert _refs() == {"a.jpg": 0}
+
+
+def test_recount_counts_hot_and_archived_lots(session):
+    lot = dict(type="tt", product_name="P", expiry_date=date(2020, 1, 1))
+    session.add_all([
+        Lot(lot_number="L1", pn="PN1", image="a.jpg", **lot),
+        Lot(lot_number="L2", pn="PN2", image="b.jpg", **lot),
+        ArchivedLot(lot_id=9, lot_number="L9", pn="PN9", image="a.jpg", **lot),
+        ImageRef(name="b.jpg", refcount=5),
+        ImageRef(name="gone.jpg", refcount=2),
+    ])
+    session.commit()
+    assert images.recount(session) == 3
+    session.commit()
+    assert _refs() == {"a.jpg": 2, "b.jpg": 1, "gone.jpg": 0}
+    assert images.recount(session) == 0
@@ -0,0 +1,59 @@
+# test_live.py — live dashboard events (commit hook → broker → SSE stream)
+
+from datetime import date
+
+import pytest
+
+from vigi import live
+from vigi.extensions import db
+from models import Lot
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    return make_app(setup=lambda app: live.init_live(app, db), LIVE_BUS="file",
+                    LIVE_BUS_FILE=str(tmp_path / "live.log"), LIVE_MAX_STREAMS=1)
+
+
+def _lot(n):
+    return Lot(lot_number=f"L{n}", product_name=f"P{n}", type="tt", expiry_date=date(2030, 1, 1), pn=f"PN{n}")
+
+
+def test_commits_become_lot_events_and_rollbacks_do_not(app):
+    broker = live.get_broker()
+    sub = broker.subscribe()
+    assert broker.full()
+
+    lot = _lot(1)
+    db.session.add(lot)
+    db.session.flush()
+    lot.quantity = 3  # added then edited before the commit: one "add"
+    db.session.commit()
+    db.session.add(_lot(2))
+    db.session.rollback()
+    lot.product_name = "renamed"
+    db.session.commit()
+
+    events = [sub.queue.get_nowait() for _ in range(sub.queue.qsize())]
+    assert [(e["t"], e["d"]["op"], e["d"]["version"]) for e in events] == [("lot", "add", 2), ("lot", "edit", 3)]
+    broker.unsubscribe(sub)
+
+    # a reconnect gets what it missed after its last id; a bus message from another process is delivered
+    assert broker.since(events[0]["id"]) == events[1:]
+    assert broker.since(1) is None  # from before this process listened: resync
+    broker._receive({"o": "other", "id": events[-1]["id"] + 1, "t": "resync", "d": {}})
+    assert broker.since(events[-1]["id"])[0]["t"] == "resync"
+
+
+def test_stream_sends_counters_then_events(app):
+    broker = live.get_broker()
+    with app.test_request_context():
+        body = live.stream(broker, heartbeat=0.01, lifetime=0.05)
+        assert next(body).startswith("retry:")
+        first = next(body)
+        assert first.startswith("event: counters") and '"total":0' in first
+        broker.publish("lot", {"op": "delete", "id": 7, "version": 1})
+        chunks = list(body)
+    assert any("event: lot" in c and '"id":7' in c for c in chunks)
+    assert any(c.startswith("event: counters") for c in chunks)
+    assert not broker.full()
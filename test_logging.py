@@ -0,0 +1,113 @@
+# test_logging.py — access lines, sampling, JSON format, queue-based setup
+
+import atexit
+import json
+import logging
+
+import pytest
+from flask import Flask
+from flask.logging import default_handler
+from flask_login import LoginManager
+
+from vigi import logging_setup
+from vigi.logging_setup import JsonFormatter, register_request_logging, setup_logging
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture()
+def make_client():
+    captures = []
+
+    def make(**config):
+        app = Flask(__name__)
+        app.config.update(SECRET_KEY="x", **config)
+        LoginManager(app).user_loader(lambda uid: None)
+        register_request_logging(app)
+
+        @app.get("/ok")
+        def ok():
+            return "ok"
+
+        @app.get("/missing")
+        def missing():
+            return "no", 404
+
+        @app.get("/boom")
+        def boom():
+            return "boom", 500
+
+        @app.get("/asset")
+        def asset():
+            return "x"
+
+        cap = _Capture()
+        app.logger.addHandler(cap)
+        app.logger.setLevel(logging.DEBUG)
+        captures.append((app.logger, cap))
+        return app.test_client(), cap.records
+
+    yield make
+    for logger, cap in captures:
+        logger.removeHandler(cap)
+
+
+def test_status_picks_the_level(make_client):
+    client, records = make_client(LOG_ROUTE_LEVELS={"ok": "DEBUG"})
+    client.get("/ok")
+    client.get("/missing")
+    client.get("/boom")
+    assert [(r.getMessage(), r.levelno) for r in records] == [
+        ("GET /ok [200]", logging.DEBUG),
+        ("GET /missing [404]", logging.WARNING),
+        ("GET /boom [500]", logging.ERROR),
+    ]
+
+
+def test_static_hits_are_sampled_but_errors_never(make_client, monkeypatch):
+    client, records = make_client(LOG_STATIC_SAMPLE_RATE=0.1, LOG_SAMPLED_ENDPOINTS=["asset"])
+    monkeypatch.setattr(logging_setup.random, "random", lambda: 0.5)
+    client.get("/asset")
+    client.get("/ok")  # not a sampled endpoint
+    monkeypatch.setattr(logging_setup.random, "random", lambda: 0.05)
+    client.get("/asset")
+    assert [r.getMessage() for r in records] == ["GET /ok [200]", "GET /asset [200]"]
+
+
+def test_access_line_as_json(make_client):
+    client, records = make_client()
+    client.get("/ok?page=2", headers={"User-Agent": "vf-test"})
+    out = json.loads(JsonFormatter().format(records[0]))
+    assert set(out) == {"ts", "level", "logger", "msg", "http", "user"}
+    assert out["level"] == "INFO" and out["msg"] == "GET /ok [200]" and out["user"] == "Anonymous"
+    assert set(out["http"]) == {"method", "path", "query", "status", "endpoint", "bytes", "duration_ms", "ip", "ua"}
+    assert out["http"]["query"] == "page=2" and out["http"]["endpoint"] == "ok" and out["http"]["ua"] == "vf-test"
+
+
+def test_setup_logging_goes_through_a_queue(tmp_path):
+    app = Flask("vf_logging_setup_test")
+    app.config.update(LOG_LEVEL="warning", LOG_FILE=str(tmp_path / "app.log"))
+    setup_logging(app)
+    listener = app.extensions["log_listener"]
+    try:
+        assert default_handler not in app.logger.handlers
+        assert any(isinstance(h, logging_setup._StructuredQueueHandler) for h in app.logger.handlers)
+        assert app.logger.level == logging.WARNING
+
+        # a second app on the same logger keeps the first one's handlers
+        again = Flask("vf_logging_setup_test")
+        setup_logging(again)
+        assert again.extensions["log_listener"] is None
+        assert len(app.logger.handlers) == 1
+    finally:
+        atexit.unregister(listener.stop)
+        listener.stop()
+        logging_setup._listeners.remove(listener)
+        app.logger.handlers.clear()
@@ -0,0 +1,53 @@
+# test_lot_archive.py — hot/cold archival (`flask lots archive`) and the archived=1 listings
+
+from datetime import date, timedelta
+
+import pytest
+
+from vigi.extensions import db
+from vigi.lots.query_utils import lot_rows, paginate_lots, status_counts
+from vigi.services import images
+from vigi.services.archive import archive_expired
+from models import ArchivedLot, ImageRef, Lot
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture()
+def app(make_app):
+    app = make_app()
+    for i, days in enumerate([-800, -500, -400, -10, 10, 200]):
+        db.session.add(Lot(lot_number=f"L{i}", product_name=f"P{i}", type="tt", pn=f"PN{i}",
+                           expiry_date=TODAY + timedelta(days=days), image="a.jpg" if i == 0 else None))
+    db.session.add(ImageRef(name="a.jpg", refcount=1))
+    db.session.commit()
+    return app
+
+
+def test_archive_moves_only_lots_past_the_window_in_batches(app):
+    assert archive_expired(db.session, 365, today=TODAY, dry_run=True)["moved"] == 3
+    batches = []
+    out = archive_expired(db.session, 365, batch_size=2, today=TODAY, progress=batches.append)
+
+    assert out["moved"] == 3 and batches == [2, 3]
+    assert sorted(l.lot_number for l in Lot.query) == ["L3", "L4", "L5"]
+    assert sorted(a.lot_number for a in ArchivedLot.query) == ["L0", "L1", "L2"]
+    # the archived lot still holds its photo
+    assert images.recount(db.session) == 0
+
+
+def test_listing_and_exports_include_archive_on_request(app):
+    archive_expired(db.session, 365, today=TODAY)
+
+    hot = paginate_lots(page=1, per_page=2, today=TODAY)
+    assert hot.total == 3 and hot.pages == 2
+    both = paginate_lots(page=1, per_page=2, today=TODAY, archived=True)
+    assert both.total == 6 and [l.lot_number for l in both.items] == ["L0", "L1"]
+    assert all(l.archived for l in both.items)
+
+    assert status_counts(today=TODAY) == {"valid": 1, "warning": 1, "expired": 1}
+    assert status_counts(today=TODAY, archived=True)["expired"] == 4
+
+    rows = db.session.execute(lot_rows("L2", today=TODAY, archived=True)).all()
+    assert [(r.lot_number, bool(r.archived)) for r in rows] == [("L2", True)]
+    assert db.session.execute(lot_rows("L2", today=TODAY)).all() == []
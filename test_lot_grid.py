@@ -0,0 +1,36 @@
+# test_lot_grid.py — /lots/grid: the listing's counters + cards as a fragment (or JSON), with ETag/304
+
+from datetime import date, timedelta
+
+import pytest
+
+from vigi.extensions import db
+from vigi.lots.routes import lots_bp
+from models import Lot
+
+
+@pytest.fixture()
+def client(make_app):
+    app = make_app(setup=lambda app: app.register_blueprint(lots_bp))
+    for i, days in enumerate([-5, 10, 100, 200]):
+        db.session.add(Lot(lot_number=f"L{i}", product_name=f"P{i}", type="tt", pn=f"PN{i}",
+                           expiry_date=date.today() + timedelta(days=days)))
+    db.session.commit()
+    return app.test_client()
+
+
+def test_json_grid_follows_the_filters(client):
+    data = client.get("/lots/grid?format=json&per_page=12").get_json()
+    assert data["total"] == 4 and data["pages"] == 1
+    assert data["counts"] == {"valid": 2, "warning": 1, "expired": 1}
+
+    data = client.get("/lots/grid?format=json&status=valid").get_json()
+    assert [lot["lot_number"] for lot in data["lots"]] == ["L2", "L3"]
+    assert all(lot["status"] == "valid" and not lot["archived"] for lot in data["lots"])
+
+
+def test_same_search_again_is_a_304(client):
+    first = client.get("/lots/grid?format=json&q=L1")
+    assert first.headers["Cache-Control"] == "private, no-cache" and first.get_json()["total"] == 1
+    again = client.get("/lots/grid?format=json&q=L1", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and not again.data
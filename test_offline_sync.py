@@ -0,0 +1,48 @@
+# test_offline_sync.py — batched offline replay (idempotency keys, versions, savepoints)
+
+from datetime import date
+
+import pytest
+
+from vigi.extensions import db
+from vigi.services.sync import apply_batch
+from models import Log, Lot, User
+
+
+@pytest.fixture()
+def app(make_app):
+    app = make_app(request_context=True, WTF_CSRF_ENABLED=False)
+    db.session.add(User(id=1, username="admin", email="a@a.com", password="-", role="admin"))
+    db.session.add(Lot(id=1, lot_number="L1", product_name="P1", type="tt", expiry_date=date(2027, 1, 1), pn="PN1"))
+    db.session.commit()
+    return app
+
+
+def _fields(lot_number, pn="PN1"):
+    return {"lot_number": lot_number, "product_name": "Prod", "type": "tt", "expiry_date": "2027-02-02", "pn": pn}
+
+
+def test_batch_applies_in_order_and_reports_conflicts(app):
+    ops = [
+        {"key": "a", "op": "edit", "lot_id": 1, "version": 1, "fields": _fields("L1b")},
+        {"key": "b", "op": "edit", "lot_id": 1, "version": 1, "fields": _fields("L1c")},  # stale copy
+        {"key": "c", "op": "add", "fields": _fields("L1b", pn="PN2")},                     # lot number taken
+        {"key": "d", "op": "add", "fields": _fields("L2", pn="PN2")},
+        {"key": "e", "op": "delete", "lot_id": 99},
+    ]
+    out = apply_batch(ops, user_id=1)
+    assert [r["status"] for r in out["results"]] == ["applied", "conflict", "conflict", "applied", "not_found"]
+    assert out["results"][1]["current"]["lot_number"] == "L1b" and out["results"][1]["current"]["version"] == 2
+    assert out["applied"] == 2
+    assert db.session.get(Lot, 1).lot_number == "L1b"
+    assert Lot.query.count() == 2 and Log.query.count() == 2
+
+
+def test_replayed_keys_are_not_applied_twice(app):
+    ops = [{"key": "k", "op": "add", "fields": _fields("L2", pn="PN2")}]
+    first = apply_batch(ops, user_id=1)
+    again = apply_batch(ops, user_id=1)
+    assert again["applied"] == 0
+    assert again["results"][0]["replayed"] is True
+    assert again["results"][0]["lot_id"] == first["results"][0]["lot_id"]
+    assert Lot.query.count() == 2
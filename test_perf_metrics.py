@@ -0,0 +1,96 @@
+# test_perf_metrics.py — in-process metrics registry, request timings and /__metrics
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin, login_user
+from sqlalchemy import create_engine, text
+
+from vigi.perf.instrumentation import DB_QUERIES, init_instrumentation
+from vigi.perf.metrics import MetricsRegistry, quantile
+from vigi.perf.routes import perf_bp
+
+
+def test_quantile_nearest_rank():
+    values = sorted(range(1, 101))
+    assert quantile(values, 0.5) == 50
+    assert quantile(values, 0.95) == 95
+    assert quantile(values, 0.99) == 99
+    assert quantile([7], 0.99) == 7
+
+
+def test_histogram_snapshot_and_render():
+    reg = MetricsRegistry()
+    h = reg.histogram("vigi_test_seconds", "test")
+    for v in range(1, 11):
+        h.observe(v / 10, endpoint="lots.index")
+
+    snap = h.snapshot(endpoint="lots.index")
+    assert snap["count"] == 10
+    assert snap["p50"] == 0.5
+    assert snap["p99"] == 1.0
+
+    text = reg.render()
+    assert "# TYPE vigi_test_seconds summary" in text
+    assert 'vigi_test_seconds{endpoint="lots.index",quantile="0.95"} 1' in text
+    assert 'vigi_test_seconds_count{endpoint="lots.index"} 10' in text
+
+
+def test_counter_and_gauge_fn():
+    reg = MetricsRegistry()
+    reg.counter("vigi_hits_total", "hits").inc(endpoint="a")
+    reg.gauge("vigi_live", "live", fn=lambda: [({"pool": "primary"}, 3)])
+    text = reg.render()
+    assert 'vigi_hits_total{endpoint="a"} 1' in text
+    assert 'vigi_live{pool="primary"} 3' in text
+
+
+# ── request hooks, Server-Timing, /__metrics access ─
+class _User(UserMixin):
+    def __init__(self, role):
+        self.id, self.role = role, role
+
+
+@pytest.fixture()
+def client():
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY="x", METRICS_TOKEN="s3cret")
+    LoginManager(app).user_loader(_User)
+    init_instrumentation(app)
+    app.register_blueprint(perf_bp)
+    engine = create_engine("sqlite://")
+
+    @app.get("/q")
+    def q():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT nope FROM missing"))
+            assert not conn.info.get("vf_query_start")  # the failed statement left no start time behind
+        return "ok"
+
+    @app.get("/login/<role>")
+    def login(role):
+        login_user(_User(role))
+        return "ok"
+
+    return app.test_client()
+
+
+def test_server_timing_only_for_admins(client):
+    assert "Server-Timing" not in client.get("/q").headers
+    client.get("/login/admin")
+    header = client.get("/q").headers["Server-Timing"]
+    assert 'desc="2 queries"' in header and "app;dur=" in header
+    assert DB_QUERIES.snapshot(endpoint="q")["count"] >= 2
+
+
+def test_metrics_needs_admin_or_token(client):
+    assert client.get("/__metrics").status_code == 403
+    assert client.get("/__metrics", headers={"Authorization": "Bearer nope"}).status_code == 403
+    ok = client.get("/__metrics", headers={"Authorization": "Bearer s3cret"})
+    assert ok.status_code == 200 and "vigi_request_duration_seconds" in ok.text
+    client.get("/login/user")
+    assert client.get("/__metrics").status_code == 403
+    client.get("/login/admin")
+    assert client.get("/__metrics").status_code == 200
@@ -0,0 +1,61 @@
+# test_pool.py — pool telemetry (checkouts in use / peak) and adaptive resizing
+
+import sqlite3
+
+import pytest
+
+from vigi.perf.pool import CHECKOUT_WAIT, TimedQueuePool
+
+
+@pytest.fixture()
+def pool(tmp_path):
+    path = str(tmp_path / "p.db")
+    pool = TimedQueuePool(lambda: sqlite3.connect(path, check_same_thread=False), pool_size=2, max_overflow=10)
+    pool.vf_name = "test"
+    yield pool
+    pool.dispose()
+
+
+def test_retried_checkout_counts_once(pool):
+    inc = pool._inc_overflow
+    calls = []
+
+    def lose_the_race_once():
+        calls.append(1)
+        return inc() if len(calls) > 1 else False  # → QueuePool._do_get() calls itself again
+
+    pool._inc_overflow = lose_the_race_once
+    waits = CHECKOUT_WAIT.snapshot(pool="test")["count"]
+
+    conn = pool.connect()
+    assert len(calls) == 2
+    assert pool._vf_in_use == pool.checkedout() == 1 and pool._vf_peak == 1
+    assert CHECKOUT_WAIT.snapshot(pool="test")["count"] == waits + 1
+    conn.close()
+    assert pool._vf_in_use == pool.checkedout() == 0
+
+
+def test_resize_keeps_connection_accounting(pool):
+    conns = [pool.connect() for _ in range(3)]  # 2 pooled + 1 overflow
+    pool.resize(5)
+    assert pool.size() == 5 and pool.checkedout() == 3
+    for c in conns:
+        c.close()
+    assert pool.checkedin() == 3
+
+    pool.resize(1)  # idle extras are closed at once
+    assert pool.size() == 1 and pool.checkedin() == 1 and pool.checkedout() == 0
+    assert pool.overflow() == 0
+    conns = [pool.connect() for _ in range(3)]
+    assert pool.checkedout() == 3 and pool.overflow() == 2
+
+
+def test_adaptive_sizes_to_the_window_peak(pool):
+    pool.adaptive, pool.adapt_interval, pool.min_size, pool.max_size = True, 0.0, 2, 20
+    conns = [pool.connect() for _ in range(6)]
+    for c in conns:
+        c.close()
+    pool.connect().close()  # new window: peak 6 + headroom 2
+    assert pool.size() == 8
+    pool.connect().close()  # peak 1 → shrinks one step per window
+    assert pool.size() == 7
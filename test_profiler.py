@@ -0,0 +1,76 @@
+# test_profiler.py — on-demand admin profiler: gate, capture, retention, one at a time
+
+import os
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin, login_user
+
+from vigi.perf import profiler
+from vigi.perf.profiler import init_profiler, list_profiles, load_profile
+from vigi.perf.routes import perf_bp
+
+
+class _User(UserMixin):
+    def __init__(self, role):
+        self.id, self.role = role, role
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY="x", PROFILER_DIR=str(tmp_path), PROFILER_ENGINE="cprofile", **config)
+    LoginManager(app).user_loader(_User)
+    init_profiler(app)
+    app.register_blueprint(perf_bp)
+    app.add_url_rule("/work", "work", lambda: str(sum(range(1000))))
+    app.add_url_rule("/boom", "boom", lambda: 1 / 0)
+
+    @app.get("/login/<role>")
+    def login(role):
+        login_user(_User(role))
+        return "ok"
+
+    return app.test_client()
+
+
+@pytest.fixture()
+def client(tmp_path):
+    return _app(tmp_path, PROFILER_ENABLED=True, PROFILER_KEEP=2)
+
+
+def test_only_admins_get_profiled(client, tmp_path):
+    assert "X-Profile-Id" not in client.get("/work?__profile=1").headers
+    client.get("/login/user")
+    assert "X-Profile-Id" not in client.get("/work?__profile=1").headers
+    assert client.get("/__profiles").status_code == 403
+    assert os.listdir(tmp_path) == []
+
+    client.get("/login/admin")
+    profile_id = client.get("/work?__profile=1&page=2").headers["X-Profile-Id"]
+    meta = load_profile(str(tmp_path), profile_id)
+    assert meta["endpoint"] == "work" and meta["query"] == {"page": "2"} and meta["status"] == 200
+    assert os.path.exists(tmp_path / f"{profile_id}.prof")
+
+
+def test_keeps_the_newest_profiles(client, tmp_path):
+    client.get("/login/admin")
+    ids = [client.get("/work", headers={"X-Profile": "1"}).headers["X-Profile-Id"] for _ in range(3)]
+    assert [p["id"] for p in list_profiles(str(tmp_path))] == sorted(ids[1:], reverse=True)
+    assert len(os.listdir(tmp_path)) == 4  # .json + .prof each
+
+
+def test_a_second_profile_request_runs_unprofiled(client):
+    client.get("/login/admin")
+    with profiler._busy:  # another thread is being profiled
+        resp = client.get("/work?__profile=1")
+    assert resp.status_code == 200 and "X-Profile-Id" not in resp.headers
+    assert "X-Profile-Id" in client.get("/work?__profile=1").headers
+    assert client.get("/boom?__profile=1").status_code == 500
+    assert not profiler._busy.locked()  # freed even when the view raised
+
+
+def test_profile_listing_gate_when_disabled(tmp_path):
+    client = _app(tmp_path)
+    assert client.get("/__profiles").status_code == 403  # not even revealing whether it is on
+    client.get("/login/admin")
+    assert client.get("/__profiles").status_code == 404
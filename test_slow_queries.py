@@ -0,0 +1,45 @@
+# test_slow_queries.py — fingerprinting + summary of the slow-query log
+
+from vigi.perf import slow_queries
+from vigi.perf.slow_queries import SlowQueryRecorder, fingerprint, normalize_sql, summarize
+
+
+def test_same_shape_same_fingerprint():
+    a = "SELECT * FROM lots WHERE lots.pn ILIKE %(pn_1)s AND lots.id IN (%(id_1)s, %(id_2)s) LIMIT 48"
+    b = "SELECT *  FROM lots WHERE lots.pn ILIKE %(pn_1)s AND lots.id IN (%(id_1)s) LIMIT 12"
+    assert normalize_sql(a) == "select * from lots where lots.pn ilike ? and lots.id in (...) limit ?"
+    assert fingerprint(a) == fingerprint(b)
+
+
+def test_literals_are_ignored():
+    assert fingerprint("select 1 from lots where pn = 'A1'") == fingerprint("select 2 from lots where pn = 'B2'")
+
+
+def test_postgres_casts_are_kept():
+    assert normalize_sql("SELECT %(d)s::date, x::text") == "select ?::date, x::text"
+    assert fingerprint("SELECT :d::date") != fingerprint("SELECT :d::timestamp")
+
+
+def test_explain_interval_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr(slow_queries, "EXPLAINED_MAX", 3)
+    rec = SlowQueryRecorder(threshold_ms=0, explain_interval=300)
+    assert rec._due("a") and not rec._due("a")
+    for fp in "bcde":
+        rec._due(fp)
+    assert list(rec._last_explained) == ["c", "d", "e"]
+    assert rec._due("a")  # forgotten, so explained again
+
+
+def test_summarize_groups_and_flags_full_scans():
+    entries = [
+        {"sql": "SELECT count(*) FROM lots WHERE expiry_date < ?", "ms": 120, "endpoint": "lots.index",
+         "plan": "SCAN lots"},
+        {"sql": "SELECT count(*) FROM lots WHERE expiry_date < ?", "ms": 80, "endpoint": "lots.index"},
+        {"sql": "SELECT * FROM logs", "ms": 50, "endpoint": "logs.logs",
+         "plan": "SCAN logs USING INDEX ix_logs_timestamp"},
+    ]
+    groups = summarize(entries)
+    assert [g["count"] for g in groups] == [2, 1]
+    assert groups[0]["total_ms"] == 200 and groups[0]["max_ms"] == 120
+    assert groups[0]["full_scan"] is True
+    assert groups[1]["full_scan"] is False
@@ -0,0 +1,38 @@
+# test_sqlite_profile.py — SQLite deployment profile (pragmas, pool options, read-only bind)
+
+import pytest
+import sqlalchemy as sa
+from flask import Flask
+
+from vigi.extensions import db
+from vigi.sqlite_profile import READ_BIND, apply_pragmas, configure_sqlite, sqlite_path
+
+
+def test_sqlite_path():
+    assert sqlite_path("postgresql+psycopg2://u:p@db/vigifroid") is None
+    assert sqlite_path("sqlite://") == ""
+    assert sqlite_path("sqlite:////srv/vigifroid.db") == "/srv/vigifroid.db"
+
+
+def test_file_database_gets_wal_and_a_read_only_bind(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'vf.db'}",
+        SQLALCHEMY_ENGINE_OPTIONS={"pool_size": 10, "pool_recycle": 1800, "pool_pre_ping": True},
+        SQLITE_PRAGMAS={"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 2000},
+    )
+    configure_sqlite(app)
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_pre_ping"] is False
+    assert READ_BIND in app.config["SQLALCHEMY_BINDS"]
+
+    db.init_app(app)
+    apply_pragmas(app, db)
+    with app.app_context():
+        with db.engines[None].begin() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 2000
+            conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+        with db.engines[READ_BIND].connect() as conn:
+            assert conn.exec_driver_sql("SELECT count(*) FROM t").scalar() == 0
+            with pytest.raises(sa.exc.OperationalError):
+                conn.exec_driver_sql("INSERT INTO t VALUES (1)")
@@ -0,0 +1,44 @@
+# test_synthetic.py — `flask dev seed` / `flask dev purge` (synthetic data only)
+
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from vigi.extensions import db
+from vigi.services import synthetic
+from vigi.services.archive import archive_expired
+from models import ArchivedLot, Log, Lot
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'seed.db'}")
+    db.session.add(Lot(lot_number="REAL1", product_name="Real", type="tt", pn="PN1", expiry_date=TODAY))
+    db.session.commit()
+    yield app
+    db.engine.dispose()
+
+
+def test_seed_is_deterministic_and_leaves_the_journal_mode_alone(app):
+    spec = synthetic.SeedSpec(lots=200, logs=50, seed=3, batch=64, today=TODAY)
+    assert [r[0] for r in synthetic.generate_lots(spec)] == [r[0] for r in synthetic.generate_lots(spec)]
+
+    out = synthetic.seed(spec)
+    assert (out["lots"], out["logs"]) == (200, 50)
+    assert Lot.query.count() == 201 and Log.query.count() == 50
+    with db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+
+
+def test_purge_removes_archived_synthetic_lots_too(app):
+    synthetic.seed(synthetic.SeedSpec(lots=100, logs=10, expired_share=0.5, expiry_min_days=-900, today=TODAY))
+    assert archive_expired(db.session, 365, today=TODAY)["moved"] > 0
+
+    lots, logs = synthetic.purge(batch=30)
+    assert lots == 100 and logs == 10
+    assert [l.lot_number for l in Lot.query] == ["REAL1"]
+    assert ArchivedLot.query.count() == 0
+    assert Log.query.filter(Log.action.like("Archived%")).count() == 1  # real history is kept
@@ -0,0 +1,35 @@
+# test_tiered_cache.py — local LRU + shared store, invalidations between processes
+
+from cachelib import FileSystemCache
+
+from vigi.tiered_cache import FileBus, LocalLRU, TieredCache
+
+
+def _worker(tmp_path, token):
+    cache = TieredCache(FileSystemCache(str(tmp_path / "store")), FileBus(str(tmp_path / "bus.log"), poll=0))
+    cache._token = token  # two workers of one host
+    return cache
+
+
+def test_writes_in_one_worker_reach_the_others(tmp_path):
+    a, b = _worker(tmp_path, "a"), _worker(tmp_path, "b")
+    a.set("logs_page", "v1")
+    assert b.get("logs_page") == "v1"  # from the shared store, then kept locally
+
+    a.set("logs_page", "v2")
+    assert b.get("logs_page") == "v2"
+
+    a.delete("logs_page")
+    assert b.get("logs_page") is None
+
+    b.set("view//x", 1)
+    a.get("view//x")
+    b.clear()
+    assert a.get("view//x") is None
+
+
+def test_local_tier_is_bounded():
+    lru = LocalLRU(max_entries=2, ttl=60)
+    for k in "abc":
+        lru.set(k, k, None)
+    assert len(lru) == 2 and lru.get("a") == (None, False)
@@ -0,0 +1,43 @@
+# test_tracing.py — in-process span tracing
+
+import json
+import logging
+
+from vigi.perf import tracing
+from vigi.perf.tracing import record_span, span, trace
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(record.getMessage()))
+
+
+def test_span_is_noop_outside_a_trace():
+    with span("report.build") as s:
+        s.set(rows=1)
+    assert tracing.current_trace_id() is None
+
+
+def test_trace_nests_spans_and_exports_one_line(monkeypatch):
+    monkeypatch.setattr(tracing, "_enabled", True)
+    monkeypatch.setattr(tracing._logger, "level", logging.INFO)
+    cap = _Capture()
+    tracing._logger.addHandler(cap)
+    try:
+        with trace("cli test", lang="fr"):
+            with span("report.pdf") as outer:
+                record_span("db.query", 0.002, sql="SELECT 1")
+                outer.set(rows=3)
+    finally:
+        tracing._logger.removeHandler(cap)
+
+    assert len(cap.lines) == 1
+    out = cap.lines[0]
+    assert out["name"] == "cli test" and out["attrs"] == {"lang": "fr"}
+    root, pdf, query = out["spans"]
+    assert pdf["parent"] == root["id"] and pdf["attrs"] == {"rows": 3}
+    assert query["parent"] == pdf["id"] and query["duration_ms"] == 2.0
@@ -0,0 +1,34 @@
+# test_traffic_replay.py — capture sanitizing + replay selection / summary
+
+from werkzeug.datastructures import MultiDict
+
+from vigi.perf.capture import REDACTED, sanitize_query
+from vigi.perf.replay import build_url, load_capture, summarize
+
+
+def test_sensitive_query_values_are_redacted():
+    args = MultiDict([("q", "loctite"), ("csrf_token", "abc"), ("reset_token", "x"), ("status", "a"), ("status", "b")])
+    assert sanitize_query(args) == {"q": "loctite", "csrf_token": REDACTED, "reset_token": REDACTED,
+                                    "status": ["a", "b"]}
+
+
+def test_load_capture_keeps_reads_in_time_order():
+    entries = [
+        {"ts": 3, "method": "GET", "path": "/lots/", "endpoint": "lots.index"},
+        {"ts": 1, "method": "POST", "path": "/lots/add", "endpoint": "lots.add"},
+        {"ts": 2, "method": "GET", "path": "/auth/logout", "endpoint": "auth.logout"},
+        {"ts": 0, "method": "GET", "path": "/lots/api.json", "endpoint": "lots.api_json"},
+    ]
+    assert [e["ts"] for e in load_capture(entries)] == [0, 3]
+    assert [e["ts"] for e in load_capture(entries, limit=1)] == [0]
+
+
+def test_build_url_and_summary():
+    assert build_url("http://h:5000/", {"path": "/lots/", "query": {"q": "a b", "s": ["x", "y"]}}) == \
+        "http://h:5000/lots/?q=a+b&s=x&s=y"
+
+    results = [{"endpoint": "lots.index", "ms": ms, "status": 200} for ms in (10, 20, 30)]
+    results.append({"endpoint": "lots.api_json", "ms": 5, "status": None})
+    rows = summarize(results, [{"endpoint": "lots.index", "duration_ms": 12}])
+    assert rows[0]["endpoint"] == "lots.index" and rows[0]["p50_ms"] == 20 and rows[0]["recorded_p95_ms"] == 12
+    assert rows[1]["errors"] == 1
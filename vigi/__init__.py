@@ -3,20 +3,23 @@ import os
 import random
 import time
 
-from flask import Flask, current_app, session, request, render_template, make_response, send_from_directory, url_for, abort
+from flask import Flask, current_app, session, request, render_template, make_response, url_for, abort
 from flask_wtf.csrf import CSRFProtect
+from jinja2 import FileSystemBytecodeCache
 from sqlalchemy import text
 from flask_babel import format_date, format_datetime, format_time
 from dotenv import load_dotenv
-from flask_talisman import Talisman
 
 from .extensions import db, migrate, cache, babel, compress, login_manager, mail, limiter
+from .logging_setup import setup_logging, register_request_logging
+from .perf.startup import StartupTimer
+from .storage import get_storage, init_storage
 
 load_dotenv()
 csrf = CSRFProtect()
 
 
-def create_app(config_class="config.Config"):
+def _make_flask_app(config_class):
     base_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     app = Flask(
         __name__,
@@ -29,10 +32,112 @@ def create_app(config_class="config.Config"):
 
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
 
+    # ── 🪵 Logging (queue-based, off the request path) ──
+    setup_logging(app)
+
     # ✅ uploads always in instance/uploads (public via /uploads/<file>)
     app.config["UPLOAD_FOLDER"] = os.path.join(base_dir, "instance", "uploads")
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
+    # uploads + report archive backends (local disk / S3), see vigi/storage
+    init_storage(app)
+
+    # compiled templates: parsed once per deploy, not once per worker start
+    bcc_dir = app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    if bcc_dir is None:
+        bcc_dir = os.path.join(base_dir, "instance", "jinja-cache")
+    if bcc_dir:
+        os.makedirs(bcc_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bcc_dir)
+    return app
+
+
+def _init_data_layer(app):
+    """DB, cache and mail: what both the web app and CLI jobs need."""
+    from vigi.perf.pool import configure_pool, name_pools
+    from vigi.sqlite_profile import apply_pragmas, configure_sqlite
+    configure_sqlite(app)  # no-op unless DATABASE_URL is sqlite:///
+    configure_pool(app)
+    db.init_app(app)
+    apply_pragmas(app, db)
+    cache.init_app(app)
+    mail.init_app(app)
+
+    # read-only endpoints / report building on DATABASE_REPLICA_URLS
+    from vigi.db_routing import init_db_routing
+    init_db_routing(app, db)
+
+    # user_loader + AppSettings.get() served from memory, dropped on commit
+    from vigi.services.identity import init_identity_cache
+    init_identity_cache(app)
+
+    # lot changes → /lots/events (SSE) in every process
+    from vigi.live import init_live
+    init_live(app, db)
+
+    # label pools for telemetry (engines are lazy: no connection is opened here)
+    with app.app_context():
+        name_pools(db)
+
+
+def _register_cli(app):
+    try:
+        from vigi.cli_autoexport import register_cli
+        register_cli(app)
+        app.logger.info("✅ CLI autoexport registered")
+    except Exception as e:
+        app.logger.warning(f"CLI autoexport not registered: {e}")
+
+    from vigi.cli_dev import register_cli as register_dev_cli
+    register_dev_cli(app)
+
+    from vigi.cli_images import register_cli as register_images_cli
+    register_images_cli(app)
+
+    from vigi.cli_assets import register_cli as register_assets_cli
+    register_assets_cli(app)
+
+    from vigi.cli_lots import register_cli as register_lots_cli
+    register_lots_cli(app)
+
+    from vigi.cli_backup import register_cli as register_backup_cli
+    register_backup_cli(app)
+
+
+def create_cli_app(config_class="config.Config"):
+    """
+    Lightweight app for short-lived CLI jobs (`flask autoexport` from the Task
+    Scheduler, `flask dev ...`, `flask perf ...`): no Talisman, Limiter,
+    Compress, CSRF, login, Flask-Migrate or blueprints. Run `flask db ...`
+    with the full app (wsgi.py).
+
+        flask --app "vigi:create_cli_app()" autoexport --lang fr
+    """
+    timer = StartupTimer()
+    app = _make_flask_app(config_class)
+    timer.mark("app+config+logging")
+
+    _init_data_layer(app)
+    babel.init_app(app)
+    timer.mark("extensions")
+
+    _register_cli(app)
+    from vigi.perf.cli import register_cli as register_perf_cli
+    from vigi.perf.tracing import init_tracing
+    register_perf_cli(app)
+    init_tracing(app)
+    timer.mark("cli")
+
+    timer.attach(app)
+    return app
+
+
+def create_app(config_class="config.Config"):
+    timer = StartupTimer()
+    app = _make_flask_app(config_class)
+    register_request_logging(app)
+    timer.mark("app+config+logging")
+
     # ── 🔐 Security Headers / CSP ───────────────────────
     csp = {
         "default-src": ["'self'"],
@@ -67,6 +172,8 @@ def create_app(config_class="config.Config"):
         ],
     }
 
+    from flask_talisman import Talisman
+
     Talisman(
         app,
         content_security_policy=csp,
@@ -83,26 +190,65 @@ def create_app(config_class="config.Config"):
         if ext not in {".png", ".jpg", ".jpeg", ".webp"}:
             abort(404)
 
-        resp = send_from_directory(app.config["UPLOAD_FOLDER"], filename)
-        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        resp = get_storage("uploads", app).send(filename)
+        if "Location" not in resp.headers:  # S3 redirects carry their own (short) lifetime
+            resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
         return resp
 
-    def uploaded_url(filename):
+    def _image_variants(filename):
+        from vigi.services.images import variants
+        return variants(get_storage("uploads", app), str(filename), app.config["IMAGE_WIDTHS"])
+
+    def _blob_url(name):
+        # straight to the bucket / CDN when the backend allows it, else through /uploads
+        return get_storage("uploads", app).public_url(name) or url_for("uploaded_file", filename=name)
+
+    def uploaded_url(filename, width=None, fmt="jpeg"):
+        """URL of an upload; with `width`, the smallest variant at least that wide (if built)."""
         if not filename:
             return ""
         filename = os.path.basename(str(filename))
-        return url_for("uploaded_file", filename=filename)
+        found = _image_variants(filename) if width else None
+        if found and found["widths"]:
+            from vigi.services.images import variant_name
+            w = next((w for w in found["widths"] if w >= width), found["widths"][-1])
+            return _blob_url(variant_name(filename, w, fmt))
+        return _blob_url(filename)
+
+    def uploaded_srcset(filename, fmt="jpeg"):
+        """`srcset` value for an upload's variants ("" until they are built)."""
+        found = _image_variants(filename) if filename else None
+        if not found:
+            return ""
+        from vigi.services.images import variant_name
+        name = os.path.basename(str(filename))
+        return ", ".join(f"{_blob_url(variant_name(name, w, fmt))} {w}w" for w in found["widths"])
+
+    def uploaded_placeholder(filename):
+        found = _image_variants(filename) if filename else None
+        return found["placeholder"] if found else ""
+
+    timer.mark("security+uploads")
+
+    # fingerprinted + precompressed static files (`flask assets build`)
+    from vigi.assets import init_assets
+    init_assets(app)
 
     # init extensions
-    db.init_app(app)
+    from vigi.perf.pool import pool_stats
+    _init_data_layer(app)
     migrate.init_app(app, db)
-    cache.init_app(app)
     limiter.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
     csrf.init_app(app)
-    mail.init_app(app)
     compress.init_app(app)
+    timer.mark("extensions")
+
+    # ⏱️ per-request timings + /__metrics
+    from vigi.perf import init_perf
+    init_perf(app)
+    timer.mark("perf")
 
     # locale selector
     def get_locale():
@@ -129,6 +275,8 @@ def create_app(config_class="config.Config"):
             "format_time": format_time,
             "fmt_date": fmt_date_dmy,
             "uploaded_url": uploaded_url,  # ✅ needed by templates
+            "uploaded_srcset": uploaded_srcset,
+            "uploaded_placeholder": uploaded_placeholder,
             "config": app.config,
         }
 
@@ -153,16 +301,7 @@ def create_app(config_class="config.Config"):
         resp.headers["Cache-Control"] = "no-cache"
         return resp
 
-    # DB pool check
-    with app.app_context():
-        try:
-            engine = db.engine
-            pool_name = type(engine.pool).__name__
-            status = engine.pool.status() if hasattr(engine.pool, "status") else "N/A"
-            app.logger.info(f"DB engine={engine.name}, pool={pool_name}, status={status}")
-        except Exception as e:
-            app.logger.warning(f"DB pool introspection failed: {e}")
-
+    # DB pool check (on demand; nothing touches the DB while the app is built)
     @app.get("/__pool")
     def pool_check():
         t0 = time.perf_counter()
@@ -171,11 +310,11 @@ def create_app(config_class="config.Config"):
         dt = round((time.perf_counter() - t0) * 1000, 2)
         try:
             engine = db.engine
-            pool = type(engine.pool).__name__
-            status = engine.pool.status() if hasattr(engine.pool, "status") else "N/A"
+            stats = pool_stats(engine)
+            stats["status"] = engine.pool.status() if hasattr(engine.pool, "status") else "N/A"
         except Exception as e:
-            pool, status = "N/A", str(e)
-        return {"ok": True, "latency_ms": dt, "pool": pool, "status": status}, 200
+            stats = {"pool": "N/A", "status": str(e)}
+        return {"ok": True, "latency_ms": dt, **stats}, 200
 
     @app.get("/__cache_test")
     @cache.cached(timeout=15)
@@ -184,6 +323,8 @@ def create_app(config_class="config.Config"):
         time.sleep(1)
         return {"random_number": n, "cached_for": "15 seconds"}
 
+    timer.mark("babel+routes")
+
     # ✅ Register blueprints
     from vigi.main.routes import main_bp
     app.register_blueprint(main_bp)
@@ -206,12 +347,11 @@ def create_app(config_class="config.Config"):
     except Exception as e:
         app.logger.warning(f"logs blueprint not registered: {e}")
 
+    timer.mark("blueprints")
+
     # CLI
-    try:
-        from vigi.cli_autoexport import register_cli
-        register_cli(app)
-        app.logger.info("✅ CLI autoexport registered")
-    except Exception as e:
-        app.logger.warning(f"CLI autoexport not registered: {e}")
+    _register_cli(app)
+    timer.mark("cli")
 
+    timer.attach(app)
     return app
@@ -0,0 +1,210 @@
+# ────────────────────────────────
+# vigi/assets.py  —  fingerprinted, precompressed static assets
+# ────────────────────────────────
+"""
+`flask assets build` (run at deploy time) turns static/ sources into
+
+    static/dist/css/app.min.3f2a1b9c.css   (+ .gz, + .br when brotli is installed)
+    static/dist/manifest.json              {"version": …, "files": {"css/app.min.css": "dist/css/app.min.3f2a1b9c.css"}}
+
+CSS is minified (conservative: comments + whitespace), JSON compacted, JS
+through rjsmin when installed. Templates call `asset_url("css/app.min.css")` — same argument as
+url_for("static", filename=…) — and get the fingerprinted URL; without a
+manifest they fall back to `?v=ASSET_VERSION`. The manifest version becomes
+ASSET_VERSION, so the service worker cache rolls over with the content.
+
+dist/ files are served immutable, with the .br/.gz sibling picked from
+Accept-Encoding: no compression happens at request time.
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+DIST = "dist"
+MANIFEST = "manifest.json"
+SOURCES = ("css/*.css", "js/*.js", "fonts/*.ttf", "images/*.png", "lang/*.json", "manifest.json")
+COMPRESSIBLE = (".css", ".js", ".json", ".ttf", ".svg")
+MIN_COMPRESS_SIZE = 512  # below this the sibling is not worth a file
+# app shell the service worker precaches (PRECACHE_URLS)
+PRECACHE = (
+    "css/app.min.css",
+    "css/rtl.css",
+    "js/app.min.js",
+    "fonts/NotoNaskhArabic-Regular.ttf",
+    "fonts/NotoNaskhArabic-Bold.ttf",
+    "images/vigifroid_icon.png",
+    "images/safran_icon.png",
+    "manifest.json",
+)
+
+_RE_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_RE_CSS_SPACE = re.compile(r"\s+")
+_RE_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_RE_CSS_COLON = re.compile(r"(?<=[;{])\s*([-\w]+)\s*:\s*")
+
+
+# ── Build ───────────────────────────────────────────
+def minify_css(text: str) -> str:
+    text = _RE_CSS_COMMENT.sub("", text)
+    text = _RE_CSS_SPACE.sub(" ", text)
+    text = _RE_CSS_PUNCT.sub(r"\1", text)
+    text = _RE_CSS_COLON.sub(r"\1:", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text: str) -> str:
+    try:
+        import rjsmin
+    except ImportError:  # optional: already-minified sources ship as they are
+        return text
+    return rjsmin.jsmin(text)
+
+
+def _minify(rel: str, data: bytes) -> bytes:
+    if rel.endswith(".css") and ".min." not in rel:
+        return minify_css(data.decode("utf-8")).encode("utf-8")
+    if rel.endswith(".js") and ".min." not in rel:
+        return minify_js(data.decode("utf-8")).encode("utf-8")
+    if rel.endswith(".json"):
+        return json.dumps(json.loads(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return data
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _compress(path: str, data: bytes, use_brotli: bool) -> Dict[str, int]:
+    sizes = {}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        _write(path + ".gz", gz)
+        sizes["gz"] = len(gz)
+    if use_brotli:
+        import brotli
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            _write(path + ".br", br)
+            sizes["br"] = len(br)
+    return sizes
+
+
+def build(static_folder: str, use_brotli: Optional[bool] = None) -> dict:
+    """Write dist/ + manifest; returns the manifest with per-file sizes under "stats"."""
+    if use_brotli is None:
+        try:
+            import brotli  # noqa: F401
+            use_brotli = True
+        except ImportError:
+            use_brotli = False
+
+    dist = os.path.join(static_folder, DIST)
+    files: Dict[str, str] = {}
+    stats: Dict[str, dict] = {}
+    for pattern in SOURCES:
+        for src in sorted(glob.glob(os.path.join(static_folder, pattern))):
+            rel = os.path.relpath(src, static_folder).replace(os.sep, "/")
+            with open(src, "rb") as f:
+                raw = f.read()
+            data = _minify(rel, raw)
+            digest = hashlib.sha256(data).hexdigest()[:8]
+            stem, ext = os.path.splitext(rel)
+            out_rel = f"{DIST}/{stem}.{digest}{ext}"
+            out = os.path.join(static_folder, out_rel)
+            if not os.path.exists(out):
+                _write(out, data)
+            entry = {"source": len(raw), "min": len(data)}
+            if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+                entry.update(_compress(out, data, use_brotli))
+            files[rel] = out_rel
+            stats[rel] = entry
+
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:12]
+    manifest = {"version": version, "files": files}
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+    _prune(dist, set(files.values()))
+    return {**manifest, "stats": stats}
+
+
+def _prune(dist: str, keep: set) -> None:
+    """Drop fingerprinted files from older builds (and their .gz/.br)."""
+    static_folder = os.path.dirname(dist)
+    for root, _dirs, names in os.walk(dist):
+        for name in names:
+            rel = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, "/")
+            base = re.sub(r"\.(gz|br)$", "", rel)
+            if name != MANIFEST and base not in keep:
+                os.remove(os.path.join(root, name))
+
+
+# ── Runtime ─────────────────────────────────────────
+def load_manifest(static_folder: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _serve_dist(app, filename: str):
+    path = safe_join(app.static_folder, filename)  # None for "dist/../../.env" and the like
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    accepted = request.accept_encodings
+    for encoding, suffix in _ENCODINGS:
+        if accepted[encoding] and os.path.isfile(path + suffix):
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            resp = send_file(path + suffix, mimetype=mimetype, conditional=True)
+            resp.headers["Content-Encoding"] = encoding
+            break
+    else:
+        resp = send_file(path, conditional=True)
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
+
+def init_assets(app) -> None:
+    manifest = load_manifest(app.static_folder) if app.config.get("ASSETS_MANIFEST", True) else None
+    files = (manifest or {}).get("files", {})
+    if manifest:
+        app.config["ASSET_VERSION"] = manifest["version"]
+    app.extensions["assets"] = files
+
+    def asset_url(filename: str, **values) -> str:
+        built = files.get(filename)
+        if built:
+            return url_for("static", filename=built, **values)
+        return url_for("static", filename=filename, v=app.config.get("ASSET_VERSION"), **values)
+
+    def precache_urls():
+        """App shell URLs for the service worker (fingerprinted once built)."""
+        return [asset_url(name) for name in PRECACHE]
+
+    static_view = app.view_functions.get("static")
+
+    def static(filename):
+        if filename.startswith(DIST + "/"):
+            return _serve_dist(app, filename)
+        return static_view(filename=filename)
+
+    if static_view is not None:
+        app.view_functions["static"] = static
+    app.jinja_env.globals.update(asset_url=asset_url, precache_urls=precache_urls)
@@ -7,6 +7,8 @@ from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from vigi.extensions import db, mail, limiter
+from vigi.perf.tracing import span
+from vigi.services import identity
 from flask_mail import Message
 from models import User
 from vigi import login_manager
@@ -18,7 +20,7 @@ auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 # 🧩 تحميل المستخدم أثناء الجلسة
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return identity.load_user(int(user_id))
 
 
 # ────────────────────────────────────────────────
@@ -160,7 +162,8 @@ def send_reset_email(user, token):
         msg.body = text_body
         msg.html = html_body
 
-        mail.send(msg)
+        with span("mail.send", recipients=1):
+            mail.send(msg)
         current_app.logger.info(f"[MAIL] Password reset email sent to {user.email}")
     except Exception as exc:
         # في حالة fallo فالإرسال، على الأقل يسجّل فـ log وما يطيحش التطبيق
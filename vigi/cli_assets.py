@@ -0,0 +1,24 @@
+# vigi/cli_assets.py  —  `flask assets build` (deploy step, see vigi/assets.py)
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+assets_cli = AppGroup("assets", help="Static asset pipeline (minify, fingerprint, precompress).")
+
+
+@assets_cli.command("build")
+@click.option("--brotli/--no-brotli", "use_brotli", default=None,
+              help="Write .br siblings (default: when the brotli package is installed).")
+def build_cmd(use_brotli):
+    """Minify + fingerprint static/ into static/dist and write the manifest."""
+    from vigi.assets import build
+
+    manifest = build(current_app.static_folder, use_brotli)
+    for name, st in sorted(manifest["stats"].items()):
+        extra = "".join(f"  {k} {st[k]:>7,}" for k in ("gz", "br") if k in st)
+        click.echo(f"  {name:<48} {st['source']:>8,} → {st['min']:>8,}{extra}")
+    click.echo(f"✅ {len(manifest['files'])} assets, version {manifest['version']}")
+
+
+def register_cli(app):
+    app.cli.add_command(assets_cli)
@@ -3,6 +3,7 @@ import click
 from flask.cli import with_appcontext
 import sys
 from vigi.services.reports import run_monthly_auto_export
+from vigi.perf.tracing import trace
 
 
 def register_cli(app):
@@ -19,7 +20,8 @@ def register_cli(app):
         Run monthly auto export (meant for Windows Task Scheduler / cron).
         It sends only if today == export_day and not already sent this month.
         """
-        ok = run_monthly_auto_export(lang_code=lang)
+        with trace("cli autoexport", lang=lang):
+            ok = run_monthly_auto_export(lang_code=lang)
         if ok:
             click.echo("Auto export: SENT")
             sys.exit(0)
@@ -0,0 +1,79 @@
+# vigi/cli_backup.py  —  `flask backup ...` (online backup, verify, restore)
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+backup_cli = AppGroup("backup", help="Online database + uploads backup (create, verify, restore).")
+
+
+def _progress(msg):
+    click.echo(msg, nl=False)
+
+
+@backup_cli.command("create")
+@click.option("--out", "out_path", default=None,
+              help="Archive path (default: BACKUP_DIR/vigifroid-YYYYmmdd-HHMMSS.tar.gz).")
+@click.option("--no-uploads", is_flag=True, help="Database only.")
+def create_cmd(out_path, no_uploads):
+    """Back up the database and the uploaded photos while the app keeps running."""
+    from vigi.extensions import db
+    from vigi.services import backup
+    from vigi.storage import get_storage
+    from vigi.utils_time import get_now
+
+    cfg = current_app.config
+    if not out_path:
+        out_dir = cfg.get("BACKUP_DIR") or os.path.join(current_app.instance_path, "backups")
+        out_path = os.path.join(out_dir, f"vigifroid-{get_now().strftime('%Y%m%d-%H%M%S')}.tar.gz")
+    try:
+        manifest = backup.create(
+            db, out_path,
+            store=None if no_uploads else get_storage("uploads"),
+            pages=int(cfg.get("BACKUP_PAGES_PER_STEP", 1024)),
+            sleep=float(cfg.get("BACKUP_STEP_SLEEP", 0.005)),
+            progress=_progress,
+        )
+    except backup.BackupError as e:
+        raise click.ClickException(str(e))
+    rows = sum(manifest["tables"].values())
+    photos = (manifest["uploads"] or {}).get("count", 0)
+    click.echo(f"💾 {out_path}: {rows:,} rows, {photos:,} photos (revision {manifest['alembic_revision']})")
+
+
+@backup_cli.command("verify")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def verify_cmd(path):
+    """Check every file of an archive against its manifest checksums."""
+    from vigi.services import backup
+
+    try:
+        manifest = backup.verify(path)
+    except backup.BackupError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"✅ {path}: {len(manifest['files']):,} files OK ({manifest['dialect']}, {manifest['created_at']})")
+
+
+@backup_cli.command("restore")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--no-uploads", is_flag=True, help="Leave the uploads storage alone.")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+def restore_cmd(path, no_uploads, yes):
+    """Replace the database content with a backup (verified first). Stop the app before."""
+    from vigi.extensions import cache, db
+    from vigi.services import backup
+    from vigi.storage import get_storage
+
+    if not yes:
+        click.confirm(f"Replace ALL data in {db.engine.url.render_as_string(hide_password=True)}?", abort=True)
+    try:
+        manifest = backup.restore(db, path, store=None if no_uploads else get_storage("uploads"), progress=_progress)
+    except backup.BackupError as e:
+        raise click.ClickException(str(e))
+    cache.clear()  # cached lists/stats of the old data
+    click.echo(f"♻️  restored {path} ({manifest['created_at']}), {manifest['uploads_restored']:,} photos added")
+
+
+def register_cli(app):
+    app.cli.add_command(backup_cli)
@@ -0,0 +1,61 @@
+# vigi/cli_dev.py  —  `flask dev ...` (local sizing / reproduction only)
+import click
+from flask.cli import AppGroup
+
+dev_cli = AppGroup("dev", help="Developer tools (synthetic data).")
+
+
+@dev_cli.command("seed")
+@click.option("--lots", default=100_000, show_default=True, help="Number of lots to generate.")
+@click.option("--logs", default=0, help="Number of log rows (default: lots / 5).")
+@click.option("--seed", "seed_value", default=1, show_default=True, help="RNG seed (same seed → same data).")
+@click.option("--types", default="loctite=0.45,graisse=0.25,vernelec=0.2,general=0.1", show_default=True,
+              help="Product type distribution.")
+@click.option("--expiry-min", default=-730, show_default=True, help="Oldest expiry, in days from today.")
+@click.option("--expiry-max", default=720, show_default=True, help="Furthest expiry, in days from today.")
+@click.option("--expired-share", default=0.15, show_default=True, help="Share of lots already expired (0..1).")
+@click.option("--image-share", default=0.7, show_default=True, help="Share of lots with an image (0..1).")
+@click.option("--image-pool", default=40, show_default=True, help="Distinct image files reused across lots.")
+@click.option("--batch", default=10_000, show_default=True, help="Rows per COPY / executemany batch.")
+def seed_cmd(lots, logs, seed_value, types, expiry_min, expiry_max, expired_share, image_share, image_pool, batch):
+    """Bulk-generate production-shaped lots and logs (tagged SYN-, removable with `flask dev purge`)."""
+    from vigi.services.synthetic import SeedSpec, parse_distribution, seed
+
+    spec = SeedSpec(
+        lots=lots,
+        logs=logs,
+        seed=seed_value,
+        types=parse_distribution(types),
+        expiry_min_days=expiry_min,
+        expiry_max_days=expiry_max,
+        expired_share=expired_share,
+        image_share=image_share,
+        image_pool=image_pool,
+        batch=batch,
+    )
+
+    def progress(what, n):
+        click.echo(f"\r  {what}: {n:,}", nl=False)
+
+    stats = seed(spec, progress)
+    click.echo("")
+    click.echo(
+        f"✅ {stats['lots']:,} lots ({stats['lots_per_s']:,.0f}/s) + "
+        f"{stats['logs']:,} logs ({stats['logs_per_s']:,.0f}/s) in {stats['seconds']:.1f}s"
+    )
+
+
+@dev_cli.command("purge")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+def purge_cmd(yes):
+    """Delete synthetic lots/logs created by `flask dev seed` (real data is untouched)."""
+    from vigi.services.synthetic import purge
+
+    if not yes:
+        click.confirm("Delete all synthetic (SYN-) lots and their logs?", abort=True)
+    lots, logs = purge()
+    click.echo(f"🧹 deleted {lots:,} lots and {logs:,} logs")
+
+
+def register_cli(app):
+    app.cli.add_command(dev_cli)
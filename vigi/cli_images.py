@@ -0,0 +1,72 @@
+# vigi/cli_images.py  —  `flask images ...` (lot photo maintenance)
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+images_cli = AppGroup("images", help="Lot photo maintenance (variants, reference counts, GC).")
+
+
+@images_cli.command("variants")
+@click.option("--force", is_flag=True, help="Rebuild variants that already exist.")
+def variants_cmd(force):
+    """Build WebP/JPEG variants + placeholder for photos uploaded before the pipeline."""
+    from PIL import Image
+
+    from vigi.services.images import build_variants, placeholder_name
+    from vigi.storage import get_storage
+    from models import Lot
+
+    cfg = current_app.config
+    store = get_storage("uploads")
+    names = sorted({n for (n,) in Lot.query.with_entities(Lot.image).filter(Lot.image.isnot(None)).distinct() if n})
+
+    built = skipped = missing = 0
+    for name in names:
+        name = os.path.basename(name)
+        if not force and store.exists(placeholder_name(name)):
+            skipped += 1
+            continue
+        try:
+            stream = store.open(name)
+        except FileNotFoundError:
+            missing += 1
+            continue
+        with stream, Image.open(stream) as img:
+            img = img.convert("RGB")
+            build_variants(img, store, name, cfg["IMAGE_WIDTHS"], int(cfg.get("IMAGE_QUALITY", 80)))
+        built += 1
+        click.echo(f"\r  built: {built:,}", nl=False)
+
+    click.echo("")
+    click.echo(f"🖼  {built:,} built, {skipped:,} already done, {missing:,} files missing")
+
+
+@images_cli.command("gc")
+@click.option("--grace", default=3600, show_default=True,
+              help="Seconds an unreferenced file is kept (uploads whose lot is not committed yet).")
+@click.option("--recount", is_flag=True, help="Rebuild reference counts from the lots table first.")
+@click.option("--dry-run", is_flag=True, help="Only report what would be deleted.")
+def gc_cmd(grace, recount, dry_run):
+    """Delete uploaded photos (and their variants) that no lot references any more."""
+    from vigi.extensions import db
+    from vigi.services import images
+    from vigi.storage import get_storage
+
+    if recount:
+        changed = images.recount(db.session)
+        if not dry_run:
+            db.session.commit()
+        click.echo(f"🔢 {changed:,} reference counts corrected")
+
+    stats = images.gc(db.session, get_storage("uploads"), grace_seconds=grace, dry_run=dry_run)
+    verb = "would delete" if dry_run else "deleted"
+    click.echo(
+        f"🧹 {verb} {stats['files']:,} files ({stats['bytes'] / 1_048_576:,.1f} MB), "
+        f"{stats['rows']:,} empty refs; {stats['referenced']:,} photos in use"
+    )
+
+
+def register_cli(app):
+    app.cli.add_command(images_cli)
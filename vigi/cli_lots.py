@@ -0,0 +1,46 @@
+# vigi/cli_lots.py  —  `flask lots ...` (hot/cold archival)
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+lots_cli = AppGroup("lots", help="Lot table maintenance (archival of long-expired lots).")
+
+
+@lots_cli.command("archive")
+@click.option("--older-than", "older_than", type=int, default=None,
+              help="Days since expiry before a lot is archived (default: LOTS_ARCHIVE_AFTER_DAYS).")
+@click.option("--batch", "batch_size", type=int, default=None,
+              help="Lots moved per transaction (default: LOTS_ARCHIVE_BATCH).")
+@click.option("--dry-run", is_flag=True, help="Only count the lots that would move.")
+def archive_cmd(older_than, batch_size, dry_run):
+    """Move lots expired for longer than --older-than days to lots_archive."""
+    from vigi import live
+    from vigi.extensions import cache, db
+    from vigi.services.archive import archive_expired
+    from vigi.utils_time import get_today_date
+
+    cfg = current_app.config
+    older_than = cfg["LOTS_ARCHIVE_AFTER_DAYS"] if older_than is None else older_than
+    if older_than < 0:
+        raise click.BadParameter("must be >= 0", param_hint="--older-than")
+
+    out = archive_expired(
+        db.session,
+        older_than_days=older_than,
+        batch_size=batch_size or cfg["LOTS_ARCHIVE_BATCH"],
+        today=get_today_date(),
+        dry_run=dry_run,
+        progress=lambda n: click.echo(f"\r  moved: {n:,}", nl=False),
+    )
+    if dry_run:
+        click.echo(f"🗄  would archive {out['moved']:,} lots expired before {out['cutoff']}")
+        return
+    if out["moved"]:
+        click.echo("")
+        cache.clear()  # cached listings/counts still show them
+        live.publish_resync()  # open dashboards reload their grid
+    click.echo(f"🗄  {out['moved']:,} lots archived (expired before {out['cutoff']})")
+
+
+def register_cli(app):
+    app.cli.add_command(lots_cli)
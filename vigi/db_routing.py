@@ -0,0 +1,175 @@
+# ────────────────────────────────
+# vigi/db_routing.py  —  read replicas: route read-only work off the primary
+# ────────────────────────────────
+"""
+DATABASE_REPLICA_URLS (comma separated) become SQLALCHEMY_BINDS "replica0",
+"replica1", … No model is bound to them: `RoutingSession.get_bind` sends a
+plain SELECT to a replica when
+
+  - the request's endpoint is in DB_REPLICA_ENDPOINTS (or code runs inside
+    `with read_replica():`, e.g. the auto-export report),
+  - this session has not written anything yet (flush / INSERT / UPDATE / DELETE),
+  - the browser did not write in the last DB_READ_YOUR_WRITES seconds (a
+    timestamp in the Flask session, set by any request that wrote),
+  - the replica is healthy: its replay lag, checked at most every
+    DB_REPLICA_CHECK_INTERVAL seconds, is under DB_REPLICA_MAX_LAG.
+
+Anything else, or no healthy replica at all, uses the primary.
+"""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from flask import current_app, request, session as flask_session
+from flask_sqlalchemy.session import Session as _FsaSession
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select
+
+from vigi.perf.metrics import registry
+
+ROUTED = registry.counter("vigi_db_routed_total", "SELECTs by the engine they were sent to (primary|replicaN).")
+REPLICA_LAG = registry.gauge("vigi_db_replica_lag_seconds", "Replay lag of each replica at the last check.")
+
+_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("vf_db_route", default=None)
+WROTE_AT = "_db_w"  # Flask session key: when this browser last wrote
+
+# seconds behind the primary; 0 when caught up (an idle primary does not move the replay timestamp)
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+# ── Replica health ──────────────────────────────────
+class ReplicaSet:
+    def __init__(self, keys: List[str], max_lag: float, check_interval: float):
+        self.keys, self.max_lag, self.check_interval = keys, max_lag, check_interval
+        self._healthy: Dict[str, bool] = {k: True for k in keys}
+        self._checked: Dict[str, float] = {k: 0.0 for k in keys}
+        self._lock = threading.Lock()
+        self._rr = itertools.count()
+
+    def lag(self, engine) -> float:
+        if engine.dialect.name != "postgresql":
+            return 0.0  # e.g. a read-only connection to the same SQLite file
+        with engine.connect() as conn:
+            return float(conn.execute(_PG_LAG_SQL).scalar() or 0)
+
+    def _check(self, key: str, engine) -> None:
+        now = time.monotonic()
+        if now - self._checked[key] < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked[key] < self.check_interval:
+                return
+            self._checked[key] = now
+        try:
+            lag = self.lag(engine)
+            REPLICA_LAG.set(lag, replica=key)
+            healthy = lag <= self.max_lag
+        except Exception as e:
+            current_app.logger.warning(f"[DB] replica {key} unavailable: {e}")
+            healthy = False
+        if healthy != self._healthy[key]:
+            current_app.logger.warning(f"[DB] replica {key} {'back in rotation' if healthy else 'out of rotation'}")
+        self._healthy[key] = healthy
+
+    def pick(self, engines):
+        n = len(self.keys)
+        start = next(self._rr)
+        for i in range(n):
+            key = self.keys[(start + i) % n]
+            engine = engines.get(key)
+            if engine is None:
+                continue
+            self._check(key, engine)
+            if self._healthy[key]:
+                return key, engine
+        return None, None
+
+
+# ── Session ─────────────────────────────────────────
+def _is_plain_select(clause) -> bool:
+    return isinstance(clause, Select) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(_FsaSession):
+    """Flask-SQLAlchemy session that may answer reads from a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _route.get() == "replica" and not self.info.get("vf_wrote"):
+            replicas = current_app.extensions.get("db_replicas")
+            if replicas is not None and _is_plain_select(clause):
+                key, engine = replicas.pick(self._db.engines)
+                if engine is not None:
+                    ROUTED.inc(engine=key)
+                    return engine
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if _route.get() == "replica":
+            ROUTED.inc(engine="primary")
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["vf_wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _on_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["vf_wrote"] = True
+
+
+@contextmanager
+def read_replica():
+    """Reads inside the block may go to a replica (CLI jobs, report building)."""
+    token = _route.set("replica")
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+@contextmanager
+def primary():
+    token = _route.set(None)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+# ── Wiring ──────────────────────────────────────────
+def init_db_routing(app, db) -> None:
+    keys = sorted(k for k in (app.config.get("SQLALCHEMY_BINDS") or {}) if str(k).startswith("replica"))
+    if not keys:
+        return
+    app.extensions["db_replicas"] = ReplicaSet(
+        keys,
+        max_lag=float(app.config.get("DB_REPLICA_MAX_LAG", 5)),
+        check_interval=float(app.config.get("DB_REPLICA_CHECK_INTERVAL", 10)),
+    )
+    endpoints = set(app.config.get("DB_REPLICA_ENDPOINTS") or ())
+    window = float(app.config.get("DB_READ_YOUR_WRITES", 5))
+
+    @app.before_request
+    def _db_route():
+        wrote_at = flask_session.get(WROTE_AT, 0)
+        use_replica = request.endpoint in endpoints and time.time() - wrote_at > window
+        _route.set("replica" if use_replica else None)
+
+    @app.after_request
+    def _db_remember_write(response):
+        if db.session.info.get("vf_wrote"):
+            flask_session[WROTE_AT] = time.time()
+        return response
+
+    @app.teardown_request
+    def _db_route_reset(exc):
+        _route.set(None)
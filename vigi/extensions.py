@@ -4,16 +4,26 @@
 
 
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_caching import Cache
 from flask_babel import Babel
 from flask_compress import Compress
 from flask_login import LoginManager
 from flask_mail import Mail
 
+from vigi.db_routing import RoutingSession
+
+
+class _LazyMigrate:
+    """Flask-Migrate imports alembic + mako (+ pygments): only load it when an app wires it."""
+
+    def init_app(self, app, db=None, **kwargs):
+        from flask_migrate import Migrate
+        Migrate().init_app(app, db, **kwargs)
+
+
 # Instances (نربطها داخل create_app)
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # reads may go to a replica (vigi/db_routing.py)
+migrate = _LazyMigrate()
 cache = Cache()
 babel = Babel()
 compress = Compress()
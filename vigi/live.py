@@ -0,0 +1,350 @@
+# ────────────────────────────────
+# vigi/live.py  —  live dashboard events (Server-Sent Events on /lots/events)
+# ────────────────────────────────
+"""
+Committed changes to `lots` are pushed to the open dashboards:
+
+    lot        {"op": "add|edit|delete", "id": 12, "version": 3}
+    counters   {"total", "valid", "warning", "expired"} of the live inventory
+    resync     too much changed or was missed (`flask lots archive`, a lost
+               connection): the page reloads its grid
+
+A Session hook collects the Lot rows of every flush and publishes them on
+commit (ORM writes only; bulk jobs call `publish_resync()`). Events reach the
+other processes through a bus:
+
+    PostgreSQL   NOTIFY vigi_live, one LISTEN connection per worker
+    otherwise    append-only log file polled every LIVE_POLL s (as the cache bus)
+
+Each worker follows the bus from its first request and keeps the last
+LIVE_BUFFER events, so an EventSource coming back with Last-Event-ID (on
+whichever worker) gets what it missed. A stream holds a gthread thread (not a
+DB connection): at most LIVE_MAX_STREAMS per process, 503 above (the browser
+retries), and each stream ends after LIVE_STREAM_SECONDS (the browser reconnects).
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import select
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from vigi.perf.metrics import registry
+from vigi.tiered_cache import FileBus
+
+STREAMS = registry.gauge("vigi_live_streams", "Open /lots/events streams in this process.")
+EVENTS = registry.counter("vigi_live_events_total", "Live events published, by type.")
+
+CHANNEL = "vigi_live"
+RETRY_MS = 5000
+
+_broker: Optional["Broker"] = None
+_listening = False
+
+
+def _event_id() -> int:
+    return time.time_ns() // 1000  # µs: ordered enough across the processes of one site
+
+
+# ── Buses ───────────────────────────────────────────
+class LogBus(FileBus):
+    """FileBus read by a daemon thread (per process) instead of on access."""
+
+    def __init__(self, path: str, poll: float):
+        super().__init__(path, poll)
+        self._pid: Optional[int] = None
+
+    def start(self, on_message) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # only what is published from now on (not the backlog since the master started)
+            self._offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        threading.Thread(target=self._run, args=(on_message,), name="vf-live-bus", daemon=True).start()
+
+    def _run(self, on_message) -> None:
+        while True:
+            time.sleep(self.poll)
+            try:
+                for message in self.poll_messages():
+                    on_message(message)
+            except Exception:
+                pass
+
+
+class PgBus:
+    """PostgreSQL NOTIFY/LISTEN; NOTIFY payloads stay far below the 8000 byte limit."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def publish(self, message: dict) -> None:
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:c, :p)"), {"c": CHANNEL, "p": json.dumps(message, separators=(",", ":"))})
+            conn.commit()
+
+    def start(self, on_message) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._listen, args=(on_message,), name="vf-live-bus", daemon=True).start()
+
+    def _listen(self, on_message) -> None:
+        first = True
+        while True:
+            try:
+                raw = self.engine.raw_connection()
+                raw.detach()  # ours for good: not returned to the pool
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                if not first:
+                    on_message({"t": "resync"})  # NOTIFYs sent while we were away are lost
+                first = False
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        on_message(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                time.sleep(1.0)
+
+
+# ── Broker ──────────────────────────────────────────
+class Subscriber:
+    def __init__(self, size: int = 100):
+        self.queue: "queue.Queue[dict]" = queue.Queue(maxsize=size)
+        self.overflowed = False
+
+    def put(self, ev: dict) -> None:
+        try:
+            self.queue.put_nowait(ev)
+        except queue.Full:
+            self.overflowed = True  # a stalled client: it gets a resync instead
+
+
+class Broker:
+    def __init__(self, bus, buffer: int = 256, max_streams: int = 2, counters_ttl: float = 1.0):
+        self.bus, self.max_streams, self.counters_ttl = bus, max_streams, counters_ttl
+        self._token = uuid.uuid4().hex[:12]
+        self._subs: set = set()
+        self._recent: deque = deque(maxlen=buffer)
+        self._trimmed = False
+        self._since = 0  # event id from which this process has seen everything
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._counters = (0.0, None)
+
+    @property
+    def origin(self) -> str:
+        return f"{os.getpid()}:{self._token}"
+
+    # publishing
+    def publish(self, ev_type: str, data: Optional[dict] = None) -> None:
+        ev = {"id": _event_id(), "t": ev_type, "d": data or {}}
+        EVENTS.inc(type=ev_type)
+        self._deliver(ev)
+        if self.bus is not None:
+            try:
+                self.bus.publish({**ev, "o": self.origin})
+            except Exception as e:
+                current_app.logger.warning(f"[LIVE] publish failed: {e}")
+
+    def _receive(self, message: dict) -> None:
+        if message.get("o") == self.origin:
+            return
+        self._deliver({"id": message.get("id") or _event_id(), "t": message.get("t"), "d": message.get("d") or {}})
+
+    def _deliver(self, ev: dict) -> None:
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._trimmed = True
+            self._recent.append(ev)
+            subs = list(self._subs)
+        if ev["t"] in ("lot", "resync"):
+            self._counters = (0.0, None)
+        for sub in subs:
+            sub.put(ev)
+
+    # streams
+    def full(self) -> bool:
+        return len(self._subs) >= self.max_streams
+
+    def listen(self) -> None:
+        """Follow the bus from now on (once per process; from the first request on)."""
+        if self._since and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._since and self._pid == os.getpid():
+                return
+            self._pid, self._since = os.getpid(), _event_id()
+        if self.bus is not None:
+            self.bus.start(self._receive)
+
+    def subscribe(self) -> Subscriber:
+        self.listen()
+        sub = Subscriber()
+        with self._lock:
+            self._subs.add(sub)
+            STREAMS.set(len(self._subs))
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+            STREAMS.set(len(self._subs))
+
+    def since(self, last_id) -> Optional[list]:
+        """Events after `last_id`; None when some may be missing here (→ resync)."""
+        try:
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            return []
+        with self._lock:
+            recent = list(self._recent)
+            gap = last_id < self._since or (self._trimmed and recent and last_id < recent[0]["id"])
+        return None if gap else [ev for ev in recent if ev["id"] > last_id]
+
+    def counters(self) -> dict:
+        """Counts of the live inventory, computed at most once per counters_ttl for all streams."""
+        at, value = self._counters
+        if value is not None and time.monotonic() - at < self.counters_ttl:
+            return value
+        from vigi.extensions import db
+        from vigi.lots.query_utils import status_counts
+        from vigi.utils_time import get_today_date
+
+        try:
+            value = status_counts(today=get_today_date())
+        finally:
+            db.session.close()  # a stream must not sit on a pooled connection
+        value["total"] = sum(value.values())
+        self._counters = (time.monotonic(), value)
+        return value
+
+
+def _format(ev: dict) -> str:
+    head = f"id: {ev['id']}\n" if ev.get("id") else ""
+    return f"{head}event: {ev['t']}\ndata: {json.dumps(ev['d'], separators=(',', ':'))}\n\n"
+
+
+def stream(broker: Broker, last_id=None, heartbeat: float = 15.0, lifetime: float = 300.0):
+    """SSE body: missed events, current counters, then events as they come."""
+    sub = broker.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        missed = broker.since(last_id)
+        for ev in missed if missed is not None else [{"t": "resync", "d": {}}]:
+            yield _format(ev)
+        yield _format({"t": "counters", "d": broker.counters()})
+
+        deadline = time.monotonic() + lifetime
+        while (left := deadline - time.monotonic()) > 0:
+            try:
+                batch = [sub.queue.get(timeout=min(heartbeat, left))]
+            except queue.Empty:
+                yield ": ping\n\n"  # also how a closed connection is noticed
+                continue
+            while True:
+                try:
+                    batch.append(sub.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if sub.overflowed:
+                sub.overflowed = False
+                batch = [{"id": batch[-1]["id"], "t": "resync", "d": {}}]
+            for ev in batch:
+                yield _format(ev)
+            # one counters event per burst, however many lots changed
+            if any(ev["t"] in ("lot", "resync") for ev in batch):
+                yield _format({"t": "counters", "d": broker.counters()})
+    finally:
+        broker.unsubscribe(sub)
+
+
+# ── Publishing (ORM writes, sent on commit) ─────────
+def _after_flush(session, flush_context) -> None:
+    pending = session.info.setdefault("live_events", {})
+    for op, objs in (("add", session.new), ("edit", session.dirty), ("delete", session.deleted)):
+        for obj in objs:
+            if getattr(obj, "__tablename__", None) != "lots" or (op == "edit" and not session.is_modified(obj)):
+                continue
+            first = pending.get(obj.id, {}).get("op")
+            # added then edited in one transaction is still an add
+            pending[obj.id] = {"op": "add" if first == "add" and op == "edit" else op,
+                               "id": obj.id, "version": getattr(obj, "version", None)}
+
+
+def _after_commit(session) -> None:
+    pending = session.info.pop("live_events", None)
+    if not pending or _broker is None:
+        return
+    if len(pending) > 50:
+        _broker.publish("resync")
+        return
+    for data in pending.values():
+        _broker.publish("lot", data)
+
+
+def _after_rollback(session, previous) -> None:
+    if previous.parent is None:
+        session.info.pop("live_events", None)
+
+
+def publish_resync() -> None:
+    """After bulk changes the ORM hook does not see (Core statements, imports)."""
+    if _broker is not None:
+        _broker.publish("resync")
+
+
+def get_broker() -> Optional[Broker]:
+    return _broker
+
+
+def init_live(app, db) -> None:
+    global _broker, _listening
+    if not app.config.get("LIVE_EVENTS", True):
+        return
+    kind = (app.config.get("LIVE_BUS") or "auto").lower()
+    if kind == "auto":
+        with app.app_context():
+            kind = "pg" if db.engine.dialect.name == "postgresql" else "file"
+    if kind == "pg":
+        with app.app_context():
+            bus = PgBus(db.engine)
+    elif kind == "file":
+        path = app.config.get("LIVE_BUS_FILE") or os.path.join(app.instance_path, "live-events.log")
+        bus = LogBus(path, float(app.config.get("LIVE_POLL", 0.5)))
+    else:
+        bus = None  # "local": one process (dev server)
+    _broker = Broker(
+        bus,
+        buffer=int(app.config.get("LIVE_BUFFER", 256)),
+        max_streams=int(app.config.get("LIVE_MAX_STREAMS", 2)),
+    )
+    app.extensions["live"] = _broker
+    # every worker follows the bus, so a reconnecting stream finds the events it missed
+    app.before_request(_broker.listen)
+    if not _listening:
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_soft_rollback", _after_rollback)
+        _listening = True
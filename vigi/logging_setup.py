@@ -0,0 +1,232 @@
+# ────────────────────────────────
+# vigi/logging_setup.py  —  non-blocking structured logging
+# ────────────────────────────────
+"""
+All app log records go through a QueueHandler; the real handlers (console,
+rotating error file) run in a QueueListener thread, so formatting and disk I/O
+never happen inside the request.
+
+Config keys:
+    LOG_LEVEL               DEBUG/INFO/... (default: DEBUG in debug mode, else INFO)
+    LOG_FORMAT              "json" (default) or "text"
+    LOG_FILE                error log file (default: app.log)
+    LOG_STATIC_SAMPLE_RATE  share of 2xx/304 static hits that get logged (0..1)
+    LOG_SAMPLED_ENDPOINTS   endpoints treated as "static" for sampling
+    LOG_ROUTE_LEVELS        {"endpoint": "LEVEL"} level of the access line per route
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, request
+from flask.logging import default_handler
+
+
+DEFAULT_SAMPLED_ENDPOINTS = (
+    "static",
+    "uploaded_file",
+    "manifest",
+    "service_worker",
+    "favicon",
+    "offline_page",
+)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare() flattens the record into a pre-formatted string,
+    which would lose `extra=` fields and the traceback. Keep them instead.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _text_formatter(detailed: bool = False) -> logging.Formatter:
+    if detailed:
+        return logging.Formatter("%(asctime)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s")
+    return logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+
+
+_listeners = []
+
+
+def _restart_listeners_in_child() -> None:
+    # Threads don't survive fork(): without this, records logged in a
+    # pre-fork worker would pile up in a queue nobody reads.
+    for i, old in enumerate(_listeners):
+        atexit.unregister(old.stop)  # its thread only exists in the parent
+        new = QueueListener(old.queue, *old.handlers, respect_handler_level=old.respect_handler_level)
+        new.start()
+        atexit.register(new.stop)
+        _listeners[i] = new
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listeners_in_child)
+
+
+def attach_queue_listener(logger: logging.Logger, *handlers: logging.Handler) -> QueueListener:
+    """
+    Route `logger` through an in-memory queue to `handlers`, which are
+    served by a background listener thread (stopped at interpreter exit,
+    restarted in forked children).
+    """
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(_StructuredQueueHandler(q))
+    listener = QueueListener(q, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _listeners.append(listener)
+    return listener
+
+
+def setup_logging(app) -> None:
+    if "log_listener" in app.extensions:
+        return
+
+    # Several apps in one process (tests, scripts) share the "vigi" logger:
+    # the first one wires it, later ones keep its LOG_LEVEL / LOG_FORMAT / LOG_FILE.
+    for h in app.logger.handlers:
+        if isinstance(h, _StructuredQueueHandler):
+            app.logger.removeHandler(default_handler)
+            app.extensions["log_listener"] = None
+            app.logger.debug("Logging already set up in this process; LOG_* settings of this app ignored.")
+            return
+
+    level_name = app.config.get("LOG_LEVEL") or ("DEBUG" if app.debug else "INFO")
+    log_level = logging.getLevelName(str(level_name).upper())
+    if not isinstance(log_level, int):
+        log_level = logging.INFO
+
+    use_json = (app.config.get("LOG_FORMAT") or "json").lower() == "json"
+
+    ch = logging.StreamHandler()
+    ch.setLevel(log_level)
+    ch.setFormatter(JsonFormatter() if use_json else _text_formatter())
+
+    fh = RotatingFileHandler(
+        app.config.get("LOG_FILE") or "app.log",
+        maxBytes=10 * 1024 * 1024,
+        backupCount=10,
+        encoding="utf-8",
+        delay=True,
+    )
+    fh.setLevel(logging.ERROR)
+    fh.setFormatter(JsonFormatter() if use_json else _text_formatter(detailed=True))
+
+    # Flask's default handler writes synchronously to wsgi.errors → replace it.
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(log_level)
+    app.extensions["log_listener"] = attach_queue_listener(app.logger, ch, fh)
+    app.logger.info("Logging setup complete.")
+
+
+def register_request_logging(app) -> None:
+    """One structured access line per request, with sampling for static hits."""
+    sample_rate = float(app.config.get("LOG_STATIC_SAMPLE_RATE", 1.0))
+    sampled_endpoints = set(app.config.get("LOG_SAMPLED_ENDPOINTS") or DEFAULT_SAMPLED_ENDPOINTS)
+    route_levels = {
+        endpoint: logging.getLevelName(str(level).upper())
+        for endpoint, level in (app.config.get("LOG_ROUTE_LEVELS") or {}).items()
+    }
+
+    @app.before_request
+    def _log_request_start():
+        g._log_t0 = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        if request.path.startswith("/.well-known/appspecific"):
+            return response
+
+        endpoint = request.endpoint or ""
+        status = response.status_code
+
+        # service-worker asset fetches: keep only a sample of the successful ones
+        if (
+            endpoint in sampled_endpoints
+            and (200 <= status < 300 or status == 304)
+            and random.random() >= sample_rate
+        ):
+            return response
+
+        if status >= 500:
+            level = logging.ERROR
+        elif status >= 400:
+            level = logging.WARNING
+        else:
+            level = route_levels.get(endpoint, logging.INFO)
+            if not isinstance(level, int):
+                level = logging.INFO
+
+        if not app.logger.isEnabledFor(level):
+            return response
+
+        # Import here: flask_login is optional for lightweight apps.
+        from flask_login import current_user
+
+        t0 = g.get("_log_t0")
+        app.logger.log(
+            level,
+            "%s %s [%s]",
+            request.method,
+            request.path,
+            status,
+            extra={
+                "http": {
+                    "method": request.method,
+                    "path": request.path,
+                    "query": request.query_string.decode("latin-1")[:512],
+                    "status": status,
+                    "endpoint": endpoint,
+                    "bytes": response.calculate_content_length(),
+                    "duration_ms": round((time.perf_counter() - t0) * 1000, 2) if t0 else None,
+                    "ip": request.remote_addr,
+                    "ua": (request.user_agent.string or "")[:200],
+                },
+                "user": current_user.username if current_user and current_user.is_authenticated else "Anonymous",
+            },
+        )
+        return response
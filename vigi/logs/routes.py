@@ -3,6 +3,8 @@
 # تعمل مع PostgreSQL وSQLAlchemy وFlask-Caching
 # ────────────────────────────────────────────────
 
+import re
+
 from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import login_required, current_user
 from vigi.extensions import cache
@@ -12,6 +14,15 @@ from flask_babel import gettext as _
 
 logs_bp = Blueprint("logs", __name__, url_prefix="/logs")
 
+# "Added lot L123" → L123: the lot may be archived since, the link searches both tables
+_RE_LOT_ACTION = re.compile(r"^(?:Added|Edited|Deleted) lot (?P<number>.+)$")
+
+
+def _lot_number(action: str):
+    m = _RE_LOT_ACTION.match(action or "")
+    return m.group("number") if m else None
+
+
 @logs_bp.route("/")
 @login_required
 @cache.cached(timeout=60, key_prefix="logs_page")  # ✅ تحديث كل دقيقة
@@ -34,7 +45,8 @@ def logs():
         {
             "action": log.action,
             "timestamp": log.timestamp or datetime.utcnow(),
-            "username": log.username
+            "username": log.username,
+            "lot_number": _lot_number(log.action),
         }
         for log in logs
     ]
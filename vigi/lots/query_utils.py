@@ -1,23 +1,110 @@
-# vigi/lots/query_utils.py
+# vigi/lots/query_utils.py  —  search/status filters shared by the lot listings and exports
+#
+# "archived=1" in the query string adds lots_archive (`flask lots archive`) to
+# the results; without it only the hot `lots` table is read.
 from datetime import date, timedelta
-from sqlalchemy import or_, and_
-from models import Lot
+from math import ceil
+from typing import List, NamedTuple
 
-def build_lot_query(q: str = "", status: str = ""):
-    query = Lot.query
+from sqlalchemy import and_, func, literal, or_, select, union_all
+
+from vigi.extensions import db
+from models import ArchivedLot, Lot
+
+WARN_DAYS = 30
+
+
+class LotPage(NamedTuple):
+    items: List
+    total: int
+    pages: int
+
+
+def include_archived(args) -> bool:
+    return (args.get("archived") or "").lower() in ("1", "true", "on", "yes")
+
+
+def lot_filters(model, q: str = "", status: str = "", today: date = None) -> list:
+    today = today or date.today()
+    warn = today + timedelta(days=WARN_DAYS)
+    criteria = []
     if q:
         like = f"%{q}%"
-        query = query.filter(or_(
-            Lot.product_name.ilike(like),
-            Lot.lot_number.ilike(like),
-            Lot.pn.ilike(like),
+        criteria.append(or_(
+            model.product_name.ilike(like),
+            model.lot_number.ilike(like),
+            model.pn.ilike(like),
         ))
-    today = date.today()
     if status == "valid":
-        query = query.filter(Lot.expiry_date > today + timedelta(days=30))
+        criteria.append(model.expiry_date > warn)
     elif status == "warning":
-        query = query.filter(and_(Lot.expiry_date >= today,
-                                  Lot.expiry_date <= today + timedelta(days=30)))
+        criteria.append(and_(model.expiry_date >= today, model.expiry_date <= warn))
     elif status == "expired":
-        query = query.filter(Lot.expiry_date < today)
-    return query.order_by(Lot.expiry_date.asc())
+        criteria.append(model.expiry_date < today)
+    return criteria
+
+
+def _models(status: str, archived: bool) -> list:
+    # archived lots are all expired: no point reading the archive for valid/warning
+    return [Lot, ArchivedLot] if archived and status not in ("valid", "warning") else [Lot]
+
+
+def build_lot_query(q: str = "", status: str = "", today: date = None):
+    return Lot.query.filter(*lot_filters(Lot, q, status, today)).order_by(Lot.expiry_date.asc())
+
+
+def lot_rows(q: str = "", status: str = "", today: date = None, archived: bool = False):
+    """SELECT of the exported columns (+ `archived`), ordered by expiry date then name."""
+    parts = [
+        select(
+            model.id, model.product_name, model.pn, model.lot_number, model.expiry_date, model.type, model.image,
+            literal(model is ArchivedLot).label("archived"),
+        ).where(*lot_filters(model, q, status, today))
+        for model in _models(status, archived)
+    ]
+    stmt = parts[0] if len(parts) == 1 else select(union_all(*parts).subquery())
+    cols = stmt.selected_columns
+    return stmt.order_by(cols.expiry_date.asc(), cols.product_name.asc())
+
+
+def paginate_lots(q: str = "", status: str = "", page: int = 1, per_page: int = 48,
+                  today: date = None, archived: bool = False) -> LotPage:
+    page = max(page, 1)
+    if len(_models(status, archived)) == 1:
+        p = build_lot_query(q, status, today).paginate(page=page, per_page=per_page, error_out=False)
+        return LotPage(p.items, p.total, p.pages)
+
+    # page over (id, archived) of both tables, then load just that page's objects
+    rows = lot_rows(q, status, today, archived=True).subquery()
+    total = db.session.execute(select(func.count()).select_from(rows)).scalar() or 0
+    keys = db.session.execute(
+        select(rows.c.id, rows.c.archived)
+        .order_by(rows.c.expiry_date.asc(), rows.c.product_name.asc())
+        .limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    loaded = {}
+    for model, flag in ((Lot, False), (ArchivedLot, True)):
+        ids = [k.id for k in keys if bool(k.archived) == flag]
+        if ids:
+            loaded.update({(flag, obj.id): obj for obj in model.query.filter(model.id.in_(ids))})
+    items = [loaded[(bool(k.archived), k.id)] for k in keys if (bool(k.archived), k.id) in loaded]
+    return LotPage(items, total, ceil(total / per_page) if total else 0)
+
+
+def status_counts(q: str = "", status: str = "", today: date = None, archived: bool = False) -> dict:
+    """{"valid", "warning", "expired"} counts under the same filters, one query per table."""
+    today = today or date.today()
+    warn = today + timedelta(days=WARN_DAYS)
+    counts = {"valid": 0, "warning": 0, "expired": 0}
+    for model in _models(status, archived):
+        valid, warning, expired = db.session.execute(
+            select(
+                func.count().filter(model.expiry_date > warn),
+                func.count().filter(and_(model.expiry_date >= today, model.expiry_date <= warn)),
+                func.count().filter(model.expiry_date < today),
+            ).where(*lot_filters(model, q, status, today))
+        ).one()
+        counts["valid"] += valid
+        counts["warning"] += warning
+        counts["expired"] += expired
+    return counts
@@ -6,15 +6,14 @@ from __future__ import annotations
 
 import csv
 import io
-import os
 from datetime import datetime, timedelta
 
 import pytz
-from PIL import Image
 from sqlalchemy.exc import IntegrityError
 
 from flask import (
     Blueprint,
+    Response,
     abort,
     current_app,
     flash,
@@ -25,14 +24,21 @@ from flask import (
     request,
     send_file,
     session,
+    stream_with_context,
     url_for,
 )
+from flask_wtf.csrf import generate_csrf
 from flask_babel import force_locale, get_locale, gettext as _
 from flask_login import current_user, login_required
 from functools import wraps
 
+from vigi import live
 from vigi.extensions import cache, db
 from vigi.forms import AppSettingsForm, LotForm
+from vigi.lots.query_utils import include_archived, lot_filters, lot_rows, paginate_lots, status_counts
+from vigi.perf.tracing import span
+from vigi.services import images, sync
+from vigi.storage import get_storage
 from vigi.services.reports import build_lots_pdf_from_lots
 from models import AppSettings, Log, Lot
 
@@ -72,36 +78,19 @@ def admin_required(f):
 # ────────────────────────────────
 # عرض كل الـ Lots (Pagination + إحصائيات)
 # ────────────────────────────────
-@lots_bp.route("/")
-def index():
+def _listing_context() -> dict:
+    """q / status / archived / page / per_page from the query string → what the grid renders."""
     q = (request.args.get("q") or "").strip()
     status = (request.args.get("status") or "").strip()
-
-    query = Lot.query.order_by(Lot.expiry_date.asc())
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            (Lot.product_name.ilike(like)) |
-            (Lot.lot_number.ilike(like)) |
-            (Lot.pn.ilike(like))
-        )
-
-    today = get_today_date()
-
-    if status == "valid":
-        query = query.filter(Lot.expiry_date > today + timedelta(days=30))
-    elif status == "warning":
-        query = query.filter(Lot.expiry_date <= today + timedelta(days=30), Lot.expiry_date >= today)
-    elif status == "expired":
-        query = query.filter(Lot.expiry_date < today)
+    archived = include_archived(request.args)
 
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 48, type=int)
     if per_page not in (12, 24, 48):
         per_page = 48
 
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    today = get_today_date()
+    pagination = paginate_lots(q, status, page, per_page, today=today, archived=archived)
     lots = pagination.items
     total = pagination.total
     pages = pagination.pages
@@ -113,23 +102,6 @@ def index():
         print("🔍 DEBUG => pages =", pages)
         print("🔍 DEBUG => lots count on this page =", len(lots))
 
-    # Base query للإحصائيات (نفس الفلاتر)
-    base_q = query.session.query(Lot)
-    if q:
-        like = f"%{q}%"
-        base_q = base_q.filter(
-            (Lot.product_name.ilike(like)) |
-            (Lot.lot_number.ilike(like)) |
-            (Lot.pn.ilike(like))
-        )
-
-    if status == "valid":
-        base_q = base_q.filter(Lot.expiry_date > today + timedelta(days=30))
-    elif status == "warning":
-        base_q = base_q.filter(Lot.expiry_date <= today + timedelta(days=30), Lot.expiry_date >= today)
-    elif status == "expired":
-        base_q = base_q.filter(Lot.expiry_date < today)
-
     # status مؤقت للـ UI
     for lot in lots:
         st = "unknown"
@@ -142,12 +114,10 @@ def index():
                 st = "valid"
         setattr(lot, "temp_status", st)
 
-    valid_count = base_q.filter(Lot.expiry_date > today + timedelta(days=30)).count()
-    warning_count = base_q.filter(Lot.expiry_date <= today + timedelta(days=30), Lot.expiry_date >= today).count()
-    expired_count = base_q.filter(Lot.expiry_date < today).count()
+    # الإحصائيات (نفس الفلاتر)
+    counts = status_counts(q, status, today=today, archived=archived)
 
-    resp = make_response(render_template(
-        "index.html",
+    return dict(
         lots=lots,
         q=q,
         status=status,
@@ -155,17 +125,51 @@ def index():
         per_page=per_page,
         total=total,
         pages=pages,
-        valid_count=valid_count,
-        warning_count=warning_count,
-        expired_count=expired_count,
-        lang=str(get_locale() or "fr"),
-    ))
-    resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    resp.headers["Pragma"] = "no-cache"
-    resp.headers["Expires"] = "0"
+        valid_count=counts["valid"],
+        warning_count=counts["warning"],
+        expired_count=counts["expired"],
+        archived=archived,
+    )
+
+
+@lots_bp.route("/")
+def index():
+    resp = make_response(render_template("index.html", lang=str(get_locale() or "fr"), **_listing_context()))
+    # revalidated on every load, but the service worker may keep the last copy for offline use
+    resp.headers["Cache-Control"] = "no-cache, must-revalidate, max-age=0"
     return resp
 
 
+@lots_bp.get("/grid")
+def grid():
+    """Counters + cards + pagination only (filter/search/paging changes); ?format=json for data."""
+    ctx = _listing_context()
+    if request.args.get("format") == "json":
+        resp = jsonify(
+            page=ctx["page"], pages=ctx["pages"], total=ctx["total"],
+            counts={"valid": ctx["valid_count"], "warning": ctx["warning_count"], "expired": ctx["expired_count"]},
+            lots=[{
+                "id": lot.id,
+                "product_name": lot.product_name or "",
+                "pn": lot.pn or "",
+                "lot_number": lot.lot_number or "",
+                "expiry_date": lot.expiry_date.strftime("%Y-%m-%d") if lot.expiry_date else "",
+                "status": lot.status or lot.temp_status,
+                "type": lot.type or "",
+                "image": lot.image or "",
+                "version": lot.version,
+                "archived": lot.archived,
+            } for lot in ctx["lots"]],
+        )
+    else:
+        resp = make_response(render_template("lots/_fragment.html", **ctx))
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.headers["Vary"] = "Accept-Language, Cookie"
+    # typing back to an earlier search answers 304 instead of the same fragment again
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+
 # ────────────────────────────────
 # إضافة Lot جديد
 # ────────────────────────────────
@@ -185,15 +189,9 @@ def add_lot():
             )
 
             if form.image.data:
-                image_file = form.image.data
-                filename = f"img_{get_now().strftime('%Y%m%d%H%M%S')}.jpg"
-
-                upload_dir = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.root_path, "static", "images")
-                os.makedirs(upload_dir, exist_ok=True)
-
-                image_path = os.path.join(upload_dir, filename)
-                Image.open(image_file).convert("RGB").save(image_path, "JPEG", optimize=True, quality=80)
-                lot.image = filename
+                with span("image.process"):
+                    lot.image = images.save_upload(current_app._get_current_object(), form.image.data, get_storage("uploads"))
+                images.acquire(db.session, lot.image)
 
             db.session.add(lot)
             db.session.flush()
@@ -201,7 +199,6 @@ def add_lot():
             db.session.commit()
 
             cache.delete("logs_page")
-            cache.clear()
 
             flash(_("Product added successfully."), "success")
             resp = redirect(url_for("lots.index"))
@@ -240,21 +237,17 @@ def edit_lot(lot_id):
             lot.expiry_date = form.expiry_date.data
 
             if form.image.data:
-                image_file = form.image.data
-                filename = f"img_{get_now().strftime('%Y%m%d%H%M%S')}.jpg"
-
-                upload_dir = current_app.config.get("UPLOAD_FOLDER") or os.path.join(current_app.root_path, "static", "images")
-                os.makedirs(upload_dir, exist_ok=True)
-
-                image_path = os.path.join(upload_dir, filename)
-                Image.open(image_file).convert("RGB").save(image_path, "JPEG", optimize=True, quality=80)
-                lot.image = filename
+                with span("image.process"):
+                    filename = images.save_upload(current_app._get_current_object(), form.image.data, get_storage("uploads"))
+                if filename != lot.image:
+                    images.acquire(db.session, filename)
+                    images.release(db.session, lot.image)
+                    lot.image = filename
 
             db.session.add(Log(action=f"Edited lot {lot.lot_number}", user_id=current_user.id))
             db.session.commit()
 
             cache.delete("logs_page")
-            cache.clear()
 
             flash(_("Product updated successfully."), "success")
             resp = redirect(url_for("lots.index"))
@@ -283,11 +276,11 @@ def delete_lot(lot_id):
     try:
         lot = Lot.query.get_or_404(lot_id)
         db.session.add(Log(action=f"Deleted lot {lot.lot_number}", user_id=current_user.id))
+        images.release(db.session, lot.image)
         db.session.delete(lot)
         db.session.commit()
 
         cache.delete("logs_page")
-        cache.clear()
         flash(_("Product deleted successfully."), "success")
     except Exception as e:
         db.session.rollback()
@@ -299,6 +292,86 @@ def delete_lot(lot_id):
     resp.headers["Expires"] = "0"
     return resp
 
+# ────────────────────────────────
+# Offline replay: batch of queued add/edit/delete (service worker)
+# ────────────────────────────────
+@lots_bp.route("/sync", methods=["GET", "POST"])
+@login_required
+@admin_required
+def sync_operations():
+    # GET hands the service worker a CSRF token (background sync has no page to read it from)
+    if request.method == "GET":
+        resp = jsonify(csrf_token=generate_csrf())
+        resp.headers["Cache-Control"] = "no-store"
+        return resp
+
+    payload = request.get_json(silent=True) or {}
+    operations = payload.get("operations")
+    if not isinstance(operations, list):
+        return jsonify(error="operations must be a list"), 400
+    limit = current_app.config.get("SYNC_MAX_OPERATIONS", 200)
+    if len(operations) > limit:
+        return jsonify(error=f"at most {limit} operations per batch", limit=limit), 413
+
+    try:
+        with span("sync.batch", operations=len(operations)):
+            outcome = sync.apply_batch(operations, current_user.id, current_app.config.get("SYNC_KEY_TTL_DAYS"))
+    except IntegrityError:
+        # the same keys committed by a concurrent request (a retry racing the original)
+        db.session.rollback()
+        return jsonify(error="batch already in progress, retry"), 409
+
+    if outcome["applied"]:
+        cache.delete("logs_page")
+
+    resp = jsonify(outcome)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+# ────────────────────────────────
+# Live dashboard: SSE stream + one card at a time
+# ────────────────────────────────
+@lots_bp.get("/events")
+def events():
+    broker = live.get_broker()
+    if broker is None:
+        abort(404)
+    if broker.full():
+        resp = make_response("", 503)
+        resp.headers["Retry-After"] = "30"
+        return resp
+
+    cfg = current_app.config
+    last_id = request.headers.get("Last-Event-ID")
+    db.session.close()  # the stream keeps a thread, not a pooled connection
+    resp = Response(
+        stream_with_context(live.stream(
+            broker, last_id,
+            heartbeat=cfg.get("LIVE_HEARTBEAT", 15),
+            lifetime=cfg.get("LIVE_STREAM_SECONDS", 300),
+        )),
+        mimetype="text/event-stream",
+    )
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"  # nginx: pass events through as they come
+    return resp
+
+
+@lots_bp.get("/card/<int:lot_id>")
+def card(lot_id):
+    """One lot card (lots/_card.html); 204 when it doesn't match the page's q/status filters."""
+    q = (request.args.get("q") or "").strip()
+    status = (request.args.get("status") or "").strip()
+    lot = Lot.query.filter(Lot.id == lot_id, *lot_filters(Lot, q, status, get_today_date())).first()
+    if lot is None:
+        return ("", 204) if db.session.get(Lot, lot_id) else ("", 404)
+
+    resp = make_response(render_template("lots/_card.html", lot=lot))
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
 # ────────────────────────────────
 # إعدادات التصدير الشهري (Admin فقط)
 # ────────────────────────────────
@@ -369,24 +442,8 @@ def export_csv():
     q = (request.args.get("q") or "").strip()
     status = (request.args.get("status") or "").strip()
 
-    query = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc())
-
-    if q:
-        query = query.filter(
-            (Lot.product_name.ilike(f"%{q}%")) |
-            (Lot.lot_number.ilike(f"%{q}%")) |
-            (Lot.pn.ilike(f"%{q}%"))
-        )
-
-    today = get_today_date()
-    if status == "valid":
-        query = query.filter(Lot.expiry_date > today + timedelta(days=30))
-    elif status == "warning":
-        query = query.filter(Lot.expiry_date <= today + timedelta(days=30), Lot.expiry_date >= today)
-    elif status == "expired":
-        query = query.filter(Lot.expiry_date < today)
-
-    lots = query.yield_per(100)
+    stmt = lot_rows(q, status, today=get_today_date(), archived=include_archived(request.args))
+    lots = db.session.execute(stmt.execution_options(yield_per=100))
     cur_locale = str(get_locale() or "fr")
 
     with force_locale(cur_locale):
@@ -430,23 +487,8 @@ def export_pdf():
     session["lang"] = cur_locale
 
     today = get_today_date()
-    query = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc())
-
-    if q:
-        query = query.filter(
-            (Lot.product_name.ilike(f"%{q}%")) |
-            (Lot.lot_number.ilike(f"%{q}%")) |
-            (Lot.pn.ilike(f"%{q}%"))
-        )
-
-    if status == "valid":
-        query = query.filter(Lot.expiry_date > today + timedelta(days=30))
-    elif status == "warning":
-        query = query.filter(Lot.expiry_date <= today + timedelta(days=30), Lot.expiry_date >= today)
-    elif status == "expired":
-        query = query.filter(Lot.expiry_date < today)
-
-    lots = query.all()
+    with span("report.fetch"):
+        lots = db.session.execute(lot_rows(q, status, today=today, archived=include_archived(request.args))).all()
 
     pdf_bytes = build_lots_pdf_from_lots(lots, lang_code=cur_locale, today=today)
     buf = io.BytesIO(pdf_bytes)
@@ -465,33 +507,7 @@ def api_json():
     q = (request.args.get("q") or "").strip()
     status = (request.args.get("status") or "").strip()
 
-    query = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc())
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            (Lot.product_name.ilike(like)) |
-            (Lot.lot_number.ilike(like)) |
-            (Lot.pn.ilike(like))
-        )
-
-    today = get_today_date()
-    if status == "valid":
-        query = query.filter(Lot.expiry_date > today + timedelta(days=30))
-    elif status == "warning":
-        query = query.filter(Lot.expiry_date.between(today, today + timedelta(days=30)))
-    elif status == "expired":
-        query = query.filter(Lot.expiry_date < today)
-
-    rows = query.with_entities(
-        Lot.id,
-        Lot.product_name,
-        Lot.pn,
-        Lot.lot_number,
-        Lot.expiry_date,
-        Lot.type,
-        Lot.image,
-    ).all()
+    rows = db.session.execute(lot_rows(q, status, today=get_today_date(), archived=include_archived(request.args))).all()
 
     def to_dict(r):
         return {
@@ -502,6 +518,7 @@ def api_json():
             "expiry_date": r.expiry_date.strftime("%Y-%m-%d") if r.expiry_date else "",
             "type": r.type or "",
             "image": r.image or "",
+            "archived": bool(r.archived),
         }
 
     return jsonify([to_dict(r) for r in rows])
@@ -1,7 +1,7 @@
 # ─────────────────────────────────────────────────────────
 # vigi/main/routes.py  —  FINAL
 # ─────────────────────────────────────────────────────────
-from datetime import date, timedelta
+from datetime import date
 import time
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
@@ -10,11 +10,11 @@ from flask import (
     redirect, url_for, session, make_response, jsonify
 )
 from flask_login import current_user
-from sqlalchemy import func, text
+from sqlalchemy import text
 from flask_babel import get_locale as babel_get_locale
 
-from models import Lot
 from vigi.extensions import cache
+from vigi.lots.query_utils import include_archived, paginate_lots, status_counts
 from flask_babel import gettext as _
 
 
@@ -42,53 +42,17 @@ def index():
     per_page = request.args.get("per_page", 48, type=int)
 
     today = date.today()
+    archived = include_archived(request.args)
 
-    # --------- الاستعلام الأساسي ---------
-    query = Lot.query
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            (Lot.product_name.ilike(like)) |
-            (Lot.pn.ilike(like)) |
-            (Lot.lot_number.ilike(like))
-        )
-
-    if status == "valid":
-        query = query.filter(Lot.expiry_date > today + timedelta(days=30))
-    elif status == "warning":
-        query = query.filter(
-            Lot.expiry_date >= today,
-            Lot.expiry_date <= today + timedelta(days=30)
-        )
-    elif status == "expired":
-        query = query.filter(Lot.expiry_date < today)
-
-    # --------- Pagination ---------
-    pagination = query.order_by(Lot.expiry_date.asc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # --------- الاستعلام + Pagination (vigi/lots/query_utils.py) ---------
+    pagination = paginate_lots(q, status, page, per_page, today=today, archived=archived)
 
     lots = pagination.items
     total = pagination.total
     pages = pagination.pages
 
     # --------- حساب الحالات ---------
-    base_q = Lot.query
-    if q:
-        like = f"%{q}%"
-        base_q = base_q.filter(
-            (Lot.product_name.ilike(like)) |
-            (Lot.pn.ilike(like)) |
-            (Lot.lot_number.ilike(like))
-        )
-
-    valid_count = base_q.filter(Lot.expiry_date > today + timedelta(days=30)).count()
-    warning_count = base_q.filter(
-        Lot.expiry_date >= today,
-        Lot.expiry_date <= today + timedelta(days=30)
-    ).count()
-    expired_count = base_q.filter(Lot.expiry_date < today).count()
+    counts = status_counts(q, today=today, archived=archived)
 
     # --------- تحديد status لكل lot ---------
     for lot in lots:
@@ -110,9 +74,10 @@ def index():
         per_page=per_page,
         pages=pages,
         total=total,
-        valid_count=valid_count,
-        warning_count=warning_count,
-        expired_count=expired_count,
+        valid_count=counts["valid"],
+        warning_count=counts["warning"],
+        expired_count=counts["expired"],
+        archived=archived,
         lang=str(babel_get_locale() or "fr")
     )
 
@@ -0,0 +1,25 @@
+# vigi/perf/__init__.py
+"""Performance tooling: request timings, metrics endpoint, slow-query log, traffic capture, profiler, tracing, `flask perf`."""
+from .metrics import registry
+
+
+def init_perf(app):
+    from .capture import init_capture
+    from .cli import register_cli
+    from .instrumentation import init_instrumentation
+    from .profiler import init_profiler
+    from .routes import perf_bp
+    from .slow_queries import init_slow_query_log
+    from .tracing import init_tracing
+
+    if app.config.get("PERF_METRICS_ENABLED", True):
+        init_instrumentation(app)
+    init_slow_query_log(app)
+    init_capture(app)
+    init_profiler(app)
+    init_tracing(app)
+    app.register_blueprint(perf_bp)
+    register_cli(app)
+
+
+__all__ = ["init_perf", "registry"]
@@ -0,0 +1,124 @@
+# ────────────────────────────────
+# vigi/perf/capture.py  —  opt-in production traffic capture (for `flask perf replay`)
+# ────────────────────────────────
+"""
+With TRAFFIC_CAPTURE=1 every request (or a TRAFFIC_CAPTURE_SAMPLE share of
+them) is written off the request path as one JSON line to TRAFFIC_CAPTURE_FILE:
+
+    {"ts", "method", "path", "endpoint", "query", "role", "locale",
+     "status", "duration_ms", "bytes"}
+
+Only metadata is kept: no body, no headers, no IP, no username. Query values
+whose key looks sensitive (password, token, csrf, email, ...) are redacted and
+long values are truncated.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import g, request, session
+
+from vigi.logging_setup import attach_queue_listener
+
+_logger = logging.getLogger("vigi.capture")
+
+REDACTED = "***"
+MAX_VALUE_LEN = 200
+_SENSITIVE_KEY = re.compile(r"pass|token|secret|csrf|key|email|mail|auth|session", re.I)
+
+# never captured: the capture/metrics plumbing itself
+DEFAULT_SKIP_ENDPOINTS = ("perf.metrics",)
+
+
+def sanitize_query(args) -> dict:
+    """MultiDict → {key: value | [values]} with sensitive values redacted."""
+    out = {}
+    for key in args:
+        values = args.getlist(key)
+        if _SENSITIVE_KEY.search(key):
+            values = [REDACTED for _ in values]
+        else:
+            values = [v[:MAX_VALUE_LEN] for v in values]
+        out[key[:MAX_VALUE_LEN]] = values[0] if len(values) == 1 else values
+    return out
+
+
+def _role() -> str:
+    # Import here: flask_login is optional for lightweight apps.
+    from flask_login import current_user
+
+    if current_user and current_user.is_authenticated:
+        return getattr(current_user, "role", None) or "user"
+    return "anonymous"
+
+
+def _locale(app) -> str:
+    lang = session.get("lang")
+    if lang:
+        return lang
+    langs = app.config.get("LANGUAGES", ["ar", "fr", "en"])
+    return request.accept_languages.best_match(langs) or langs[0]
+
+
+def capture_path(app) -> str:
+    return app.config.get("TRAFFIC_CAPTURE_FILE") or os.path.join(app.instance_path, "perf", "traffic.jsonl")
+
+
+def init_capture(app) -> None:
+    if not app.config.get("TRAFFIC_CAPTURE") or "traffic_capture" in app.extensions:
+        return
+
+    path = capture_path(app)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    fh = RotatingFileHandler(
+        path,
+        maxBytes=int(app.config.get("TRAFFIC_CAPTURE_MAX_BYTES", 50 * 1024 * 1024)),
+        backupCount=int(app.config.get("TRAFFIC_CAPTURE_BACKUPS", 5)),
+        encoding="utf-8",
+        delay=True,
+    )
+    fh.setFormatter(logging.Formatter("%(message)s"))
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+    if not _logger.handlers:
+        attach_queue_listener(_logger, fh)
+
+    sample_rate = float(app.config.get("TRAFFIC_CAPTURE_SAMPLE", 1.0))
+    skip = set(app.config.get("TRAFFIC_CAPTURE_SKIP") or DEFAULT_SKIP_ENDPOINTS)
+
+    @app.before_request
+    def _capture_start():
+        g._capture_t0 = time.perf_counter()
+
+    @app.after_request
+    def _capture_request(response):
+        t0 = g.get("_capture_t0")
+        if t0 is None or (request.endpoint or "") in skip:
+            return response
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return response
+        try:
+            _logger.info(json.dumps({
+                "ts": round(time.time(), 3),
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "query": sanitize_query(request.args),
+                "role": _role(),
+                "locale": _locale(app),
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 2),
+                "bytes": response.calculate_content_length(),
+            }, ensure_ascii=False))
+        except Exception as e:  # capture must never break a request
+            app.logger.debug("traffic capture failed: %s", e)
+        return response
+
+    app.extensions["traffic_capture"] = path
@@ -0,0 +1,136 @@
+# vigi/perf/cli.py  —  `flask perf ...`
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+perf_cli = AppGroup("perf", help="Performance diagnostics.")
+
+
+@perf_cli.command("slow-queries")
+@click.option("--file", "path", default=None, help="Slow-query JSONL file (default: SLOW_QUERY_LOG).")
+@click.option("--top", default=20, show_default=True, help="Number of fingerprints to show.")
+@click.option("--plans/--no-plans", default=False, help="Print the captured plan of each fingerprint.")
+def slow_queries_cmd(path, top, plans):
+    """Summarize the slow-query log by statement fingerprint."""
+    from .slow_queries import iter_entries, summarize
+
+    path = path or current_app.config.get("SLOW_QUERY_LOG") or os.path.join(
+        current_app.instance_path, "slow_queries.jsonl"
+    )
+    if not os.path.exists(path):
+        click.echo(f"No slow-query log at {path}")
+        return
+
+    groups = summarize(iter_entries(path))
+    if not groups:
+        click.echo("Slow-query log is empty.")
+        return
+
+    click.echo(f"{'fingerprint':<13} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  scan  endpoints")
+    for grp in groups[:top]:
+        endpoints = ", ".join(
+            f"{ep}×{n}" for ep, n in sorted(grp["endpoints"].items(), key=lambda kv: -kv[1])[:3]
+        )
+        click.echo(
+            f"{grp['fingerprint']:<13} {grp['count']:>6} {grp['total_ms']:>10.1f} "
+            f"{grp['mean_ms']:>9.1f} {grp['max_ms']:>9.1f}  {'FULL' if grp['full_scan'] else '    '}  {endpoints}"
+        )
+        click.echo(f"    {grp['sql'][:200]}")
+        if plans and grp["plan"]:
+            for line in grp["plan"].splitlines():
+                click.echo(f"      | {line}")
+
+
+@perf_cli.command("replay")
+@click.argument("capture", required=False)
+@click.option("--target", required=True, help="Base URL of the test instance, e.g. http://127.0.0.1:5000")
+@click.option("--speed", default=1.0, show_default=True, help="Time scale of the recorded pacing (2 = twice as fast).")
+@click.option("--concurrency", default=0, show_default=True,
+              help="Closed-loop workers sending back-to-back (0 = keep the recorded pacing).")
+@click.option("--workers", default=64, show_default=True, help="Max in-flight requests in paced mode.")
+@click.option("--login", "logins", multiple=True, metavar="ROLE=USER:PASSWORD",
+              help="Account used for requests captured with ROLE (repeatable).")
+@click.option("--limit", type=int, default=None, help="Replay only the first N requests.")
+@click.option("--timeout", default=30.0, show_default=True, help="Per-request timeout (seconds).")
+@click.option("--insecure", is_flag=True, help="Do not verify TLS certificates.")
+@click.option("--out", default=None, help="Also write the per-endpoint summary as JSON.")
+def replay_cmd(capture, target, speed, concurrency, workers, logins, limit, timeout, insecure, out):
+    """Replay a traffic capture against TARGET and report latency per endpoint."""
+    import json
+
+    from .capture import capture_path
+    from .replay import load_capture, login, make_opener, replay, summarize
+    from .slow_queries import iter_entries
+
+    capture = capture or capture_path(current_app)
+    if not os.path.exists(capture):
+        raise click.ClickException(f"No traffic capture at {capture}")
+    entries = load_capture(iter_entries(capture), limit=limit)
+    if not entries:
+        click.echo("Capture is empty.")
+        return
+
+    openers = {"anonymous": make_opener(insecure)}
+    for spec in logins:
+        role, _, creds = spec.partition("=")
+        username, _, password = creds.partition(":")
+        if not (role and username):
+            raise click.BadParameter(f"expected ROLE=USER:PASSWORD, got {spec!r}", param_hint="--login")
+        openers[role] = make_opener(insecure)
+        try:
+            login(openers[role], target, username, password, timeout=timeout)
+        except (OSError, RuntimeError) as e:
+            raise click.ClickException(f"{role}: {e}")
+
+    mode = f"{concurrency} workers back-to-back" if concurrency else f"recorded pacing ×{speed:g}"
+    click.echo(f"▶ replaying {len(entries)} requests against {target} ({mode})")
+    run = replay(entries, target, openers, speed=speed, concurrency=concurrency, workers=workers, timeout=timeout)
+    rows = summarize(run["results"], entries)
+
+    click.echo(f"{'endpoint':<32} {'n':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rec p95':>9}")
+    for row in rows:
+        rec = f"{row['recorded_p95_ms']:>9.1f}" if row["recorded_p95_ms"] is not None else f"{'-':>9}"
+        click.echo(
+            f"{row['endpoint'][:32]:<32} {row['count']:>6} {row['errors']:>4} {row['p50_ms']:>9.1f} "
+            f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {rec}"
+        )
+    total = len(run["results"])
+    click.echo(f"{total} requests in {run['wall_s']:.1f}s ({total / run['wall_s']:.1f} req/s)" if run["wall_s"] else "")
+
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"target": target, "mode": mode, "wall_s": run["wall_s"], "endpoints": rows}, f, indent=2)
+        click.echo(f"✅ summary written to {out}")
+
+
+@perf_cli.command("startup")
+@click.option("--factory", type=click.Choice(["create_app", "create_cli_app", "both"]), default="both",
+              show_default=True, help="App factory to measure.")
+@click.option("--config", "config_class", default="config.Config", show_default=True)
+@click.option("--top", default=12, show_default=True, help="Number of packages to list by import time.")
+def startup_cmd(factory, config_class, top):
+    """Cold-start time per phase (imports + factory init), measured in a fresh interpreter."""
+    from .startup import measure_startup
+
+    factories = ["create_app", "create_cli_app"] if factory == "both" else [factory]
+    cwd = os.path.dirname(current_app.root_path)
+    for name in factories:
+        try:
+            res = measure_startup(name, config_class, cwd=cwd)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        total = res["import_s"] + res["factory_s"]
+        click.echo(f"▶ vigi.{name}: {total * 1000:.0f} ms "
+                   f"(import vigi {res['import_s'] * 1000:.0f} ms + factory {res['factory_s'] * 1000:.0f} ms)")
+        for phase, seconds in res["phases"]:
+            click.echo(f"    {phase:<24} {seconds * 1000:>8.1f} ms")
+        click.echo("  imports by package (self time):")
+        for pkg, seconds in sorted(res["imports"].items(), key=lambda kv: -kv[1])[:top]:
+            click.echo(f"    {pkg:<24} {seconds * 1000:>8.1f} ms")
+
+
+def register_cli(app):
+    app.cli.add_command(perf_cli)
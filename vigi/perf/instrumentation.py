@@ -0,0 +1,178 @@
+# ────────────────────────────────
+# vigi/perf/instrumentation.py  —  per-request timings (DB / Jinja / total)
+# ────────────────────────────────
+"""
+Per request we collect:
+    - number of SQL statements and their total time (cursor execute hooks)
+    - Jinja render time (before_render_template / template_rendered signals)
+    - total time in the app
+
+They go out as a `Server-Timing` header (admins / debug only) and into the per-endpoint histograms
+of `vigi.perf.metrics.registry`.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+from flask import before_render_template, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import registry
+
+
+REQUEST_SECONDS = registry.histogram(
+    "vigi_request_duration_seconds", "Total time spent in the app per request, by endpoint."
+)
+DB_SECONDS = registry.histogram(
+    "vigi_request_db_seconds", "Time spent in SQL statements per request, by endpoint."
+)
+DB_QUERIES = registry.histogram(
+    "vigi_request_db_queries", "Number of SQL statements per request, by endpoint."
+)
+TEMPLATE_SECONDS = registry.histogram(
+    "vigi_request_template_seconds", "Time spent rendering Jinja templates per request, by endpoint."
+)
+REQUESTS_TOTAL = registry.counter(
+    "vigi_requests_total", "Requests served, by endpoint and status class."
+)
+
+
+@dataclass
+class PerfStats:
+    t0: float = field(default_factory=time.perf_counter)
+    db_count: int = 0
+    db_time: float = 0.0
+    tpl_time: float = 0.0
+    tpl_stack: List[float] = field(default_factory=list)
+    # Filled only while something (e.g. the profiler) asks for statement details.
+    statements: List[dict] = None
+
+
+def current_stats():
+    """PerfStats of the running request / CLI context, or None."""
+    if not has_app_context():
+        return None
+    return g.get("perf")
+
+
+# ── SQLAlchemy hooks (all engines) ──────────────────
+# Extra per-statement consumers (slow-query log, ...):
+#   fn(conn, cursor, statement, parameters, context, executemany, elapsed_seconds)
+_statement_observers: List[Callable] = []
+
+
+def add_statement_observer(fn: Callable) -> None:
+    _install_global_hooks()
+    if fn not in _statement_observers:
+        _statement_observers.append(fn)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("vf_query_start", []).append(time.perf_counter())
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute: drop its start time
+    conn = exception_context.connection
+    # no cursor: the error came before the statement (connect, pre-ping, compile)
+    if conn is not None and getattr(exception_context, "cursor", None) is not None and conn.info.get("vf_query_start"):
+        conn.info["vf_query_start"].pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("vf_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    for observer in _statement_observers:
+        observer(conn, cursor, statement, parameters, context, executemany, elapsed)
+
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.db_count += 1
+    stats.db_time += elapsed
+    if stats.statements is not None:
+        stats.statements.append({"sql": statement, "ms": round(elapsed * 1000, 3)})
+
+
+# ── Jinja signals ───────────────────────────────────
+def _before_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None:
+        stats.tpl_stack.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None and stats.tpl_stack:
+        t0 = stats.tpl_stack.pop()
+        # nested render_template() calls are already counted by the outer one
+        if not stats.tpl_stack:
+            stats.tpl_time += time.perf_counter() - t0
+
+
+_hooks_installed = False
+
+
+def _install_global_hooks():
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    before_render_template.connect(_before_render)
+    template_rendered.connect(_after_render)
+    _hooks_installed = True
+
+
+def server_timing_header(stats: PerfStats, total: float) -> str:
+    return ", ".join([
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_count} queries"',
+        f"tpl;dur={stats.tpl_time * 1000:.1f}",
+        f"app;dur={total * 1000:.1f}",
+    ])
+
+
+def _timing_visible(app) -> bool:
+    """Query counts / DB time are for the team, not for every visitor: debug or admins only."""
+    if app.debug:
+        return True
+    try:
+        from flask_login import current_user
+        return current_user.is_authenticated and getattr(current_user, "role", None) == "admin"
+    except Exception:  # no login manager on this app
+        return False
+
+
+def init_instrumentation(app) -> None:
+    _install_global_hooks()
+    send_header = app.config.get("PERF_SERVER_TIMING", True)
+
+    @app.before_request
+    def _perf_start():
+        g.perf = PerfStats()
+
+    @app.after_request
+    def _perf_finish(response):
+        stats = g.pop("perf", None)
+        if stats is None:
+            return response
+
+        total = time.perf_counter() - stats.t0
+        endpoint = request.endpoint or "<unmatched>"
+
+        REQUEST_SECONDS.observe(total, endpoint=endpoint)
+        DB_SECONDS.observe(stats.db_time, endpoint=endpoint)
+        DB_QUERIES.observe(stats.db_count, endpoint=endpoint)
+        TEMPLATE_SECONDS.observe(stats.tpl_time, endpoint=endpoint)
+        REQUESTS_TOTAL.inc(endpoint=endpoint, status=f"{response.status_code // 100}xx")
+
+        if send_header and _timing_visible(app):
+            response.headers["Server-Timing"] = server_timing_header(stats, total)
+        return response
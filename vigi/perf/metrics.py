@@ -0,0 +1,194 @@
+# ────────────────────────────────
+# vigi/perf/metrics.py  —  in-process metrics (Prometheus text format)
+# ────────────────────────────────
+"""
+Tiny metrics registry, per worker process.
+
+Histograms keep a bounded reservoir of the most recent observations per label
+set, so p50/p95/p99 are exact over that window; `_sum` and `_count` are
+cumulative since the process started.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_key(labels: Optional[dict]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return "NaN"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def quantile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank quantile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    idx = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str):
+        self.name, self.doc = name, doc
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, fn: Optional[Callable] = None):
+        # fn (optional) is called at scrape time and returns either a number
+        # or an iterable of (labels_dict, value) pairs.
+        self.name, self.doc = name, doc
+        self._values: Dict[LabelKey, float] = {}
+        self._fn = fn
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = dict(self._values)
+        if self._fn:
+            try:
+                live = self._fn()
+                if isinstance(live, (int, float)):
+                    items[()] = live
+                else:
+                    items.update((_label_key(labels), v) for labels, v in live)
+            except Exception:
+                pass
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items.items()]
+
+
+class _Series:
+    __slots__ = ("window", "count", "total")
+
+    def __init__(self, size: int):
+        self.window: deque = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+
+class Histogram:
+    """Rendered as a Prometheus `summary` (quantiles + _sum + _count)."""
+
+    kind = "summary"
+
+    def __init__(self, name: str, doc: str, window: int = 2048):
+        self.name, self.doc = name, doc
+        self._window = window
+        self._series: Dict[LabelKey, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series(self._window)
+            s.window.append(value)
+            s.count += 1
+            s.total += value
+
+    def snapshot(self, **labels) -> dict:
+        with self._lock:
+            s = self._series.get(_label_key(labels))
+            values = sorted(s.window) if s else []
+            count, total = (s.count, s.total) if s else (0, 0.0)
+        out = {"count": count, "sum": total}
+        for q in QUANTILES:
+            out[f"p{int(q * 100)}"] = quantile(values, q)
+        return out
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, sorted(s.window), s.count, s.total) for k, s in self._series.items()]
+        lines: List[str] = []
+        for key, values, count, total in items:
+            for q in QUANTILES:
+                lines.append(f"{self.name}{_fmt_labels(key, [('quantile', str(q))])} {_fmt_value(quantile(values, q))}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {_fmt_value(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, doc: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, doc, **kwargs)
+            return metric
+
+    def counter(self, name: str, doc: str = "") -> Counter:
+        return self._get_or_create(Counter, name, doc)
+
+    def gauge(self, name: str, doc: str = "", fn=None) -> Gauge:
+        return self._get_or_create(Gauge, name, doc, fn=fn)
+
+    def histogram(self, name: str, doc: str = "", window: int = 2048) -> Histogram:
+        return self._get_or_create(Histogram, name, doc, window=window)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        out: List[str] = []
+        for m in metrics:
+            out.append(f"# HELP {m.name} {m.doc}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(m.render())
+        return "\n".join(out) + "\n"
+
+
+# One registry per worker process.
+registry = MetricsRegistry()
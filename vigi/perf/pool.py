@@ -0,0 +1,253 @@
+# ────────────────────────────────
+# vigi/perf/pool.py  —  connection pool telemetry + optional adaptive sizing
+# ────────────────────────────────
+"""
+Answers "are 30s pool_timeout errors starvation or slow queries?":
+
+    vigi_db_pool_checkout_wait_seconds       time waiting for a free connection
+    vigi_db_pool_checkout_duration_seconds   how long a connection stays checked out
+    vigi_db_pool_timeouts_total              pool_timeout errors
+    vigi_db_pool_preping_failures_total      stale connections caught by pool_pre_ping
+    vigi_db_pool_invalidations_total         connections thrown away
+    vigi_db_pool_{size,checked_out,overflow,checked_in}   live gauges
+
+Adaptive mode (DB_POOL_ADAPTIVE=1) resizes the pool of each worker process
+from the peak number of concurrent checkouts seen in the last window, between
+DB_POOL_MIN and DB_POOL_MAX. It relies on QueuePool internals (`_pool.maxsize`,
+`_overflow`), which are stable across SQLAlchemy 1.4 → 2.x.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+from .metrics import registry
+
+CHECKOUT_WAIT = registry.histogram(
+    "vigi_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection."
+)
+CHECKOUT_DURATION = registry.histogram(
+    "vigi_db_pool_checkout_duration_seconds", "Time a connection stays checked out of the pool."
+)
+POOL_TIMEOUTS = registry.counter(
+    "vigi_db_pool_timeouts_total", "Checkouts that failed with pool_timeout."
+)
+PREPING_FAILURES = registry.counter(
+    "vigi_db_pool_preping_failures_total", "Stale connections detected by pool_pre_ping."
+)
+INVALIDATIONS = registry.counter(
+    "vigi_db_pool_invalidations_total", "Pooled connections invalidated."
+)
+RESIZES = registry.counter(
+    "vigi_db_pool_resizes_total", "Adaptive pool resizes, by direction."
+)
+
+_pools: "weakref.WeakSet[TimedQueuePool]" = weakref.WeakSet()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that measures checkout wait and tracks concurrent checkouts."""
+
+    adaptive = False
+    min_size = 2
+    max_size = 20
+    headroom = 2
+    adapt_interval = 60.0
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.vf_name = "primary"
+        self._vf_lock = threading.Lock()
+        self._vf_in_use = 0
+        self._vf_peak = 0
+        self._vf_window_start = time.monotonic()
+        self._vf_local = threading.local()
+        _pools.add(self)
+
+    def recreate(self):
+        new = super().recreate()
+        new.vf_name = self.vf_name
+        return new
+
+    def _do_get(self):
+        local = self._vf_local
+        if getattr(local, "depth", 0):
+            # QueuePool._do_get retries by calling self._do_get() (overflow race):
+            # only the outermost call is one checkout
+            return super()._do_get()
+        local.depth = 1
+        t0 = time.perf_counter()
+        try:
+            rec = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=self.vf_name)
+            raise
+        finally:
+            local.depth = 0
+            CHECKOUT_WAIT.observe(time.perf_counter() - t0, pool=self.vf_name)
+
+        rec.info["vf_pool"] = self.vf_name
+        with self._vf_lock:
+            self._vf_in_use += 1
+            self._vf_peak = max(self._vf_peak, self._vf_in_use)
+        if self.adaptive:
+            self._maybe_resize()
+        return rec
+
+    def _do_return_conn(self, record):
+        with self._vf_lock:
+            self._vf_in_use = max(0, self._vf_in_use - 1)
+        super()._do_return_conn(record)
+
+    # ── adaptive sizing ─────────────────────────────
+    def _maybe_resize(self) -> None:
+        now = time.monotonic()
+        if now - self._vf_window_start < self.adapt_interval:
+            return
+        with self._vf_lock:
+            if now - self._vf_window_start < self.adapt_interval:
+                return
+            peak, self._vf_peak = self._vf_peak, self._vf_in_use
+            self._vf_window_start = now
+
+        current = self.size()
+        target = max(self.min_size, min(self.max_size, peak + self.headroom))
+        if target < current:
+            # shrink gently: one step per window
+            target = max(target, current - 1)
+        if target != current:
+            self.resize(target)
+
+    def resize(self, new_size: int) -> None:
+        surplus = []
+        with self._overflow_lock:
+            delta = new_size - self._pool.maxsize
+            self._pool.maxsize = new_size
+            # _overflow counts connections beyond pool_size; keep the total unchanged
+            self._overflow -= delta
+            # Queue.put() only refuses when len == maxsize: drop idle extras now
+            while self._pool.qsize() > new_size:
+                try:
+                    surplus.append(self._pool.get(False))
+                except sqla_queue.Empty:
+                    break
+                self._overflow -= 1
+        for rec in surplus:
+            rec.close()
+        RESIZES.inc(pool=self.vf_name, direction="up" if delta > 0 else "down")
+
+
+def make_pool_class(config) -> type:
+    """TimedQueuePool subclass carrying the adaptive settings of this app."""
+    return type("TimedQueuePool", (TimedQueuePool,), {
+        "adaptive": bool(config.get("DB_POOL_ADAPTIVE", False)),
+        "min_size": int(config.get("DB_POOL_MIN", 2)),
+        "max_size": int(config.get("DB_POOL_MAX", 20)),
+        "adapt_interval": float(config.get("DB_POOL_ADAPT_INTERVAL", 60)),
+    })
+
+
+# ── Pool / engine events ────────────────────────────
+@event.listens_for(TimedQueuePool, "connect")
+def _on_connect(dbapi_conn, record):
+    record.info["vf_pid"] = os.getpid()
+
+
+@event.listens_for(TimedQueuePool, "checkout")
+def _on_checkout(dbapi_conn, record, proxy):
+    # A connection created before a fork must never be used by the child
+    # (normally prevented by engine.dispose(close=False) in the post-fork hook).
+    pid = os.getpid()
+    if record.info.get("vf_pid", pid) != pid:
+        record.dbapi_connection = proxy.dbapi_connection = None
+        raise exc.DisconnectionError(
+            f"connection record belongs to pid {record.info['vf_pid']}, attempting to check out in pid {pid}"
+        )
+    record.info["vf_checkout_at"] = time.perf_counter()
+
+
+@event.listens_for(TimedQueuePool, "checkin")
+def _on_checkin(dbapi_conn, record):
+    t0 = record.info.pop("vf_checkout_at", None)
+    if t0 is not None:
+        CHECKOUT_DURATION.observe(time.perf_counter() - t0, pool=record.info.get("vf_pool", "primary"))
+
+
+@event.listens_for(TimedQueuePool, "invalidate")
+def _on_invalidate(dbapi_conn, record, exception):
+    INVALIDATIONS.inc(pool=record.info.get("vf_pool", "primary") if record is not None else "primary")
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_handle_error(context):
+    if getattr(context, "is_pre_ping", False):
+        pool = getattr(context.engine, "pool", None) if context.engine is not None else None
+        PREPING_FAILURES.inc(pool=getattr(pool, "vf_name", "primary"))
+
+
+def _live(attr):
+    def collect():
+        out = []
+        for pool in list(_pools):
+            try:
+                value = getattr(pool, attr)()
+            except Exception:
+                continue
+            out.append(({"pool": pool.vf_name}, value))
+        return out
+    return collect
+
+
+registry.gauge("vigi_db_pool_size", "Configured pool size (current, if adaptive).", fn=_live("size"))
+registry.gauge("vigi_db_pool_checked_out", "Connections currently checked out.", fn=_live("checkedout"))
+registry.gauge("vigi_db_pool_overflow", "Current overflow (negative = unused pool slots).", fn=_live("overflow"))
+registry.gauge("vigi_db_pool_checked_in", "Idle connections in the pool.", fn=_live("checkedin"))
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    out = {"pool": type(pool).__name__}
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, attr, None)
+        if callable(fn):
+            try:
+                out[attr] = fn()
+            except Exception:
+                pass
+    if isinstance(pool, TimedQueuePool):
+        out["name"] = pool.vf_name
+        out["adaptive"] = pool.adaptive
+        for key, metric in (("checkout_wait", CHECKOUT_WAIT), ("checkout_duration", CHECKOUT_DURATION)):
+            snap = metric.snapshot(pool=pool.vf_name)
+            out[key + "_ms"] = {
+                k: (round(v * 1000, 2) if k != "count" and v == v else v) for k, v in snap.items() if k != "sum"
+            }
+        out["timeouts"] = POOL_TIMEOUTS.value(pool=pool.vf_name)
+        out["preping_failures"] = PREPING_FAILURES.value(pool=pool.vf_name)
+    return out
+
+
+def configure_pool(app) -> None:
+    """Plug TimedQueuePool into SQLALCHEMY_ENGINE_OPTIONS (before db.init_app)."""
+    uri = str(app.config.get("SQLALCHEMY_DATABASE_URI") or "")
+    if not app.config.get("DB_POOL_TELEMETRY", True) or ":memory:" in uri or uri in ("sqlite://", "sqlite:///"):
+        return
+    opts = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if "poolclass" in opts:
+        return
+    opts["poolclass"] = make_pool_class(app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opts
+
+
+def name_pools(db) -> None:
+    """Label each engine's pool with its bind key (None → "primary")."""
+    for key, engine in db.engines.items():
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.vf_name = key or "primary"
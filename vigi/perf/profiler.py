@@ -0,0 +1,233 @@
+# ────────────────────────────────
+# vigi/perf/profiler.py  —  on-demand, admin-only request profiler
+# ────────────────────────────────
+"""
+With PROFILER_ENABLED=1, an admin adds `?__profile=1` to a URL (or sends an
+`X-Profile: 1` header) and that single request runs under a profiler:
+
+    pyinstrument (sampling) if installed, else cProfile
+
+Each profile is saved to PROFILER_DIR as
+    <id>.json   request, status, timings, SQL statements, top functions
+    <id>.prof   cProfile stats (snakeviz / pstats)  — or <id>.html for pyinstrument
+and listed at /__profiles. With PROFILER_ENABLED=0 no hook is registered.
+
+One profiled request at a time per process: cProfile is process-wide on
+Python ≥ 3.12 (sys.monitoring), so a second `?__profile=1` arriving meanwhile
+just runs unprofiled.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from flask import g, request
+
+from .instrumentation import PerfStats, _install_global_hooks, current_stats
+
+_RE_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}(?:[0-9]{6})?-[0-9a-f]{8}$")
+_busy = threading.Lock()  # held while a request of this process is profiled
+
+
+def profiles_dir(app) -> str:
+    return app.config.get("PROFILER_DIR") or os.path.join(app.instance_path, "profiles")
+
+
+def _wants_profile() -> bool:
+    flag = request.args.get("__profile") or request.headers.get("X-Profile")
+    if not flag or flag in ("0", "false"):
+        return False
+    # Import here: flask_login is optional for lightweight apps.
+    from flask_login import current_user
+    return current_user.is_authenticated and getattr(current_user, "role", None) == "admin"
+
+
+class _Session:
+    """One profiled request."""
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.t0 = time.perf_counter()
+        if engine == "pyinstrument":
+            from pyinstrument import Profiler
+            self.profiler = Profiler(interval=0.001)
+            self.profiler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self) -> float:
+        if self.engine == "pyinstrument":
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        return time.perf_counter() - self.t0
+
+    def save(self, path_base: str) -> str:
+        """Write the raw profile, return a short text summary."""
+        if self.engine == "pyinstrument":
+            with open(path_base + ".html", "w", encoding="utf-8") as f:
+                f.write(self.profiler.output_html())
+            return self.profiler.output_text(unicode=True, color=False, show_all=False)
+
+        self.profiler.dump_stats(path_base + ".prof")
+        out = io.StringIO()
+        st = pstats.Stats(self.profiler, stream=out)
+        st.strip_dirs().sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+
+def _detect_engine(app) -> str:
+    wanted = (app.config.get("PROFILER_ENGINE") or "auto").lower()
+    if wanted in ("auto", "pyinstrument"):
+        try:
+            import pyinstrument  # noqa: F401
+            return "pyinstrument"
+        except ImportError:
+            if wanted == "pyinstrument":
+                app.logger.warning("PROFILER_ENGINE=pyinstrument but it is not installed; using cProfile")
+    return "cprofile"
+
+
+def _prune(directory: str, keep: int) -> None:
+    metas = sorted(f for f in os.listdir(directory) if f.endswith(".json"))
+    for name in metas[:-keep] if keep > 0 else []:
+        base = os.path.join(directory, name[:-5])
+        for ext in (".json", ".prof", ".html"):
+            try:
+                os.remove(base + ext)
+            except FileNotFoundError:
+                pass
+
+
+def init_profiler(app) -> None:
+    if not app.config.get("PROFILER_ENABLED") or "profiler" in app.extensions:
+        return
+
+    directory = profiles_dir(app)
+    os.makedirs(directory, exist_ok=True)
+    engine = _detect_engine(app)
+    keep = int(app.config.get("PROFILER_KEEP", 50))
+    _install_global_hooks()
+
+    def _stop(session: _Session) -> float:
+        try:
+            return session.stop()
+        finally:
+            _busy.release()
+
+    @app.before_request
+    def _profile_start():
+        if not _wants_profile():
+            return
+        if not _busy.acquire(blocking=False):
+            app.logger.info(f"[PROFILER] busy with another request, {request.path} not profiled")
+            return
+        try:
+            stats = current_stats()
+            if stats is None:  # PERF_METRICS_ENABLED=0: collect statements anyway
+                stats = g.perf = PerfStats()
+            stats.statements = []
+            g._profile = _Session(engine)
+        except Exception:
+            _busy.release()
+            raise
+
+    @app.teardown_request
+    def _profile_abort(exc):
+        # an unhandled error skips after_request: stop and free the profiler anyway
+        session = g.pop("_profile", None)
+        if session is not None:
+            _stop(session)
+
+    @app.after_request
+    def _profile_finish(response):
+        session = g.pop("_profile", None)
+        if session is None:
+            return response
+        elapsed = _stop(session)
+        stats = current_stats()
+
+        # sorts by time down to the µs (retention drops the oldest names)
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(directory, profile_id)
+        try:
+            summary = session.save(base)
+            meta = {
+                "id": profile_id,
+                "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "engine": session.engine,
+                "method": request.method,
+                "path": request.path,
+                "query": {k: v for k, v in request.args.items() if k != "__profile"},
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "bytes": response.calculate_content_length(),
+                "duration_ms": round(elapsed * 1000, 2),
+                "db_count": stats.db_count if stats else None,
+                "db_ms": round(stats.db_time * 1000, 2) if stats else None,
+                "tpl_ms": round(stats.tpl_time * 1000, 2) if stats else None,
+                "statements": (stats.statements or []) if stats else [],
+                "summary": summary,
+            }
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=1, default=str)
+            _prune(directory, keep)
+            response.headers["X-Profile-Id"] = profile_id
+        except Exception as e:  # a failed save must not fail the profiled request
+            app.logger.warning(f"[PROFILER] could not save profile: {e}")
+        finally:
+            if stats is not None:
+                stats.statements = None
+        return response
+
+    app.extensions["profiler"] = directory
+    app.logger.info(f"[PROFILER] enabled ({engine}) → {directory}")
+
+
+# ── Reading (admin listing) ─────────────────────────
+def list_profiles(directory: str) -> List[dict]:
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta.pop("statements", None)
+        meta.pop("summary", None)
+        out.append(meta)
+    return out
+
+
+def load_profile(directory: str, profile_id: str) -> Optional[dict]:
+    if not _RE_PROFILE_ID.match(profile_id or ""):
+        return None
+    try:
+        with open(os.path.join(directory, profile_id + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def raw_profile_path(directory: str, profile_id: str) -> Optional[str]:
+    if not _RE_PROFILE_ID.match(profile_id or ""):
+        return None
+    for ext in (".prof", ".html"):
+        path = os.path.join(directory, profile_id + ext)
+        if os.path.exists(path):
+            return path
+    return None
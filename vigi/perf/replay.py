@@ -0,0 +1,186 @@
+# ────────────────────────────────
+# vigi/perf/replay.py  —  replay a traffic capture against a test instance
+# ────────────────────────────────
+"""
+Two modes:
+    paced        (concurrency=0) each request fires at its recorded offset / speed,
+                 so the recorded concurrency (scaled by `speed`) is reproduced
+    closed loop  (concurrency=N) N workers send the capture back-to-back
+
+Requests are sent with the recorded locale as Accept-Language and, when a
+login is given for the recorded role, with that role's session cookie.
+Redirects are not followed: each captured request is measured on its own.
+Only GET/HEAD are replayed: the capture holds no request bodies (nor CSRF
+tokens), so a replayed POST could only fail with 400 and skew the numbers.
+"""
+from __future__ import annotations
+
+import http.cookiejar
+import re
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from .metrics import quantile
+
+READ_METHODS = ("GET", "HEAD")
+# replaying these would log the replay sessions out / trip the login rate limit
+SKIP_ENDPOINTS = ("auth.login", "auth.logout")
+_RE_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def make_opener(insecure: bool = False) -> urllib.request.OpenerDirector:
+    handlers = [_NoRedirect(), urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())]
+    if insecure:
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        handlers.append(urllib.request.HTTPSHandler(context=ctx))
+    return urllib.request.build_opener(*handlers)
+
+
+def login(opener, base_url: str, username: str, password: str, timeout: float = 30) -> None:
+    """Log `opener` in through the regular form (CSRF token scraped from the page)."""
+    url = base_url.rstrip("/") + "/auth/login"
+    try:
+        with opener.open(url, timeout=timeout) as resp:
+            html = resp.read().decode("utf-8", "replace")
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"GET {url} → HTTP {e.code}") from e
+    form = {"username": username, "password": password}
+    m = _RE_CSRF.search(html)
+    if m:
+        form["csrf_token"] = m.group(1)
+    req = urllib.request.Request(url, data=urllib.parse.urlencode(form).encode(), method="POST")
+    req.add_header("Referer", url)
+    try:
+        with opener.open(req, timeout=timeout):
+            pass
+    except urllib.error.HTTPError as e:
+        if e.code in (301, 302, 303):
+            return
+        raise RuntimeError(f"login as {username!r} failed: HTTP {e.code}") from e
+    raise RuntimeError(f"login as {username!r} failed (bad credentials?)")
+
+
+def load_capture(entries: Iterable[dict], limit: Optional[int] = None) -> List[dict]:
+    out = [
+        e for e in entries
+        if e.get("path")
+        and e.get("endpoint") not in SKIP_ENDPOINTS
+        and (e.get("method") or "GET").upper() in READ_METHODS
+    ]
+    out.sort(key=lambda e: e.get("ts") or 0)
+    return out[:limit] if limit else out
+
+
+def build_url(base_url: str, entry: dict) -> str:
+    url = base_url.rstrip("/") + entry["path"]
+    query = entry.get("query") or {}
+    if query:
+        url += "?" + urllib.parse.urlencode(query, doseq=True)
+    return url
+
+
+def _fire(openers: Dict[str, urllib.request.OpenerDirector], base_url: str, entry: dict, timeout: float) -> dict:
+    role = entry.get("role") or "anonymous"
+    opener = openers.get(role) or openers["anonymous"]
+    req = urllib.request.Request(build_url(base_url, entry), method=(entry.get("method") or "GET").upper())
+    if entry.get("locale"):
+        req.add_header("Accept-Language", entry["locale"])
+
+    result = {"endpoint": entry.get("endpoint") or entry["path"], "method": req.get_method(), "role": role}
+    t0 = time.perf_counter()
+    try:
+        with opener.open(req, timeout=timeout) as resp:
+            size = len(resp.read())
+            result["status"] = resp.status
+    except urllib.error.HTTPError as e:
+        size = len(e.read() or b"")
+        result["status"] = e.code
+    except Exception as e:
+        size = 0
+        result["status"] = None
+        result["error"] = type(e).__name__
+    result["ms"] = (time.perf_counter() - t0) * 1000
+    result["bytes"] = size
+    return result
+
+
+def replay(entries: List[dict], base_url: str, openers: Dict[str, urllib.request.OpenerDirector], *,
+           speed: float = 1.0, concurrency: int = 0, workers: int = 64, timeout: float = 30) -> dict:
+    """Send `entries` to `base_url`; returns {"results": [...], "wall_s": float}."""
+    results: List[dict] = []
+    lock = threading.Lock()
+
+    def run(entry):
+        r = _fire(openers, base_url, entry, timeout)
+        with lock:
+            results.append(r)
+
+    wall0 = time.perf_counter()
+    if concurrency > 0:
+        it = iter(entries)
+
+        def worker():
+            while True:
+                with lock:
+                    entry = next(it, None)
+                if entry is None:
+                    return
+                run(entry)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elif entries:
+        ts0 = entries[0].get("ts") or 0
+        speed = speed if speed > 0 else 1.0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for entry in entries:
+                delay = ((entry.get("ts") or ts0) - ts0) / speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(run, entry)
+    return {"results": results, "wall_s": time.perf_counter() - wall0}
+
+
+def summarize(results: List[dict], recorded: Iterable[dict] = ()) -> List[dict]:
+    """Per-endpoint latency percentiles, busiest endpoints first."""
+    recorded_ms: Dict[str, List[float]] = {}
+    for e in recorded:
+        if e.get("duration_ms") is not None:
+            recorded_ms.setdefault(e.get("endpoint") or e.get("path"), []).append(float(e["duration_ms"]))
+
+    groups: Dict[str, List[dict]] = {}
+    for r in results:
+        groups.setdefault(r["endpoint"], []).append(r)
+
+    rows = []
+    for endpoint, items in groups.items():
+        ms = sorted(r["ms"] for r in items)
+        rec = sorted(recorded_ms.get(endpoint, []))
+        rows.append({
+            "endpoint": endpoint,
+            "count": len(items),
+            "errors": sum(1 for r in items if r.get("status") is None or r["status"] >= 500),
+            "p50_ms": round(quantile(ms, 0.50), 2),
+            "p95_ms": round(quantile(ms, 0.95), 2),
+            "p99_ms": round(quantile(ms, 0.99), 2),
+            "max_ms": round(ms[-1], 2),
+            "recorded_p95_ms": round(quantile(rec, 0.95), 2) if rec else None,
+        })
+    rows.sort(key=lambda row: -row["count"])
+    return rows
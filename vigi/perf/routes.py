@@ -0,0 +1,73 @@
+# ────────────────────────────────
+# vigi/perf/routes.py  —  admin-only metrics endpoint + profile listing
+# ────────────────────────────────
+import hmac
+import os
+
+from flask import Blueprint, abort, current_app, make_response, render_template, request, send_file
+from flask_login import current_user
+
+from .metrics import registry
+
+perf_bp = Blueprint("perf", __name__)
+
+
+def _metrics_allowed() -> bool:
+    """Admins (session) or a scraper presenting `Authorization: Bearer <METRICS_TOKEN>`."""
+    token = current_app.config.get("METRICS_TOKEN")
+    auth = request.headers.get("Authorization", "")
+    if token and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].strip(), token):
+        return True
+    return current_user.is_authenticated and getattr(current_user, "role", None) == "admin"
+
+
+@perf_bp.get("/__metrics")
+def metrics():
+    if not _metrics_allowed():
+        abort(403)
+    resp = make_response(registry.render())
+    resp.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+# ── Saved request profiles (PROFILER_ENABLED=1) ─────
+def _profiles_dir() -> str:
+    if not (current_user.is_authenticated and getattr(current_user, "role", None) == "admin"):
+        abort(403)
+    directory = current_app.extensions.get("profiler")
+    if not directory:
+        abort(404)
+    return directory
+
+
+@perf_bp.get("/__profiles")
+def profiles():
+    from .profiler import list_profiles
+
+    return render_template("profiles.html", profiles=list_profiles(_profiles_dir()))
+
+
+@perf_bp.get("/__profiles/<profile_id>")
+def profile_detail(profile_id):
+    from .profiler import load_profile, raw_profile_path
+
+    directory = _profiles_dir()
+    meta = load_profile(directory, profile_id)
+    if meta is None:
+        abort(404)
+    raw = raw_profile_path(directory, profile_id)
+    return render_template("profile.html", p=meta, raw_ext=os.path.splitext(raw)[1] if raw else None)
+
+
+@perf_bp.get("/__profiles/<profile_id>/raw")
+def profile_raw(profile_id):
+    from .profiler import raw_profile_path
+
+    path = raw_profile_path(_profiles_dir(), profile_id)
+    if path is None:
+        abort(404)
+    if path.endswith(".html"):
+        return send_file(path, mimetype="text/html")
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=os.path.basename(path))
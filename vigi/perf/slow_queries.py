@@ -0,0 +1,261 @@
+# ────────────────────────────────
+# vigi/perf/slow_queries.py  —  slow-query log with EXPLAIN capture
+# ────────────────────────────────
+"""
+Statements slower than SLOW_QUERY_MS are written (off the request path) as
+JSON lines to SLOW_QUERY_LOG, a size-rotated file:
+
+    {"ts", "ms", "fingerprint", "sql", "params", "endpoint", "dialect", "plan"}
+
+The plan is captured on the same DB connection right after the statement:
+    PostgreSQL → EXPLAIN (ANALYZE, BUFFERS)   (inside a savepoint)
+    SQLite     → EXPLAIN QUERY PLAN
+Only read statements are explained, at most once per fingerprint every
+SLOW_QUERY_EXPLAIN_INTERVAL seconds (ANALYZE runs the query a second time).
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Iterator, Optional
+
+from flask import has_request_context, request
+
+from vigi.logging_setup import attach_queue_listener
+from .instrumentation import add_statement_observer
+
+_logger = logging.getLogger("vigi.slow_queries")
+
+EXPLAINED_MAX = 1024  # fingerprints remembered for the EXPLAIN interval
+
+# ── Fingerprinting ──────────────────────────────────
+_RE_COMMENT = re.compile(r"(--[^\n]*|/\*.*?\*/)", re.S)
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_PARAM = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+|\$\d+")  # not PostgreSQL ::casts
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_RE_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Replace literals and bind markers by `?`, so equal shapes compare equal."""
+    s = _RE_COMMENT.sub(" ", sql or "")
+    s = _RE_STRING.sub("?", s)
+    s = _RE_PARAM.sub("?", s)
+    s = _RE_NUMBER.sub("?", s)
+    s = _RE_IN_LIST.sub("in (...)", s)
+    return _RE_SPACE.sub(" ", s).strip().lower()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:12]
+
+
+# ── Capture ─────────────────────────────────────────
+def _is_read(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return head in ("SELECT", "WITH")
+
+
+def _origin() -> str:
+    if has_request_context():
+        return request.endpoint or request.path
+    try:
+        import click
+        ctx = click.get_current_context(silent=True)
+        if ctx is not None:
+            return f"cli:{ctx.command_path}"
+    except Exception:
+        pass
+    return "<background>"
+
+
+def _safe_params(parameters, limit: int = 20):
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        items = list(parameters.items())[:limit]
+        return {k: _short(v) for k, v in items}
+    if isinstance(parameters, (list, tuple)):
+        return [_short(v) for v in list(parameters)[:limit]]
+    return _short(parameters)
+
+
+def _short(v, limit: int = 200):
+    if isinstance(v, (int, float, bool)) or v is None:
+        return v
+    s = str(v)
+    return s if len(s) <= limit else s[:limit] + "…"
+
+
+def _explain(cursor, dialect: str, statement: str, parameters) -> Optional[str]:
+    raw = cursor.connection
+    cur = raw.cursor()
+    try:
+        if dialect == "postgresql":
+            cur.execute("SAVEPOINT vf_explain")
+            try:
+                cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                rows = cur.fetchall()
+            finally:
+                cur.execute("ROLLBACK TO SAVEPOINT vf_explain")
+                cur.execute("RELEASE SAVEPOINT vf_explain")
+            return "\n".join(r[0] for r in rows)
+        if dialect == "sqlite":
+            cur.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+            return "\n".join(str(r[-1]) for r in cur.fetchall())
+        return None
+    finally:
+        cur.close()
+
+
+class SlowQueryRecorder:
+    def __init__(self, threshold_ms: float, explain: bool = True, explain_interval: float = 300.0):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.explain_interval = explain_interval
+        # fingerprint → last EXPLAIN (LRU, bounded for long-lived workers)
+        self._last_explained: "OrderedDict[str, float]" = OrderedDict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _due(self, fp: str) -> bool:
+        """True at most once per explain_interval for a fingerprint."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explained.get(fp, -1e9) < self.explain_interval:
+                return False
+            self._last_explained[fp] = now
+            self._last_explained.move_to_end(fp)
+            if len(self._last_explained) > EXPLAINED_MAX:
+                self._last_explained.popitem(last=False)
+        return True
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany, elapsed):
+        if elapsed < self.threshold or getattr(self._local, "busy", False):
+            return
+        self._local.busy = True
+        try:
+            self._record(conn, cursor, statement, parameters, executemany, elapsed)
+        except Exception as e:  # never break the caller's query
+            _logger.debug("slow-query capture failed: %s", e)
+        finally:
+            self._local.busy = False
+
+    def _record(self, conn, cursor, statement, parameters, executemany, elapsed):
+        fp = fingerprint(statement)
+        dialect = conn.dialect.name
+        plan = None
+
+        if self.explain and not executemany and _is_read(statement):
+            if self._due(fp):
+                try:
+                    plan = _explain(cursor, dialect, statement, parameters)
+                except Exception as e:
+                    plan = f"<explain failed: {e}>"
+
+        _logger.warning(json.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "ms": round(elapsed * 1000, 2),
+            "fingerprint": fp,
+            "sql": statement,
+            "params": None if executemany else _safe_params(parameters),
+            "endpoint": _origin(),
+            "dialect": dialect,
+            "plan": plan,
+        }, ensure_ascii=False, default=str))
+
+
+def init_slow_query_log(app) -> None:
+    threshold = app.config.get("SLOW_QUERY_MS")
+    if not threshold or "slow_query_log" in app.extensions:
+        return
+
+    path = app.config.get("SLOW_QUERY_LOG") or os.path.join(app.instance_path, "slow_queries.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    fh = RotatingFileHandler(
+        path,
+        maxBytes=int(app.config.get("SLOW_QUERY_LOG_MAX_BYTES", 20 * 1024 * 1024)),
+        backupCount=int(app.config.get("SLOW_QUERY_LOG_BACKUPS", 5)),
+        encoding="utf-8",
+        delay=True,
+    )
+    fh.setFormatter(logging.Formatter("%(message)s"))
+    _logger.setLevel(logging.WARNING)
+    _logger.propagate = False
+    if not _logger.handlers:
+        attach_queue_listener(_logger, fh)
+
+    recorder = SlowQueryRecorder(
+        float(threshold),
+        explain=app.config.get("SLOW_QUERY_EXPLAIN", True),
+        explain_interval=float(app.config.get("SLOW_QUERY_EXPLAIN_INTERVAL", 300)),
+    )
+    add_statement_observer(recorder)
+    app.extensions["slow_query_log"] = path
+
+
+# ── Reading / summarizing ───────────────────────────
+def iter_entries(path: str) -> Iterator[dict]:
+    """Current file plus rotated siblings (path.1, path.2, ...)."""
+    for p in sorted(glob.glob(path + "*")):
+        if not re.fullmatch(re.escape(path) + r"(\.\d+)?", p):
+            continue
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _looks_like_full_scan(plan: str) -> bool:
+    if not plan:
+        return False
+    if "Seq Scan" in plan:
+        return True
+    # SQLite: "SCAN lots" (no index) vs "SEARCH lots USING INDEX ..." / "SCAN lots USING INDEX ..."
+    return any(line.strip().startswith("SCAN ") and "USING" not in line for line in plan.splitlines())
+
+
+def summarize(entries) -> list:
+    groups: dict = {}
+    for e in entries:
+        fp = e.get("fingerprint") or fingerprint(e.get("sql", ""))
+        grp = groups.setdefault(fp, {
+            "fingerprint": fp,
+            "sql": normalize_sql(e.get("sql", "")),
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "endpoints": {},
+            "plan": None,
+        })
+        ms = float(e.get("ms") or 0)
+        grp["count"] += 1
+        grp["total_ms"] += ms
+        grp["max_ms"] = max(grp["max_ms"], ms)
+        ep = e.get("endpoint") or "?"
+        grp["endpoints"][ep] = grp["endpoints"].get(ep, 0) + 1
+        if e.get("plan"):
+            grp["plan"] = e["plan"]
+
+    out = list(groups.values())
+    for grp in out:
+        grp["mean_ms"] = grp["total_ms"] / grp["count"]
+        grp["full_scan"] = _looks_like_full_scan(grp["plan"])
+    out.sort(key=lambda g: g["total_ms"], reverse=True)
+    return out
@@ -0,0 +1,83 @@
+# ────────────────────────────────
+# vigi/perf/startup.py  —  cold-start timings (`flask perf startup`)
+# ────────────────────────────────
+"""
+The app factories mark their phases with a StartupTimer; the result is kept
+in app.extensions["startup_phases"]. `flask perf startup` runs a factory in a
+fresh interpreter under `python -X importtime`, so module imports and init
+phases are both measured cold.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+class StartupTimer:
+    def __init__(self):
+        self._last = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """Close `phase`: time since the previous mark (or creation)."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def attach(self, app) -> None:
+        app.extensions["startup_phases"] = self.phases
+
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import vigi
+t1 = time.perf_counter()
+app = getattr(vigi, sys.argv[1])(sys.argv[2])
+t2 = time.perf_counter()
+print("@@STARTUP@@" + json.dumps({
+    "import_s": t1 - t0,
+    "factory_s": t2 - t1,
+    "phases": app.extensions.get("startup_phases", []),
+}))
+"""
+
+_RE_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """
+    `-X importtime` output → {top-level package: seconds}. Self times are
+    summed per package, so nothing is counted twice whoever imported it.
+    """
+    out: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        m = _RE_IMPORTTIME.match(line)
+        if not m:
+            continue
+        self_us, _cumulative_us, name = m.groups()
+        top = name.split(".")[0]
+        out[top] = out.get(top, 0.0) + int(self_us) / 1e6
+    return out
+
+
+def measure_startup(factory: str = "create_app", config: str = "config.Config", cwd: str = None) -> dict:
+    """Run `vigi.<factory>(config)` in a fresh interpreter and return its timings."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, factory, config],
+        cwd=cwd, env=dict(os.environ), capture_output=True, text=True,
+    )
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@STARTUP@@"):
+            result = json.loads(line[len("@@STARTUP@@"):])
+    if proc.returncode != 0 or result is None:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        raise RuntimeError(f"{factory} failed to start:\n{tail}")
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
@@ -0,0 +1,306 @@
+# ────────────────────────────────
+# vigi/perf/tracing.py  —  in-process span tracing, exported as JSON lines
+# ────────────────────────────────
+"""
+One trace per request (or traced CLI run) when TRACING_ENABLED=1:
+
+    with span("report.build", rows=n):
+        ...
+
+Spans nest through a contextvar, so helpers deep in services need no
+plumbing. Outside a trace `span()` is a no-op, cheap enough for hot paths.
+Finished traces go (off the request path) to TRACING_FILE, one line each:
+
+    {"trace_id", "name", "ts", "duration_ms", "attrs",
+     "spans": [{"id", "parent", "name", "start_ms", "duration_ms", "attrs", "error"}]}
+
+Automatic spans: SQL statements, Jinja renders. The trace id is added to the
+app logger records (trace_id / span_id) and sent back as X-Trace-Id; an
+incoming W3C `traceparent` header is honoured.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+_logger = logging.getLogger("vigi.traces")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("vigi_current_span", default=None)
+_enabled = False
+_max_spans = 2000
+
+_RE_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "ts", "t0", "spans", "dropped", "open_stack")
+
+    def __init__(self, name: str, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.name = name
+        self.ts = datetime.now(timezone.utc)
+        self.t0 = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self.open_stack = []  # spans opened/closed by signal pairs (Jinja)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start", "duration", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attrs: dict, start: float = None):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter() if start is None else start
+        self.duration = None
+        self.error = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        out = {
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - self.trace.t0) * 1000, 3),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+        }
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def _add_child(parent: Span, name: str, attrs: dict, start: float = None) -> Optional[Span]:
+    trace = parent.trace
+    if len(trace.spans) >= _max_spans:
+        trace.dropped += 1
+        return None
+    child = Span(trace, name, parent.span_id, attrs, start)
+    trace.spans.append(child)
+    return child
+
+
+class span:
+    """`with span("name", **attrs) as s:` — a child of the current span (no-op outside a trace)."""
+
+    __slots__ = ("name", "attrs", "_span", "_token")
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self._span = None
+        self._token = None
+
+    def __enter__(self):
+        parent = _current.get()
+        if parent is None:
+            return _NOOP
+        self._span = _add_child(parent, self.name, self.attrs)
+        if self._span is None:
+            return _NOOP
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        s = self._span
+        if s is None:
+            return False
+        s.duration = time.perf_counter() - s.start
+        if exc_type is not None:
+            s.error = exc_type.__name__
+        _current.reset(self._token)
+        return False
+
+
+def record_span(name: str, seconds: float, **attrs) -> None:
+    """Add an already-measured child span that ends now."""
+    parent = _current.get()
+    if parent is None:
+        return
+    child = _add_child(parent, name, attrs, start=time.perf_counter() - seconds)
+    if child is not None:
+        child.duration = seconds
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current.get()
+    return s.trace.trace_id if s is not None else None
+
+
+# ── Roots ───────────────────────────────────────────
+def start_trace(name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None, **attrs):
+    """Open a root span; returns (span, token) to pass to end_trace(), or None when not traced."""
+    if not _enabled:
+        return None
+    root = Span(Trace(name, trace_id), name, parent_id, attrs)
+    root.trace.spans.append(root)
+    return root, _current.set(root)
+
+
+def end_trace(handle, error: Optional[str] = None) -> None:
+    if handle is None:
+        return
+    root, token = handle
+    trace = root.trace
+    # close whatever a signal pair left open (e.g. a template that raised)
+    while trace.open_stack:
+        trace.open_stack.pop().__exit__(None, None, None)
+    root.duration = time.perf_counter() - root.start
+    if error:
+        root.error = error
+    try:
+        _current.reset(token)
+    except ValueError:  # reset from another context: just drop the reference
+        _current.set(None)
+
+    _logger.info(json.dumps({
+        "trace_id": trace.trace_id,
+        "name": trace.name,
+        "ts": trace.ts.isoformat(timespec="milliseconds"),
+        "duration_ms": round(root.duration * 1000, 3),
+        "attrs": root.attrs,
+        "spans": [s.to_dict() for s in trace.spans],
+        "dropped": trace.dropped,
+    }, ensure_ascii=False, default=str))
+
+
+class trace:
+    """`with trace("cli autoexport"):` — root span for non-request work (CLI jobs)."""
+
+    __slots__ = ("name", "attrs", "_handle")
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self._handle = None
+
+    def __enter__(self):
+        if _current.get() is not None:  # already inside a trace: just nest
+            self._handle = ("span", span(self.name, **self.attrs))
+            return self._handle[1].__enter__()
+        self._handle = start_trace(self.name, **self.attrs)
+        return self._handle[0] if self._handle else _NOOP
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._handle and self._handle[0] == "span":
+            return self._handle[1].__exit__(exc_type, exc, tb)
+        end_trace(self._handle, exc_type.__name__ if exc_type else None)
+        return False
+
+
+# ── Automatic spans ─────────────────────────────────
+def _on_statement(conn, cursor, statement, parameters, context, executemany, elapsed):
+    if _current.get() is None:
+        return
+    if executemany:
+        record_span("db.query", elapsed, sql=statement[:300], many=True)
+    else:
+        record_span("db.query", elapsed, sql=statement[:300])
+
+
+def _before_render(sender, template, context, **extra):
+    parent = _current.get()
+    if parent is not None:
+        cm = span("template.render", template=template.name)
+        cm.__enter__()
+        parent.trace.open_stack.append(cm)
+
+
+def _after_render(sender, template, context, **extra):
+    s = _current.get()
+    if s is not None and s.trace.open_stack:
+        s.trace.open_stack.pop().__exit__(None, None, None)
+
+
+class TraceContextFilter(logging.Filter):
+    """Adds trace_id / span_id to records logged inside a trace."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        s = _current.get()
+        if s is not None:
+            record.trace_id = s.trace.trace_id
+            record.span_id = s.span_id
+        return True
+
+
+def init_tracing(app) -> None:
+    global _enabled, _max_spans
+    if not app.config.get("TRACING_ENABLED") or "tracing" in app.extensions:
+        return
+
+    from flask import before_render_template, g, request, template_rendered
+
+    from vigi.logging_setup import attach_queue_listener
+    from .instrumentation import add_statement_observer
+
+    path = app.config.get("TRACING_FILE") or os.path.join(app.instance_path, "perf", "traces.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fh = RotatingFileHandler(path, maxBytes=50 * 1024 * 1024, backupCount=5, encoding="utf-8", delay=True)
+    fh.setFormatter(logging.Formatter("%(message)s"))
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+    if not _logger.handlers:
+        attach_queue_listener(_logger, fh)
+
+    _enabled = True
+    _max_spans = int(app.config.get("TRACING_MAX_SPANS", 2000))
+    sample_rate = float(app.config.get("TRACING_SAMPLE", 1.0))
+
+    if app.config.get("TRACING_SQL", True):
+        add_statement_observer(_on_statement)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.logger.addFilter(TraceContextFilter())
+
+    @app.before_request
+    def _trace_start():
+        m = _RE_TRACEPARENT.match(request.headers.get("traceparent", ""))
+        if not m and sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+        g._trace = start_trace(
+            f"{request.method} {request.endpoint or request.path}",
+            trace_id=m.group(1) if m else None,
+            parent_id=m.group(2) if m else None,
+            path=request.path,
+        )
+
+    @app.after_request
+    def _trace_status(response):
+        handle = g.get("_trace")
+        if handle:
+            handle[0].set(status=response.status_code)
+            response.headers["X-Trace-Id"] = handle[0].trace.trace_id
+        return response
+
+    @app.teardown_request
+    def _trace_end(exc):
+        handle = g.pop("_trace", None)
+        if handle:
+            end_trace(handle, type(exc).__name__ if exc else None)
+
+    app.extensions["tracing"] = path
@@ -0,0 +1,56 @@
+# ────────────────────────────────
+# vigi/services/archive.py  —  move long-expired lots to lots_archive (`flask lots archive`)
+# ────────────────────────────────
+"""
+`lots` should hold the fridge inventory, not years of history. Lots expired
+more than N days ago are copied to lots_archive and deleted from lots, a batch
+per transaction (short locks, an interrupted run just resumes).
+
+What stays true after the move:
+  - their photos keep their image_refs count (lots_archive.image counts, see images.recount);
+  - logs name lots by lot number, and the listing/exports with "archived=1"
+    still find them (vigi/lots/query_utils.py).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import func, literal, select
+
+from models import ArchivedLot, Log, Lot
+
+_COPIED = ("lot_number", "product_name", "type", "expiry_date", "pn", "quantity", "image", "version")
+
+
+def archive_expired(session, older_than_days: int, batch_size: int = 500, today: Optional[date] = None,
+                    dry_run: bool = False, progress: Optional[Callable[[int], None]] = None) -> dict:
+    """Move lots that expired before today - older_than_days; returns {"cutoff", "moved"}."""
+    cutoff = (today or date.today()) - timedelta(days=older_than_days)
+    lots, archive = Lot.__table__, ArchivedLot.__table__
+    due = lots.c.expiry_date < cutoff
+
+    if dry_run:
+        return {"cutoff": cutoff, "moved": session.execute(select(func.count()).where(due)).scalar() or 0}
+
+    moved = 0
+    while True:
+        ids = session.execute(select(lots.c.id).where(due).order_by(lots.c.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        now = datetime.utcnow()
+        session.execute(archive.insert().from_select(
+            ["lot_id", *_COPIED, "archived_at"],
+            select(lots.c.id, *(lots.c[c] for c in _COPIED), literal(now, archive.c.archived_at.type))
+            .where(lots.c.id.in_(ids)),
+        ))
+        session.execute(lots.delete().where(lots.c.id.in_(ids)))
+        session.commit()
+        moved += len(ids)
+        if progress:
+            progress(moved)
+
+    if moved:
+        session.add(Log(action=f"Archived {moved} lots expired before {cutoff.isoformat()}", user_id=None))
+        session.commit()
+    return {"cutoff": cutoff, "moved": moved}
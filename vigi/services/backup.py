@@ -0,0 +1,327 @@
+# ────────────────────────────────
+# vigi/services/backup.py  —  online backup / restore / verify (`flask backup …`)
+# ────────────────────────────────
+"""
+One .tar.gz per backup:
+
+    db/vigifroid.sqlite        SQLite: page-by-page copy through the online backup API
+    db/<table>.csv             PostgreSQL: COPY … TO STDOUT per table, one REPEATABLE READ
+                               READ ONLY transaction (every table from the same snapshot)
+    uploads/<key>              every blob of the "uploads" storage
+    manifest.json              written last: sha256 + size of every member, row counts,
+                               alembic revision, dialect
+
+Neither path takes a lock writers wait on: the SQLite copy works BACKUP_PAGES
+pages at a time and sleeps BACKUP_SLEEP between steps (under WAL, readers and
+writers carry on); PostgreSQL COPY only needs ACCESS SHARE locks.
+
+Restore replaces the data, not the schema: run `flask db upgrade` to the
+backup's revision first. It restores the snapshot as a whole (no WAL replay).
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+SQLITE_MEMBER = "db/vigifroid.sqlite"
+CHUNK = 1 << 20
+
+Progress = Callable[[str], None]
+
+
+def _noop(_msg: str) -> None:
+    pass
+
+
+class BackupError(Exception):
+    pass
+
+
+class _HashingReader:
+    """File wrapper that hashes what tarfile reads through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def read(self, n: int = -1) -> bytes:
+        data = self.f.read(n)
+        self.sha.update(data)
+        self.size += len(data)
+        return data
+
+
+def _add_stream(tar: tarfile.TarFile, name: str, f, size: int, mtime: Optional[float] = None) -> dict:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime or time.time())
+    reader = _HashingReader(f)
+    tar.addfile(info, reader)
+    return {"sha256": reader.sha.hexdigest(), "size": reader.size}
+
+
+def _add_file(tar: tarfile.TarFile, name: str, path: str) -> dict:
+    with open(path, "rb") as f:
+        return _add_stream(tar, name, f, os.path.getsize(path))
+
+
+def _rate(nbytes: int, seconds: float) -> str:
+    return f"{nbytes / 1_048_576:,.1f} MB in {seconds:,.1f}s ({nbytes / 1_048_576 / max(seconds, 1e-6):,.1f} MB/s)"
+
+
+def _alembic_revision(conn) -> Optional[str]:
+    try:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        return None
+
+
+# ── Database dumps ──────────────────────────────────
+def _sqlite_file(engine) -> str:
+    path = engine.url.database
+    if not path or path == ":memory:":
+        raise BackupError("in-memory SQLite database: nothing to back up")
+    return path
+
+
+def _dump_sqlite(engine, tar, files: dict, pages: int, sleep: float, progress: Progress) -> dict:
+    src_path = _sqlite_file(engine)
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, "backup.sqlite")
+        src = sqlite3.connect(src_path, timeout=30)
+        dst = sqlite3.connect(copy)
+        try:
+            def step(status, remaining, total):
+                progress(f"\r  sqlite: {total - remaining:,}/{total:,} pages")
+
+            # pages > 0: the source is only locked for one step at a time
+            src.backup(dst, pages=pages, progress=step, sleep=sleep)
+            tables = {
+                name: dst.execute(f'SELECT count(*) FROM "{name}"').fetchone()[0]
+                for (name,) in dst.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+            }
+            revision = None
+            if "alembic_version" in tables:
+                revision = dst.execute("SELECT version_num FROM alembic_version").fetchone()
+                revision = revision[0] if revision else None
+        finally:
+            dst.close()
+            src.close()
+        files[SQLITE_MEMBER] = _add_file(tar, SQLITE_MEMBER, copy)
+    progress(f"\n  sqlite: {_rate(files[SQLITE_MEMBER]['size'], time.perf_counter() - t0)}\n")
+    return {"tables": tables, "alembic_revision": revision}
+
+
+def _pg_tables(metadata) -> list:
+    return [t.name for t in metadata.sorted_tables] + ["alembic_version"]
+
+
+def _dump_postgres(engine, metadata, tar, files: dict, progress: Progress) -> dict:
+    tables: Dict[str, int] = {}
+    # one snapshot for every table; SQLAlchemy resets both options when the connection goes back to the pool
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True) as conn:
+        revision = conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+        cur = conn.connection.driver_connection.cursor()  # COPY needs the psycopg2 cursor
+        for name in _pg_tables(metadata):
+            t0 = time.perf_counter()
+            with tempfile.TemporaryFile() as spool:
+                cur.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', spool)
+                size = spool.tell()
+                spool.seek(0)
+                tables[name] = max(0, sum(chunk.count(b"\n") for chunk in iter(lambda: spool.read(CHUNK), b"")) - 1)
+                spool.seek(0)
+                member = f"db/{name}.csv"
+                files[member] = _add_stream(tar, member, spool, size)
+            progress(f"  {name}: {tables[name]:,} rows, {_rate(size, time.perf_counter() - t0)}\n")
+        cur.close()
+        conn.rollback()
+    return {"tables": tables, "alembic_revision": revision}
+
+
+def _dump_uploads(store, tar, files: dict, progress: Progress) -> dict:
+    count = nbytes = 0
+    t0 = time.perf_counter()
+    for blob in store.scan():
+        if os.path.splitext(blob.key)[1].startswith(".tmp"):
+            continue  # LocalStorage.save() in progress
+        member = f"uploads/{blob.key}"
+        try:
+            with store.open(blob.key) as f:
+                files[member] = _add_stream(tar, member, f, blob.size, blob.mtime)
+        except FileNotFoundError:
+            continue  # deleted by `images gc` meanwhile
+        count += 1
+        nbytes += blob.size
+        if count % 200 == 0:
+            progress(f"\r  uploads: {count:,} files")
+    progress(f"\r  uploads: {count:,} files, {_rate(nbytes, time.perf_counter() - t0)}\n")
+    return {"count": count, "bytes": nbytes}
+
+
+# ── Public API ──────────────────────────────────────
+def create(db, out_path: str, store=None, pages: int = 1024, sleep: float = 0.005,
+           progress: Progress = _noop) -> dict:
+    """Write a backup archive to `out_path`; returns its manifest."""
+    engine = db.engine
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        raise BackupError(f"unsupported database: {dialect}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = f"{out_path}.part"
+    files: Dict[str, dict] = {}
+    t0 = time.perf_counter()
+    try:
+        with tarfile.open(tmp_path, "w:gz", compresslevel=6) as tar:
+            if dialect == "sqlite":
+                info = _dump_sqlite(engine, tar, files, pages, sleep, progress)
+            else:
+                info = _dump_postgres(engine, db.metadata, tar, files, progress)
+            uploads = _dump_uploads(store, tar, files, progress) if store is not None else None
+
+            manifest = {
+                "format": FORMAT,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "dialect": dialect,
+                **info,
+                "uploads": uploads,
+                "files": files,
+            }
+            data = json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8")
+            _add_stream(tar, MANIFEST, io.BytesIO(data), len(data))
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    size = os.path.getsize(out_path)
+    progress(f"  archive: {out_path} ({size / 1_048_576:,.1f} MB, {time.perf_counter() - t0:,.1f}s)\n")
+    return manifest
+
+
+def verify(path: str) -> dict:
+    """Re-hash every member against the manifest; returns the manifest or raises BackupError."""
+    seen: Dict[str, dict] = {}
+    manifest = None
+    try:
+        with tarfile.open(path, "r:gz") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                f = tar.extractfile(member)
+                if member.name == MANIFEST:
+                    manifest = json.loads(f.read())
+                    continue
+                reader = _HashingReader(f)
+                while reader.read(CHUNK):
+                    pass
+                seen[member.name] = {"sha256": reader.sha.hexdigest(), "size": reader.size}
+    except (tarfile.TarError, EOFError, OSError) as e:
+        raise BackupError(f"unreadable archive: {e}") from e
+
+    if manifest is None:
+        raise BackupError("no manifest.json (incomplete archive?)")
+    if manifest.get("format") != FORMAT:
+        raise BackupError(f"unknown backup format {manifest.get('format')!r}")
+    expected = manifest.get("files", {})
+    missing = sorted(set(expected) - set(seen))
+    extra = sorted(set(seen) - set(expected))
+    bad = sorted(name for name in set(expected) & set(seen) if expected[name] != seen[name])
+    if missing or extra or bad:
+        raise BackupError(f"checksum mismatch: {len(bad)} changed, {len(missing)} missing, {len(extra)} unexpected"
+                          + (f" (first: {(bad + missing + extra)[0]})" if bad or missing or extra else ""))
+    return manifest
+
+
+def _restore_sqlite(engine, db_file: str) -> None:
+    target = _sqlite_file(engine)
+    engine.dispose()  # pooled connections would keep reading the old pages
+    src = sqlite3.connect(db_file)
+    dst = sqlite3.connect(target, timeout=30)
+    try:
+        src.backup(dst)  # one step: writers wait on busy_timeout, readers see old or new, never half
+    finally:
+        dst.close()
+        src.close()
+
+
+def _restore_postgres(engine, metadata, tar: tarfile.TarFile, manifest: dict, progress: Progress) -> None:
+    tables = [t for t in _pg_tables(metadata) if t in manifest["tables"]]
+    raw = engine.raw_connection()
+    try:
+        dbapi = raw.driver_connection
+        cur = dbapi.cursor()
+        cur.execute("TRUNCATE " + ", ".join(f'"{t}"' for t in tables) + " RESTART IDENTITY CASCADE")
+        members = {m.name: m for m in tar.getmembers()}
+        for name in tables:
+            f = tar.extractfile(members[f"db/{name}.csv"])
+            cur.copy_expert(f'COPY "{name}" FROM STDIN WITH (FORMAT csv, HEADER)', f)
+            progress(f"  {name}: {manifest['tables'][name]:,} rows\n")
+        # serial columns continue after the restored ids
+        for table in metadata.sorted_tables:
+            for col in table.primary_key.columns:
+                if col.autoincrement is True or (col.autoincrement == "auto" and col.type.python_type is int):
+                    cur.execute(
+                        f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', '{col.name}'), "
+                        f"COALESCE((SELECT MAX(\"{col.name}\") FROM \"{table.name}\"), 0) + 1, false) "
+                        f"WHERE pg_get_serial_sequence('\"{table.name}\"', '{col.name}') IS NOT NULL"
+                    )
+        dbapi.commit()
+    except BaseException:
+        raw.driver_connection.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def restore(db, path: str, store=None, progress: Progress = _noop) -> dict:
+    """Verify `path`, then replace the database content (and add missing uploads)."""
+    manifest = verify(path)
+    engine = db.engine
+    if manifest["dialect"] != engine.dialect.name:
+        raise BackupError(f"backup is from {manifest['dialect']}, database is {engine.dialect.name}")
+    with engine.connect() as conn:
+        current = _alembic_revision(conn)
+    if manifest.get("alembic_revision") and current and current != manifest["alembic_revision"]:
+        raise BackupError(f"schema revision {current} != backup {manifest['alembic_revision']}: "
+                          f"run `flask db upgrade {manifest['alembic_revision']}` first")
+
+    db.session.remove()
+    with tarfile.open(path, "r:gz") as tar:
+        if manifest["dialect"] == "sqlite":
+            with tempfile.TemporaryDirectory() as tmp:
+                db_file = os.path.join(tmp, "restore.sqlite")
+                with tar.extractfile(tar.getmember(SQLITE_MEMBER)) as src, open(db_file, "wb") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK)
+                _restore_sqlite(engine, db_file)
+            progress(f"  sqlite: {sum(manifest['tables'].values()):,} rows restored\n")
+        else:
+            _restore_postgres(engine, db.metadata, tar, manifest, progress)
+
+        restored = 0
+        if store is not None and manifest.get("uploads"):
+            # photos are immutable (content-named): only add what is missing
+            for member in tar.getmembers():
+                if member.isfile() and member.name.startswith("uploads/"):
+                    key = member.name[len("uploads/"):]
+                    if not store.exists(key):
+                        store.save(key, tar.extractfile(member).read())
+                        restored += 1
+            progress(f"  uploads: {restored:,} files restored\n")
+    return {**manifest, "uploads_restored": restored}
@@ -0,0 +1,142 @@
+# ────────────────────────────────
+# vigi/services/identity.py  —  in-process cache for the user identity + settings row
+# ────────────────────────────────
+"""
+Two lookups run on (nearly) every request and almost never change:
+
+    load_user(id)   Flask-Login's user_loader
+    settings()      the AppSettings singleton (AppSettings.get())
+
+Both are kept in process memory as plain column dicts and turned back into a
+session-attached instance without a SELECT (make_transient_to_detached +
+merge(load=False)), so a route can still modify and commit what it got.
+
+Any committed ORM write to users / app_settings bumps that table's version
+and drops this process's entries; other workers pick the change up within
+IDENTITY_CACHE_TTL seconds (0 disables the cache).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from vigi.extensions import db
+
+TABLES = ("users", "app_settings")
+_SETTINGS_KEY = "row"
+
+_lock = threading.Lock()
+_entries: Dict[Tuple[str, Any], Tuple[float, int, dict]] = {}  # (table, key) → (expires, version, columns)
+_versions: Dict[str, int] = {t: 0 for t in TABLES}
+_listening = False
+
+
+# ── Store ───────────────────────────────────────────
+def _ttl() -> float:
+    return float(current_app.config.get("IDENTITY_CACHE_TTL", 60))
+
+
+def _get(table: str, key) -> Optional[dict]:
+    entry = _entries.get((table, key))
+    if entry is None:
+        return None
+    expires, version, values = entry
+    if version != _versions[table] or time.monotonic() >= expires:
+        _entries.pop((table, key), None)
+        return None
+    return values
+
+
+def _put(table: str, key, obj, version: int, ttl: float) -> None:
+    values = {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+    with _lock:
+        # a write committed while we were reading has bumped the version: don't keep the old row
+        if version == _versions[table]:
+            _entries[(table, key)] = (time.monotonic() + ttl, version, values)
+
+
+def _attach(model, values: dict):
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return db.session.merge(obj, load=False)
+
+
+def invalidate(*tables: str) -> None:
+    with _lock:
+        for table in tables or TABLES:
+            _versions[table] += 1
+            for k in [k for k in _entries if k[0] == table]:
+                _entries.pop(k, None)
+
+
+# ── Lookups ─────────────────────────────────────────
+def load_user(user_id: int):
+    from models import User
+
+    ttl = _ttl()
+    if ttl <= 0:
+        return db.session.get(User, user_id)
+    values = _get("users", user_id)
+    if values is not None:
+        return _attach(User, values)
+
+    version = _versions["users"]
+    user = db.session.get(User, user_id)
+    if user is not None:
+        _put("users", user_id, user, version, ttl)
+    return user
+
+
+def settings():
+    from models import AppSettings
+
+    ttl = _ttl()
+    values = _get("app_settings", _SETTINGS_KEY) if ttl > 0 else None
+    if values is not None:
+        return _attach(AppSettings, values)
+
+    version = _versions["app_settings"]
+    row = AppSettings.query.first()
+    if not row:
+        row = AppSettings()
+        db.session.add(row)
+        db.session.commit()
+        version = _versions["app_settings"]
+    if ttl > 0:
+        _put("app_settings", _SETTINGS_KEY, row, version, ttl)
+    return row
+
+
+# ── Invalidation (ORM writes, applied on commit) ────
+def _after_flush(session, flush_context) -> None:
+    touched = session.info.setdefault("identity_tables", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in TABLES:
+            touched.add(table)
+
+
+def _after_commit(session) -> None:
+    touched = session.info.pop("identity_tables", None)
+    if touched:
+        invalidate(*touched)
+
+
+def _after_rollback(session, previous) -> None:
+    if previous.parent is None:  # a savepoint rollback leaves the outer transaction's writes pending
+        session.info.pop("identity_tables", None)
+
+
+def init_identity_cache(app) -> None:
+    global _listening
+    if _listening:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_rollback)
+    _listening = True
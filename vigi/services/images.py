@@ -0,0 +1,337 @@
+# ────────────────────────────────
+# vigi/services/images.py  —  lot photos: content-addressed store, bounded decode, variants
+# ────────────────────────────────
+"""
+Uploads are stored under their content hash (<sha256[:32]>.jpg): the same
+photo uploaded twice is one file, and a name can never collide. Lots hold
+references counted in `image_refs` (acquire / release, in the lot's own
+transaction); files are only removed by `flask images gc`, which deletes
+every upload whose name has no reference left.
+
+Uploads are decoded once, at reduced resolution (JPEG draft mode = DCT
+scaling, Image.reduce for the rest), and stored as a master JPEG capped at
+IMAGE_MAX_SIDE. The variants are built off the request thread:
+
+    <stem>_w<width>.webp / .jpg   one pair per IMAGE_WIDTHS entry (≤ master width)
+    <stem>_ph.webp                ~16 px placeholder, inlined as a data: URI
+
+The placeholder is written last and marks the set as complete; until then (or
+for photos uploaded before this pipeline, see `flask images variants`) the
+templates fall back to the master file.
+
+All bytes go through a vigi.storage backend (`get_storage("uploads")`).
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+
+from vigi.tiered_cache import LocalLRU
+
+PLACEHOLDER_WIDTH = 16
+FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg")}
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+MISSING_TTL = 10.0  # seconds before a miss is looked up again (one HEAD per photo on S3)
+LOOKUP_MAX = 4096  # photos whose lookup is remembered per process (LRU)
+# store.location(filename) → {"widths": [...], "placeholder": "data:..."}
+_ready = LocalLRU(LOOKUP_MAX, ttl=float("inf"))
+# store.location(filename) → True while variants were found missing less than MISSING_TTL ago
+_missing = LocalLRU(LOOKUP_MAX, ttl=MISSING_TTL)
+
+
+def _stem(filename: str) -> str:
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def variant_name(filename: str, width: int, fmt: str = "webp") -> str:
+    return f"{_stem(filename)}_w{width}{FORMATS[fmt][1]}"
+
+
+def placeholder_name(filename: str) -> str:
+    return f"{_stem(filename)}_ph.webp"
+
+
+def parse_widths(value) -> List[int]:
+    if isinstance(value, str):
+        value = [v for v in value.replace(" ", "").split(",") if v]
+    return sorted({int(v) for v in value})
+
+
+# ── Decode / save ───────────────────────────────────
+def decode_upload(stream, max_side: int):
+    """Open an upload as RGB, never materialising more than ~max_side pixels per side."""
+    from PIL import Image, ImageOps
+
+    img = Image.open(stream)
+    if img.format == "JPEG":
+        # the decoder picks the largest 1/2, 1/4, 1/8 scale still >= the requested box
+        img.draft("RGB", (max_side, max_side))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3.0)
+    return img
+
+
+def _save(img, store, key: str, fmt: str, **params) -> None:
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    store.save(key, buf.getvalue(), "image/webp" if fmt == "WEBP" else "image/jpeg")
+
+
+def _save_params(fmt: str, quality: int) -> dict:
+    if fmt == "WEBP":
+        return {"quality": quality, "method": 4}
+    return {"quality": quality, "optimize": True, "progressive": True}
+
+
+def build_variants(img, store, filename: str, widths: Sequence[int], quality: int = 80) -> List[int]:
+    """Write every variant of `img` (the decoded master); returns the widths written."""
+    from PIL import Image
+
+    done = []
+    for w in parse_widths(widths):
+        if w >= img.width and done:
+            break
+        w = min(w, img.width)
+        h = max(1, round(img.height * w / img.width))
+        resized = img if w == img.width else img.resize((w, h), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in ("webp", "jpeg"):
+            pil_fmt, _ = FORMATS[fmt]
+            _save(resized, store, variant_name(filename, w, fmt), pil_fmt, **_save_params(pil_fmt, quality))
+        done.append(w)
+
+    ph_h = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+    tiny = img.resize((PLACEHOLDER_WIDTH, ph_h), Image.BILINEAR, reducing_gap=2.0)
+    _save(tiny, store, placeholder_name(filename), "WEBP", quality=30)
+    forget(store, filename)
+    return done
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    with _lock:
+        # a pool inherited through fork has no threads behind it: make a new one
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="vf-images")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def content_name(stream) -> str:
+    """Upload name derived from its bytes (the stream is rewound)."""
+    h = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(1 << 16), b""):
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()[:32] + ".jpg"
+
+
+def save_upload(app, stream, store) -> str:
+    """
+    Store an upload under its content name and return that name. A new photo
+    is decoded + saved now, its variants are built in the background; a photo
+    already stored is not decoded again.
+    """
+    cfg = app.config
+    quality = int(cfg.get("IMAGE_QUALITY", 80))
+
+    filename = content_name(stream)
+    stored = store.exists(filename)
+    if stored:
+        store.touch(filename)  # a fresh master mtime keeps a concurrent `images gc` away from the photo
+        if store.exists(placeholder_name(filename)):
+            return filename
+        # variants lost to a gc that ran before the touch: build them again from this upload
+
+    img = decode_upload(stream, int(cfg.get("IMAGE_MAX_SIDE", 1600)))
+    if not stored:
+        _save(img, store, filename, "JPEG", **_save_params("JPEG", quality))
+    forget(store, filename)
+
+    widths = parse_widths(cfg.get("IMAGE_WIDTHS", "160,320,640"))
+
+    def job():
+        try:
+            return build_variants(img, store, filename, widths, quality)
+        except Exception as e:  # the master is saved: a missing variant only costs bytes
+            app.logger.warning(f"[IMAGES] variants failed for {filename}: {e}")
+            return []
+
+    _get_executor(int(cfg.get("IMAGE_WORKERS", 2))).submit(job)
+    return filename
+
+
+def remove_variants(store, filename: str, widths: Sequence[int]) -> None:
+    names = [placeholder_name(filename)]
+    names += [variant_name(filename, w, fmt) for w in parse_widths(widths) for fmt in FORMATS]
+    for name in names:
+        store.delete(name)
+    forget(store, filename)
+
+
+# ── Lookup (templates) ──────────────────────────────
+def forget(store, filename: str) -> None:
+    key = store.location(os.path.basename(filename))
+    _ready.drop([key])
+    _missing.drop([key])
+
+
+def variants(store, filename: str, widths: Sequence[int]) -> Optional[dict]:
+    """Available variant widths + inline placeholder, or None while not (yet) generated."""
+    filename = os.path.basename(filename)
+    key = store.location(filename)
+    hit, found = _ready.get(key)
+    if found:
+        return hit
+    if _missing.get(key)[1]:
+        return None
+
+    try:
+        placeholder = "data:image/webp;base64," + base64.b64encode(store.read(placeholder_name(filename))).decode("ascii")
+    except (OSError, ValueError):
+        _missing.set(key, True, None)  # the background job may still be running
+        return None
+
+    found = [w for w in parse_widths(widths) if store.exists(variant_name(filename, w, "webp"))]
+    # a master narrower than the smallest width gets one variant at its own width
+    if not found:
+        stem = _stem(filename) + "_w"
+        found = sorted(int(b.key[len(stem):-5]) for b in store.scan(stem)
+                       if b.key.endswith(".webp") and b.key[len(stem):-5].isdigit())
+    hit = {"widths": found, "placeholder": placeholder}
+    _ready.set(key, hit, None)
+    _missing.drop([key])
+    return hit
+
+
+# ── References (image_refs) ─────────────────────────
+def acquire(session, name: Optional[str]) -> None:
+    """+1 reference on `name` (upsert, safe against concurrent uploads of the same photo)."""
+    if not name:
+        return
+    from models import ImageRef
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - other backends: plain read-modify-write
+        ref = session.get(ImageRef, name) or ImageRef(name=name, refcount=0)
+        ref.refcount += 1
+        session.add(ref)
+        return
+
+    t = ImageRef.__table__
+    stmt = insert(t).values(name=name, refcount=1, created_at=func.now())
+    session.execute(stmt.on_conflict_do_update(index_elements=[t.c.name], set_={"refcount": t.c.refcount + 1}))
+
+
+def release(session, name: Optional[str]) -> None:
+    """-1 reference on `name`; the file itself goes at the next `images gc`."""
+    if not name:
+        return
+    from models import ImageRef
+
+    t = ImageRef.__table__
+    session.execute(t.update().where(t.c.name == name, t.c.refcount > 0).values(refcount=t.c.refcount - 1))
+
+
+def recount(session) -> int:
+    """Rebuild image_refs from lots + lots_archive (after bulk loads/deletes); returns rows changed."""
+    from models import ArchivedLot, ImageRef, Lot
+
+    counts = {}
+    for model in (Lot, ArchivedLot):
+        for name, n in (
+            session.query(model.image, func.count(model.id))
+            .filter(model.image.isnot(None), model.image != "")
+            .group_by(model.image)
+        ):
+            counts[name] = counts.get(name, 0) + n
+    t = ImageRef.__table__
+    changed = 0
+    for name, refcount in session.query(ImageRef.name, ImageRef.refcount).all():
+        want = counts.pop(name, 0)
+        if want != refcount:
+            session.execute(t.update().where(t.c.name == name).values(refcount=want))
+            changed += 1
+    if counts:
+        session.execute(t.insert(), [{"name": n, "refcount": c} for n, c in counts.items()])
+        changed += len(counts)
+    return changed
+
+
+# ── Garbage collection ──────────────────────────────
+# Only blobs named like uploads are ever touched: the upload root may be shared
+# with other files (icons, logos, a bucket used by another app).
+_RE_UPLOAD_FILE = re.compile(
+    r"^(?P<stem>[0-9a-f]{32}|img_\d{14}|syn_\d{4})(?P<variant>_w\d+|_ph)?\.(?:jpg|jpeg|png|webp)(?P<tmp>\.tmp\d+)?$"
+)
+
+
+def upload_stem(filename: str) -> Optional[str]:
+    """The master stem a stored file belongs to (variants included), None if not an upload."""
+    m = _RE_UPLOAD_FILE.match(filename)
+    return m.group("stem") if m else None
+
+
+def iter_orphans(store, referenced_stems, grace_seconds: int) -> Iterator[Tuple[str, int]]:
+    """
+    (key, bytes) of stored uploads no lot references, older than the grace
+    period. A photo is aged by its master, which a re-upload touches: its
+    variants go with it or not at all. Without a master (upload in progress),
+    the newest of its files counts.
+    """
+    cutoff = time.time() - grace_seconds
+    files = {}  # stem → [(key, size)], unreferenced uploads only
+    age = {}    # stem → (is master, mtime): a master's mtime outranks any other file's
+    for blob in store.scan():
+        m = _RE_UPLOAD_FILE.match(blob.key)
+        if m is None or m.group("stem") in referenced_stems:
+            continue
+        stem = m.group("stem")
+        files.setdefault(stem, []).append((blob.key, blob.size))
+        master = not (m.group("variant") or m.group("tmp"))
+        age[stem] = max(age.get(stem, (False, 0.0)), (master, blob.mtime))
+    for stem, blobs in files.items():
+        if age[stem][1] < cutoff:
+            yield from blobs
+
+
+def gc(session, store, grace_seconds: int = 3600, dry_run: bool = False) -> dict:
+    """Delete unreferenced uploads (+ variants) and their zero-count rows."""
+    from models import ImageRef
+
+    referenced = {
+        os.path.splitext(n)[0]
+        for (n,) in session.query(ImageRef.name).filter(ImageRef.refcount > 0).yield_per(10_000)
+    }
+    files = freed = 0
+    for key, size in iter_orphans(store, referenced, grace_seconds):
+        if not dry_run:
+            if not store.delete(key):
+                continue
+            forget(store, key)
+        files += 1
+        freed += size
+
+    rows = 0
+    if not dry_run:
+        t = ImageRef.__table__
+        rows = session.execute(t.delete().where(t.c.refcount <= 0)).rowcount or 0
+        session.commit()
+    return {"referenced": len(referenced), "files": files, "bytes": freed, "rows": rows}
@@ -11,26 +11,30 @@ from typing import Iterable, List, Optional
 from flask import current_app
 from flask_mail import Message
 from flask_babel import force_locale, gettext as _
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 
+from vigi.db_routing import read_replica
 from vigi.extensions import mail, db
+from vigi.perf.tracing import span
+from vigi.storage import get_storage
 from models import Lot, AppSettings, Log
 from xml.sax.saxutils import escape
 
-# Arabic shaping (اختياري)
-try:
-    import arabic_reshaper
-    from bidi.algorithm import get_display
-    HAS_ARABIC_SUPPORT = True
-except Exception:
-    arabic_reshaper = None
-    get_display = None
-    HAS_ARABIC_SUPPORT = False
+# reportlab and the Arabic shaping libs are imported on first PDF build only:
+# CLI runs and web workers that never export a PDF don't pay for them.
+_arabic_shaper = None
+
+
+def _get_arabic_shaper():
+    """Arabic shaping (اختياري): returns text → shaped text, or None if unavailable."""
+    global _arabic_shaper
+    if _arabic_shaper is None:
+        try:
+            import arabic_reshaper
+            from bidi.algorithm import get_display
+            _arabic_shaper = lambda raw: get_display(arabic_reshaper.reshape(raw))  # noqa: E731
+        except Exception:
+            _arabic_shaper = False
+    return _arabic_shaper or None
 
 
 # ────────────────────────────────
@@ -63,6 +67,9 @@ def _ensure_arabic_fonts() -> bool:
     Register Arabic fonts if possible.
     Returns True if fonts are usable, False if we should fallback to Helvetica.
     """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
     try:
         font_dir = os.path.join(current_app.static_folder, "fonts")
         reg_path = os.path.join(font_dir, "NotoNaskhArabic-Regular.ttf")
@@ -191,7 +198,8 @@ def build_lots_csv(lang_code: str) -> bytes:
         ])
 
         today = _get_today_date()
-        lots = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc()).all()
+        with span("report.fetch"), read_replica():
+            lots = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc()).all()
 
         for lot in lots:
             if lot.expiry_date and lot.expiry_date < today:
@@ -217,6 +225,11 @@ def build_lots_csv(lang_code: str) -> bytes:
 # PDF Builder (Reusable) ✅ with row colors + unified dates dd/MM/YYYY
 # ────────────────────────────────
 def build_lots_pdf_from_lots(lots: Iterable[Lot], lang_code: str, today: date = None) -> bytes:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
     today = today or _get_today_date()
 
     lang_code = _normalize_lang(lang_code, current_app.config.get("BABEL_DEFAULT_LOCALE", "fr"))
@@ -231,13 +244,14 @@ def build_lots_pdf_from_lots(lots: Iterable[Lot], lang_code: str, today: date =
     font_bold = "NotoNaskhArabic-Bold" if is_ar else "Helvetica-Bold"
 
     styles = getSampleStyleSheet()
+    shape_arabic = _get_arabic_shaper() if is_ar else None
 
     def _p(text: str, font_name: str, size: int = 9, align: int = 1, bold: bool = False) -> Paragraph:
         raw = text or ""
 
         # Arabic shaping
-        if is_ar and HAS_ARABIC_SUPPORT and raw:
-            raw = get_display(arabic_reshaper.reshape(raw))
+        if shape_arabic and raw:
+            raw = shape_arabic(raw)
 
         safe_text = escape(raw)
 
@@ -282,73 +296,91 @@ def build_lots_pdf_from_lots(lots: Iterable[Lot], lang_code: str, today: date =
         header_align = 2 if is_ar else 1
         body_align = 2 if is_ar else 1
 
-        data = [[_p(h, font_bold, bold=True, align=header_align) for h in headers]]
-
-        status_keys: List[str] = []
-
-        for lot in lots:
-            if lot.expiry_date and lot.expiry_date < today:
-                status_keys.append("expired")
-                state = _("Expired")
-            elif lot.expiry_date and lot.expiry_date <= today + timedelta(days=30):
-                status_keys.append("warning")
-                state = _("Warning")
-            else:
-                status_keys.append("valid")
-                state = _("Valid")
-
-            row = [
-                lot.product_name or "",
-                lot.pn or "",
-                lot.lot_number or "",
-                _fmt_date(lot.expiry_date),   # ✅ unified dd/MM/YYYY
-                lot.type or "",
-                state,
+        lots = list(lots)  # fetched by the caller (report.fetch span there)
+
+        with span("report.shape", rows=len(lots), arabic=is_ar):
+            data = [[_p(h, font_bold, bold=True, align=header_align) for h in headers]]
+
+            status_keys: List[str] = []
+
+            for lot in lots:
+                if lot.expiry_date and lot.expiry_date < today:
+                    status_keys.append("expired")
+                    state = _("Expired")
+                elif lot.expiry_date and lot.expiry_date <= today + timedelta(days=30):
+                    status_keys.append("warning")
+                    state = _("Warning")
+                else:
+                    status_keys.append("valid")
+                    state = _("Valid")
+
+                row = [
+                    lot.product_name or "",
+                    lot.pn or "",
+                    lot.lot_number or "",
+                    _fmt_date(lot.expiry_date),   # ✅ unified dd/MM/YYYY
+                    lot.type or "",
+                    state,
+                ]
+                data.append([_p(c, font_regular, align=body_align) for c in row])
+
+        with span("report.layout"):
+            table = Table(data, repeatRows=1, colWidths=[160, 90, 110, 100, 110, 110])
+
+            # Base styles
+            style_cmds = [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.Color(0.2, 0.4, 0.8)),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+
+                ("FONTNAME", (0, 0), (-1, 0), font_bold),
+                ("FONTNAME", (0, 1), (-1, -1), font_regular),
+
+                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+                ("ALIGN", (0, 1), (-1, -1), "RIGHT" if is_ar else "CENTER"),
             ]
-            data.append([_p(c, font_regular, align=body_align) for c in row])
 
-        table = Table(data, repeatRows=1, colWidths=[160, 90, 110, 100, 110, 110])
-
-        # Base styles
-        style_cmds = [
-            ("BACKGROUND", (0, 0), (-1, 0), colors.Color(0.2, 0.4, 0.8)),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-            ("LEFTPADDING", (0, 0), (-1, -1), 6),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-
-            ("FONTNAME", (0, 0), (-1, 0), font_bold),
-            ("FONTNAME", (0, 1), (-1, -1), font_regular),
-
-            ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-            ("ALIGN", (0, 1), (-1, -1), "RIGHT" if is_ar else "CENTER"),
-        ]
-
-        # Row coloring
-        bg_map = {
-            "expired": colors.Color(1, 0.8, 0.8),  # light red
-            "warning": colors.Color(1, 1, 0.8),    # light yellow
-            "valid": colors.Color(0.8, 1, 0.8),    # light green
-        }
-        for i, key in enumerate(status_keys, start=1):
-            style_cmds.append(("BACKGROUND", (0, i), (-1, i), bg_map.get(key, colors.white)))
-
-        table.setStyle(TableStyle(style_cmds))
-        elements.append(table)
-
-        doc.build(elements)
+            # Row coloring
+            bg_map = {
+                "expired": colors.Color(1, 0.8, 0.8),  # light red
+                "warning": colors.Color(1, 1, 0.8),    # light yellow
+                "valid": colors.Color(0.8, 1, 0.8),    # light green
+            }
+            for i, key in enumerate(status_keys, start=1):
+                style_cmds.append(("BACKGROUND", (0, i), (-1, i), bg_map.get(key, colors.white)))
+
+            table.setStyle(TableStyle(style_cmds))
+            elements.append(table)
+
+        with span("report.build") as sp:
+            doc.build(elements)
+            sp.set(bytes=buf.tell())
         return buf.getvalue()
 
 
 def build_lots_pdf(lang_code: str) -> bytes:
-    lots = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc()).all()
+    with span("report.fetch"), read_replica():
+        lots = Lot.query.order_by(Lot.expiry_date.asc(), Lot.product_name.asc()).all()
     return build_lots_pdf_from_lots(lots, lang_code)
 
 
 # ────────────────────────────────
 # Auto Export
 # ────────────────────────────────
+def _archive_report(key: str, data: bytes, mimetype: str) -> None:
+    """Keep a copy of a sent report in the "reports" storage (REPORT_ARCHIVE=1)."""
+    if not current_app.config.get("REPORT_ARCHIVE", True):
+        return
+    try:
+        with span("report.archive", bytes=len(data)):
+            get_storage("reports").save(key, data, mimetype)
+    except Exception as e:  # the mail is what matters: a failed copy is only logged
+        current_app.logger.warning(f"[AUTOEXPORT] archive failed for {key}: {e}")
+
+
 def run_monthly_auto_export(lang_code: str = None, today: date = None) -> bool:
     """
     Used by CLI/Task Scheduler.
@@ -396,11 +428,13 @@ def run_monthly_auto_export(lang_code: str = None, today: date = None) -> bool:
 
     # Build file
     if fmt == "csv":
-        file_bytes = build_lots_csv(lang_code)
+        with span("report.csv", lang=lang_code):
+            file_bytes = build_lots_csv(lang_code)
         filename = f"VigiFroid_Report_{mk}.csv"
         mimetype = "text/csv; charset=utf-8"
     else:
-        file_bytes = build_lots_pdf(lang_code)
+        with span("report.pdf", lang=lang_code):
+            file_bytes = build_lots_pdf(lang_code)
         filename = f"VigiFroid_Report_{mk}.pdf"
         mimetype = "application/pdf"
 
@@ -441,9 +475,11 @@ def run_monthly_auto_export(lang_code: str = None, today: date = None) -> bool:
 
     # Commit BEFORE sending email
         db.session.commit()
+        _archive_report(f"auto/{filename}", file_bytes, mimetype)
 
     # Send email AFTER commit
-        mail.send(msg)
+        with span("mail.send", recipients=len(recipients), attachment_bytes=len(file_bytes)):
+            mail.send(msg)
 
         current_app.logger.info(f"[AUTOEXPORT] sent to {rec_str} ({fmt})")
         return True
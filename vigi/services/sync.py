@@ -0,0 +1,180 @@
+# ────────────────────────────────
+# vigi/services/sync.py  —  batched replay of offline lot operations
+# ────────────────────────────────
+"""
+The service worker queues lot writes made offline and sends them back in one
+request (POST /lots/sync):
+
+    {"operations": [
+        {"key": "<uuid>", "op": "add",    "fields": {...LotForm fields...}},
+        {"key": "<uuid>", "op": "edit",   "lot_id": 12, "version": 3, "fields": {...}},
+        {"key": "<uuid>", "op": "delete", "lot_id": 12, "version": 4}
+    ]}
+
+Operations run in order, each in its own savepoint, and the whole batch is
+one commit. Every outcome is stored under its key: a batch re-sent after a
+lost response gets the stored results back (`"replayed": true`) instead of
+applying anything twice.
+
+Per-operation status:
+    applied     done; lot_id + new version
+    conflict    the lot changed since the client saw it (or lot/PN taken); `current` = server state
+    not_found   the lot is gone (a delete is then already satisfied)
+    invalid     bad operation or LotForm errors
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.datastructures import MultiDict
+
+from vigi.extensions import db
+from vigi.forms import LotForm
+from vigi.services import images
+
+OPERATIONS = ("add", "edit", "delete")
+LOT_FIELDS = ("lot_number", "product_name", "type", "expiry_date", "pn")
+
+
+def lot_state(lot) -> dict:
+    return {
+        "id": lot.id,
+        "lot_number": lot.lot_number or "",
+        "product_name": lot.product_name or "",
+        "type": lot.type or "",
+        "expiry_date": lot.expiry_date.strftime("%Y-%m-%d") if lot.expiry_date else "",
+        "pn": lot.pn or "",
+        "version": lot.version,
+    }
+
+
+def _form(fields) -> LotForm:
+    data = MultiDict({k: str(fields.get(k) or "") for k in LOT_FIELDS})
+    return LotForm(formdata=data, meta={"csrf": False})
+
+
+def _errors(form: LotForm) -> dict:
+    return {name: [str(m) for m in msgs] for name, msgs in form.errors.items()}  # lazy_gettext → str
+
+
+def _assign(lot, form: LotForm) -> None:
+    lot.lot_number = (form.lot_number.data or "").strip()
+    lot.product_name = (form.product_name.data or "").strip()
+    lot.type = (form.type.data or "").strip()
+    lot.pn = (form.pn.data or "").strip()
+    lot.expiry_date = form.expiry_date.data
+
+
+def _apply(op: dict, user_id: int) -> dict:
+    from models import Log, Lot
+
+    kind = op.get("op")
+    fields = op.get("fields") if isinstance(op.get("fields"), dict) else {}
+
+    if kind == "add":
+        form = _form(fields)
+        if not form.validate():
+            return {"status": "invalid", "errors": _errors(form)}
+        lot = Lot()
+        _assign(lot, form)
+        db.session.add(lot)
+        db.session.flush()
+        db.session.add(Log(action=f"Added lot {lot.lot_number}", user_id=user_id))
+        return {"status": "applied", "lot_id": lot.id, "version": lot.version}
+
+    try:
+        lot_id = int(op.get("lot_id"))
+    except (TypeError, ValueError):
+        return {"status": "invalid", "errors": {"lot_id": ["required"]}}
+    lot = db.session.get(Lot, lot_id)
+    if lot is None:
+        return {"status": "not_found", "lot_id": lot_id}
+
+    base = op.get("version")
+    if base not in (None, "") and str(base) != str(lot.version):
+        return {"status": "conflict", "reason": "version", "lot_id": lot_id, "current": lot_state(lot)}
+
+    if kind == "edit":
+        form = _form(fields)
+        if not form.validate():
+            return {"status": "invalid", "lot_id": lot_id, "errors": _errors(form)}
+        _assign(lot, form)
+        db.session.add(Log(action=f"Edited lot {lot.lot_number}", user_id=user_id))
+        db.session.flush()
+        return {"status": "applied", "lot_id": lot_id, "version": lot.version}
+
+    db.session.add(Log(action=f"Deleted lot {lot.lot_number}", user_id=user_id))
+    images.release(db.session, lot.image)
+    db.session.delete(lot)
+    db.session.flush()
+    return {"status": "applied", "lot_id": lot_id}
+
+
+def _apply_in_savepoint(op: dict, user_id: int) -> dict:
+    lot_id = op.get("lot_id")
+    savepoint = db.session.begin_nested()
+    try:
+        result = _apply(op, user_id)
+    except IntegrityError:
+        savepoint.rollback()
+        return {"status": "conflict", "reason": "duplicate", "lot_id": lot_id}
+    except StaleDataError:  # updated by someone else between our read and our write
+        from models import Lot
+
+        savepoint.rollback()
+        lot = db.session.get(Lot, lot_id, populate_existing=True)
+        return {"status": "conflict", "reason": "version", "lot_id": lot_id,
+                "current": lot_state(lot) if lot is not None else None}
+
+    if result["status"] == "applied":
+        savepoint.commit()
+    else:
+        savepoint.rollback()
+    return result
+
+
+def prune_keys(days: int) -> int:
+    from models import IdempotencyKey
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+
+
+def apply_batch(operations: List[dict], user_id: int, key_ttl_days: Optional[int] = None) -> dict:
+    """Apply `operations` in order and commit once; returns {"results": [...], "applied": n}."""
+    from models import IdempotencyKey
+
+    if key_ttl_days:
+        prune_keys(key_ttl_days)
+
+    keys = [str(op.get("key"))[:64] for op in operations if isinstance(op, dict) and op.get("key")]
+    seen = {
+        row.key: json.loads(row.result)
+        for row in IdempotencyKey.query.filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key.in_(keys))
+    } if keys else {}
+
+    results, applied = [], 0
+    for op in operations:
+        key = str(op.get("key"))[:64] if isinstance(op, dict) and op.get("key") else None
+        if key is None:
+            results.append({"key": None, "status": "invalid", "errors": {"key": ["required"]}})
+            continue
+        if key in seen:
+            results.append({**seen[key], "key": key, "replayed": True})
+            continue
+        if op.get("op") not in OPERATIONS:
+            result = {"status": "invalid", "errors": {"op": [f"one of {', '.join(OPERATIONS)}"]}}
+        else:
+            result = _apply_in_savepoint(op, user_id)
+
+        applied += result["status"] == "applied"
+        seen[key] = result
+        db.session.add(IdempotencyKey(user_id=user_id, key=key, result=json.dumps(result)))
+        results.append({**result, "key": key})
+
+    db.session.commit()
+    return {"results": results, "applied": applied}
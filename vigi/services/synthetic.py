@@ -0,0 +1,263 @@
+# ────────────────────────────────
+# vigi/services/synthetic.py  —  production-shaped synthetic data (dev / sizing only)
+# ────────────────────────────────
+"""
+Deterministic generator for millions of lots + logs, bulk-loaded with:
+    PostgreSQL → COPY ... FROM STDIN (CSV, streamed per batch)
+    SQLite     → executemany on the raw connection, WAL + synchronous=OFF while loading
+                 (the previous journal mode and synchronous level are restored)
+
+Synthetic rows are tagged so they can be purged fast without touching real data:
+    lots → lot_number / pn start with SYN_PREFIX (in lots and lots_archive)
+    logs → written by the SYN_USER account
+"""
+from __future__ import annotations
+
+import csv
+import io
+import random
+import secrets
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from vigi.extensions import db
+from vigi.services import images
+from models import ArchivedLot, Log, Lot, User
+
+SYN_PREFIX = "SYN-"
+SYN_USER = "synthetic_seed"
+
+PRODUCTS: Dict[str, List[str]] = {
+    "loctite": ["Loctite 222", "Loctite 243", "Loctite 270", "Loctite 542", "Loctite 601", "Loctite 648"],
+    "graisse": ["Graisse Isoflex", "Graisse silicone", "Vaseline blanche"],
+    "vernelec": ["Vernelec fluo", "Vernis protect", "Vernis Vernelec"],
+    "general": ["Araldite", "Résine silicone", "Colle cyanoacrylate", "Nettoyant"],
+}
+LOG_ACTIONS = ("Added lot {}", "Edited lot {}", "Edited lot {}", "Edited lot {}", "Deleted lot {}")
+
+
+@dataclass
+class SeedSpec:
+    lots: int = 100_000
+    logs: int = 0                      # 0 → lots // 5
+    seed: int = 1
+    types: Dict[str, float] = field(default_factory=lambda: {
+        "loctite": 0.45, "graisse": 0.25, "vernelec": 0.2, "general": 0.1,
+    })
+    expiry_min_days: int = -730        # oldest expiry, relative to today
+    expiry_max_days: int = 720         # furthest expiry, relative to today
+    expired_share: float = 0.15        # share of lots already expired
+    image_share: float = 0.7           # share of lots with an image
+    image_pool: int = 40               # distinct image files reused across lots
+    log_days: int = 365                # logs spread over this many past days
+    batch: int = 10_000
+    today: date = field(default_factory=date.today)
+
+
+def parse_distribution(raw: str) -> Dict[str, float]:
+    """ "loctite=0.4,graisse=0.3" → normalized weights."""
+    out: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        out[k.strip().lower()] = float(v)
+    total = sum(out.values())
+    if not out or total <= 0:
+        raise ValueError(f"invalid distribution: {raw!r}")
+    return {k: v / total for k, v in out.items()}
+
+
+# ── Generators ──────────────────────────────────────
+LOT_COLUMNS = ("lot_number", "product_name", "type", "expiry_date", "pn", "quantity", "image")
+LOG_COLUMNS = ("action", "timestamp", "user_id")
+
+
+def generate_lots(spec: SeedSpec) -> Iterator[tuple]:
+    rng = random.Random(spec.seed)
+    kinds = list(spec.types)
+    weights = [spec.types[k] for k in kinds]
+    exp_lo, exp_hi = min(spec.expiry_min_days, -1), max(spec.expiry_max_days, 0)
+
+    for i in range(spec.lots):
+        kind = rng.choices(kinds, weights)[0]
+        names = PRODUCTS.get(kind) or [kind.title()]
+        name = names[rng.randrange(len(names))]
+        if rng.random() < spec.expired_share:
+            days = rng.randint(exp_lo, -1)
+        else:
+            days = rng.randint(0, exp_hi)
+        image = f"syn_{rng.randrange(spec.image_pool):04d}.jpg" if rng.random() < spec.image_share else None
+        yield (
+            f"{SYN_PREFIX}L{i:08d}",
+            name,
+            kind,
+            spec.today + timedelta(days=days),
+            f"{SYN_PREFIX}PN{i:08d}",
+            rng.randint(1, 12),
+            image,
+        )
+
+
+def generate_logs(spec: SeedSpec, user_id: int) -> Iterator[tuple]:
+    rng = random.Random(spec.seed + 1)
+    n_logs = spec.logs or spec.lots // 5
+    end = datetime(spec.today.year, spec.today.month, spec.today.day, 18, 0)
+    span = spec.log_days * 86400
+    for _ in range(n_logs):
+        lot_n = rng.randrange(max(spec.lots, 1))
+        action = LOG_ACTIONS[rng.randrange(len(LOG_ACTIONS))].format(f"{SYN_PREFIX}L{lot_n:08d}")
+        yield (action, end - timedelta(seconds=rng.randrange(span)), user_id)
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    buf: List[tuple] = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+# ── Bulk loading ────────────────────────────────────
+def _copy_postgres(raw_conn, table: str, columns: Sequence[str], batch: List[tuple]) -> None:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for row in batch:
+        w.writerow(["\\N" if v is None else (v.isoformat() if hasattr(v, "isoformat") else v) for v in row])
+    buf.seek(0)
+    with raw_conn.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf
+        )
+
+
+def _executemany(raw_conn, table: str, columns: Sequence[str], batch: List[tuple], marker: str) -> None:
+    placeholders = ", ".join([marker] * len(columns))
+    cur = raw_conn.cursor()
+    try:
+        cur.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", batch)
+    finally:
+        cur.close()
+
+
+def bulk_load(table: str, columns: Sequence[str], rows: Iterable[tuple], batch_size: int,
+              progress: Optional[Callable[[int], None]] = None) -> int:
+    engine = db.engine
+    dialect = engine.dialect.name
+    total = 0
+
+    use_copy = dialect == "postgresql" and engine.dialect.driver == "psycopg2"
+    marker = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+
+    raw = engine.raw_connection()
+    restore = None
+    try:
+        dbapi = getattr(raw, "dbapi_connection", None) or raw.connection
+        if dialect == "sqlite":
+            cur = dbapi.cursor()
+            # the user's journal mode / synchronous level are put back afterwards
+            restore = (cur.execute("PRAGMA journal_mode").fetchone()[0],
+                       cur.execute("PRAGMA synchronous").fetchone()[0])
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=OFF")
+            cur.close()
+
+        for batch in _batches(rows, batch_size):
+            if use_copy:
+                _copy_postgres(dbapi, table, columns, batch)
+            else:
+                _executemany(dbapi, table, columns, batch, marker)
+            dbapi.commit()
+            total += len(batch)
+            if progress:
+                progress(total)
+    finally:
+        if restore:
+            cur = dbapi.cursor()
+            cur.execute(f"PRAGMA journal_mode={restore[0]}")
+            cur.execute(f"PRAGMA synchronous={int(restore[1])}")
+            cur.close()
+        raw.close()
+    return total
+
+
+def ensure_seed_user() -> User:
+    user = User.query.filter_by(username=SYN_USER).first()
+    if not user:
+        user = User(
+            username=SYN_USER,
+            email=f"{SYN_USER}@vigifroid.local",
+            password=generate_password_hash(secrets.token_hex(16)),
+            role="employee",
+        )
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+def seed(spec: SeedSpec, progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    user = ensure_seed_user()
+    n_lots = bulk_load(
+        Lot.__tablename__, LOT_COLUMNS, generate_lots(spec), spec.batch,
+        (lambda n: progress("lots", n)) if progress else None,
+    )
+    t1 = time.perf_counter()
+    n_logs = bulk_load(
+        Log.__tablename__, LOG_COLUMNS, generate_logs(spec, user.id), spec.batch,
+        (lambda n: progress("logs", n)) if progress else None,
+    )
+    t2 = time.perf_counter()
+
+    images.recount(db.session)  # bulk rows bypass acquire(): keep image_refs in step
+    db.session.commit()
+
+    if db.engine.dialect.name == "postgresql":
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {Lot.__tablename__}"))
+            conn.execute(text(f"ANALYZE {Log.__tablename__}"))
+
+    return {
+        "lots": n_lots,
+        "logs": n_logs,
+        "lots_per_s": n_lots / (t1 - t0) if t1 > t0 else 0.0,
+        "logs_per_s": n_logs / (t2 - t1) if t2 > t1 else 0.0,
+        "seconds": t2 - t0,
+    }
+
+
+def purge(batch: int = 50_000) -> Tuple[int, int]:
+    """Delete synthetic lots/logs only (batched, so PostgreSQL never holds one giant lock)."""
+    user = User.query.filter_by(username=SYN_USER).first()
+    deleted_logs = 0
+    if user:
+        deleted_logs = _batched_delete(Log.__table__, Log.__table__.c.user_id == user.id, batch)
+
+    deleted_lots = 0
+    for table in (Lot.__table__, ArchivedLot.__table__):  # `flask lots archive` may have moved some
+        deleted_lots += _batched_delete(table, table.c.lot_number.like(f"{SYN_PREFIX}%"), batch)
+
+    images.recount(db.session)
+    if user:
+        db.session.delete(user)
+    db.session.commit()
+    return deleted_lots, deleted_logs
+
+
+def _batched_delete(table, condition, batch: int) -> int:
+    total = 0
+    while True:
+        ids = db.select(table.c.id).where(condition).limit(batch).scalar_subquery()
+        with db.engine.begin() as conn:
+            n = conn.execute(table.delete().where(table.c.id.in_(ids))).rowcount or 0
+        total += n
+        if n < batch:
+            return total
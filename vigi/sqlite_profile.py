@@ -0,0 +1,90 @@
+# ────────────────────────────────
+# vigi/sqlite_profile.py  —  SQLite deployment profile (single shop-floor PC)
+# ────────────────────────────────
+"""
+DATABASE_URL=sqlite:////srv/vigifroid/vigifroid.db switches the data layer to
+settings meant for one file on a local disk:
+
+  - engine options: a small QueuePool (SQLITE_POOL_SIZE), no pre-ping/recycle
+    (a local file does not drop connections), check_same_thread off;
+  - on every new connection: WAL journal, synchronous=NORMAL, mmap, page
+    cache, busy_timeout and in-memory temp tables (SQLITE_PRAGMAS);
+  - read/write split (SQLITE_READ_SPLIT): a second, read-only engine on the
+    same file is registered as the bind "replica_ro", so vigi/db_routing.py
+    sends exports, lists and reports there. Under WAL, readers work on a
+    snapshot and never block the writer, and a long export no longer holds
+    one of the writers' pool slots.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+READ_BIND = "replica_ro"
+_SKIP_ON_READ_ONLY = ("journal_mode",)  # a mode=ro connection cannot change the journal
+
+
+def sqlite_path(uri: str) -> Optional[str]:
+    """Database file of a SQLite URI; "" for in-memory, None if not SQLite."""
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite":
+        return None
+    database = url.database or ""
+    return "" if database in ("", ":memory:") or database.startswith("file::memory:") else database
+
+
+def _read_only_uri(path: str) -> str:
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+def configure_sqlite(app) -> None:
+    """Rewrite engine options (+ read-only bind) for a SQLite URI; call before db.init_app."""
+    path = sqlite_path(str(app.config.get("SQLALCHEMY_DATABASE_URI") or ""))
+    if path is None:
+        return
+    cfg = app.config
+    if path == "":
+        # one shared in-memory database (tests, demos)
+        cfg["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        return
+
+    busy_ms = int(cfg.get("SQLITE_PRAGMAS", {}).get("busy_timeout", 5000))
+    cfg["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": int(cfg.get("SQLITE_POOL_SIZE", 5)),
+        "max_overflow": int(cfg.get("SQLITE_MAX_OVERFLOW", 5)),
+        "pool_timeout": busy_ms / 1000 + 5,
+        "pool_pre_ping": False,
+        "connect_args": {"check_same_thread": False, "timeout": busy_ms / 1000},
+    }
+    binds = dict(cfg.get("SQLALCHEMY_BINDS") or {})
+    if cfg.get("SQLITE_READ_SPLIT", True) and not any(str(k).startswith("replica") for k in binds):
+        binds[READ_BIND] = _read_only_uri(path)
+        cfg["SQLALCHEMY_BINDS"] = binds
+
+
+def apply_pragmas(app, db) -> None:
+    """PRAGMAs on every new connection of each SQLite file engine; call after db.init_app."""
+    pragmas = dict(app.config.get("SQLITE_PRAGMAS") or {})
+    if not pragmas:
+        return
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite" or not engine.url.database or engine.url.database == ":memory:":
+                continue
+            read_only = key == READ_BIND
+            items = [(k, v) for k, v in pragmas.items() if not (read_only and k in _SKIP_ON_READ_ONLY)]
+            event.listen(engine, "connect", _pragma_listener(items))
+
+
+def _pragma_listener(items):
+    def on_connect(dbapi_conn, record):
+        cur = dbapi_conn.cursor()
+        try:
+            for name, value in items:
+                cur.execute(f"PRAGMA {name}={value}")
+        finally:
+            cur.close()
+    return on_connect
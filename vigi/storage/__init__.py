@@ -0,0 +1,63 @@
+# ────────────────────────────────
+# vigi/storage/__init__.py  —  blob storage for uploads and report artifacts
+# ────────────────────────────────
+"""
+Two namespaces, same backend:
+
+    get_storage("uploads")   lot photos (UPLOAD_FOLDER | s3://S3_BUCKET/<S3_PREFIX>uploads/)
+    get_storage("reports")   archived auto-export reports (REPORT_ARCHIVE_FOLDER | …/reports/)
+
+STORAGE_BACKEND=local (default) keeps files on disk; STORAGE_SERVE=x-accel or
+x-sendfile hands the byte streaming to nginx / Apache. STORAGE_BACKEND=s3
+talks to any S3-compatible endpoint (AWS, MinIO, Ceph, R2 — S3_ENDPOINT_URL)
+and needs boto3; downloads then go straight to the bucket (S3_PUBLIC_URL or
+a presigned URL), never through a worker.
+"""
+from __future__ import annotations
+
+import os
+
+from flask import current_app
+
+from .base import BlobInfo, Storage
+from .local import LocalStorage
+from .s3 import S3Storage
+
+__all__ = ["BlobInfo", "Storage", "LocalStorage", "S3Storage", "init_storage", "get_storage"]
+
+NAMESPACES = ("uploads", "reports")
+
+
+def _build(app, namespace: str) -> Storage:
+    cfg = app.config
+    backend = (cfg.get("STORAGE_BACKEND") or "local").lower()
+    if backend == "s3":
+        return S3Storage(
+            bucket=cfg["S3_BUCKET"],
+            prefix=f"{cfg.get('S3_PREFIX') or ''}{namespace}/",
+            endpoint_url=cfg.get("S3_ENDPOINT_URL"),
+            region=cfg.get("S3_REGION"),
+            public_url=cfg.get("S3_PUBLIC_URL") if namespace == "uploads" else None,
+            presign_ttl=int(cfg.get("S3_PRESIGN_TTL", 3600)),
+        )
+    if backend != "local":
+        raise ValueError(f"STORAGE_BACKEND={backend!r}: expected 'local' or 's3'")
+
+    if namespace == "uploads":
+        root = cfg["UPLOAD_FOLDER"]
+    else:
+        root = cfg.get("REPORT_ARCHIVE_FOLDER") or os.path.join(app.instance_path, namespace)
+    return LocalStorage(
+        root,
+        serve=cfg.get("STORAGE_SERVE", "app"),
+        accel_prefix=f"{cfg.get('STORAGE_ACCEL_PREFIX', '/_protected/')}{namespace}/",
+    )
+
+
+def init_storage(app) -> None:
+    app.extensions["storage"] = {ns: _build(app, ns) for ns in NAMESPACES}
+
+
+def get_storage(namespace: str = "uploads", app=None) -> Storage:
+    app = app or current_app
+    return app.extensions["storage"][namespace]
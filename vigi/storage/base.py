@@ -0,0 +1,60 @@
+# vigi/storage/base.py  —  the interface every backend implements
+from __future__ import annotations
+
+import mimetypes
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+
+class BlobInfo(NamedTuple):
+    key: str
+    size: int
+    mtime: float  # epoch seconds
+
+
+class Storage(ABC):
+    """Flat key → bytes store. Keys are relative ("abc.jpg", "auto/report.pdf")."""
+
+    @abstractmethod
+    def save(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Readable binary stream; FileNotFoundError if missing."""
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """True if something was deleted."""
+
+    @abstractmethod
+    def touch(self, key: str) -> None:
+        """Refresh the modification time (keeps a live blob out of GC grace windows)."""
+
+    @abstractmethod
+    def scan(self, prefix: str = "") -> Iterator[BlobInfo]:
+        """Stream every blob under `prefix` (no full listing held in memory)."""
+
+    @abstractmethod
+    def location(self, key: str) -> str:
+        """Stable, backend-qualified identifier (path or s3:// URL) — for caches and logs."""
+
+    def public_url(self, key: str) -> Optional[str]:
+        """Direct URL that bypasses the app, when the backend has one."""
+        return None
+
+    @abstractmethod
+    def send(self, key: str):
+        """Flask response delivering the blob (or redirecting to it); 404 if missing."""
+
+    @staticmethod
+    def guess_type(key: str) -> str:
+        return mimetypes.guess_type(key)[0] or "application/octet-stream"
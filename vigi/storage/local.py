@@ -0,0 +1,98 @@
+# vigi/storage/local.py  —  files on disk, optionally streamed by the front server
+"""
+STORAGE_SERVE:
+    app          Flask streams the file (conditional GET + Range via send_file)
+    x-accel      nginx:   the response only carries X-Accel-Redirect; nginx sends the
+                 bytes (Range, sendfile(2)) from an internal location, e.g.
+                     location /_protected/uploads/ { internal; alias /srv/vigifroid/instance/uploads/; }
+    x-sendfile   Apache mod_xsendfile / lighttpd: X-Sendfile carries the absolute path
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+from flask import Response, abort, request, send_file
+from werkzeug.utils import send_file as wz_send_file
+
+from .base import BlobInfo, Storage
+
+SERVE_MODES = ("app", "x-accel", "x-sendfile")
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str, serve: str = "app", accel_prefix: str = "/_protected/"):
+        if serve not in SERVE_MODES:
+            raise ValueError(f"STORAGE_SERVE={serve!r}: expected one of {SERVE_MODES}")
+        self.root = os.path.abspath(root)
+        self.serve = serve
+        self.accel_prefix = accel_prefix if accel_prefix.endswith("/") else accel_prefix + "/"
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"key escapes storage root: {key!r}")
+        return path
+
+    def save(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # per process and thread: two threads may save the same content-addressed key
+        tmp = f"{path}.tmp{os.getpid()}{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def touch(self, key: str) -> None:
+        now = time.time()
+        os.utime(self.path(key), (now, now))
+
+    def scan(self, prefix: str = "") -> Iterator[BlobInfo]:
+        stack = [self.root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    key = os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                    if key.startswith(prefix):
+                        st = entry.stat()
+                        yield BlobInfo(key, st.st_size, st.st_mtime)
+
+    def location(self, key: str) -> str:
+        return self.path(key)
+
+    def send(self, key: str):
+        try:
+            path = self.path(key)
+        except ValueError:
+            abort(404)
+        if not os.path.isfile(path):
+            abort(404)
+
+        if self.serve == "x-accel":
+            resp = Response(mimetype=self.guess_type(key))
+            resp.headers["X-Accel-Redirect"] = self.accel_prefix + quote(key)
+            return resp
+        if self.serve == "x-sendfile":
+            return wz_send_file(path, request.environ, mimetype=self.guess_type(key),
+                                use_x_sendfile=True, conditional=True)
+        return send_file(path, mimetype=self.guess_type(key), conditional=True)
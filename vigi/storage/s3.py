@@ -0,0 +1,105 @@
+# vigi/storage/s3.py  —  S3-compatible object storage (AWS, MinIO, Ceph, R2 …)
+"""
+boto3 is optional: imported only when STORAGE_BACKEND=s3. Local stand-in:
+
+    docker run -p 9000:9000 minio/minio server /data
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://127.0.0.1:9000 S3_BUCKET=vigifroid \
+    AWS_ACCESS_KEY_ID=minioadmin AWS_SECRET_ACCESS_KEY=minioadmin flask run
+
+Downloads never stream through the app: send() redirects to S3_PUBLIC_URL (a
+CDN / public-read prefix) or to a short-lived presigned URL.
+"""
+from __future__ import annotations
+
+import io
+from typing import BinaryIO, Iterator, Optional
+
+from flask import redirect
+
+from .base import BlobInfo, Storage
+
+_MISSING_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def _is_missing(exc: Exception) -> bool:
+    code = (getattr(exc, "response", None) or {}).get("Error", {}).get("Code")
+    return str(code) in _MISSING_CODES
+
+
+class S3Storage(Storage):
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, public_url: Optional[str] = None,
+                 presign_ttl: int = 3600, client=None):
+        if not bucket:
+            raise ValueError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("STORAGE_BACKEND=s3 needs boto3 (pip install boto3)") from e
+            client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_base = public_url.rstrip("/") if public_url else None
+        self.presign_ttl = presign_ttl
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def save(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data,
+                               ContentType=content_type or self.guess_type(key))
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            if _is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        return io.BytesIO(obj["Body"].read())
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except Exception as e:
+            if _is_missing(e):
+                return False
+            raise
+
+    def delete(self, key: str) -> bool:
+        if not self.exists(key):
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return True
+
+    def touch(self, key: str) -> None:
+        # S3 has no utime: an in-place copy refreshes LastModified
+        self.client.copy_object(
+            Bucket=self.bucket, Key=self._key(key),
+            CopySource={"Bucket": self.bucket, "Key": self._key(key)},
+            MetadataDirective="REPLACE", ContentType=self.guess_type(key),
+        )
+
+    def scan(self, prefix: str = "") -> Iterator[BlobInfo]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield BlobInfo(obj["Key"][len(self.prefix):], obj["Size"], obj["LastModified"].timestamp())
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+    def public_url(self, key: str) -> Optional[str]:
+        return f"{self.public_base}/{self._key(key)}" if self.public_base else None
+
+    def send(self, key: str):
+        url = self.public_url(key) or self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(key)}, ExpiresIn=self.presign_ttl,
+        )
+        resp = redirect(url, code=302)
+        # the redirect must not outlive the signature
+        resp.headers["Cache-Control"] = f"private, max-age={max(0, min(self.presign_ttl - 60, 600))}"
+        return resp
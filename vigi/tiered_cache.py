@@ -0,0 +1,293 @@
+# ────────────────────────────────
+# vigi/tiered_cache.py  —  two-tier Flask-Caching backend (local LRU + shared store)
+# ────────────────────────────────
+"""
+CACHE_TYPE = "vigi.tiered_cache.TieredCache"
+
+    tier 1   bounded LRU in this process (CACHE_LOCAL_MAX entries, ≤ CACHE_LOCAL_TTL s)
+    tier 2   shared by every worker/node: Redis when CACHE_REDIS_URL is set,
+             else a FileSystemCache in CACHE_DIR (one host, several workers)
+
+Every set / delete / clear is broadcast so the other processes drop their
+local copy: Redis pub/sub, or an append-only log file polled at most every
+CACHE_BUS_POLL seconds with the filesystem store. CACHE_LOCAL_TTL bounds how
+long a lost message can leave a stale local entry.
+
+Hits and misses are counted per namespace (key up to the first ":" or "/")
+in vigi_cache_requests_total{namespace, result=local|remote|miss}.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from flask_caching.backends.base import BaseCache
+
+from vigi.perf.metrics import registry
+
+CACHE_REQUESTS = registry.counter(
+    "vigi_cache_requests_total", "Cache lookups by namespace and tier that answered (local|remote|miss)."
+)
+CACHE_INVALIDATIONS = registry.counter(
+    "vigi_cache_invalidations_received_total", "Invalidation messages applied from other processes."
+)
+
+_ALL = "*"
+
+
+def namespace(key: str) -> str:
+    return key.split(":", 1)[0].split("/", 1)[0][:32] or "-"
+
+
+# ── Tier 1 ──────────────────────────────────────────
+class LocalLRU:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries, self.ttl = max_entries, ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key → (expires, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None, False
+            if time.monotonic() >= entry[0]:
+                del self._data[key]
+                return None, False
+            self._data.move_to_end(key)
+            return entry[1], True
+
+    def set(self, key: str, value, timeout: Optional[float]) -> None:
+        ttl = self.ttl if not timeout else min(self.ttl, timeout)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def drop(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ── Invalidation buses ──────────────────────────────
+class FileBus:
+    """Append-only JSON lines; readers keep an offset and poll the file size."""
+
+    MAX_SIZE = 1 << 20  # truncated past this; readers then drop everything once
+
+    def __init__(self, path: str, poll: float):
+        self.path, self.poll = path, poll
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._offset = os.path.getsize(path) if os.path.exists(path) else 0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def publish(self, message: dict) -> None:
+        line = (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            if os.fstat(fd).st_size > self.MAX_SIZE:
+                os.ftruncate(fd, 0)
+                line = (json.dumps({"o": message.get("o"), "k": _ALL}) + "\n").encode("utf-8")
+            os.write(fd, line)  # one write() with O_APPEND: lines from several writers don't interleave
+        finally:
+            os.close(fd)
+
+    def poll_messages(self) -> list:
+        now = time.monotonic()
+        if now - self._checked < self.poll:
+            return []
+        with self._lock:
+            self._checked = now
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                return []
+            if size < self._offset:  # truncated: whatever was in between is unknown
+                self._offset = 0
+                return [{"k": _ALL}]
+            if size == self._offset:
+                return []
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            end = data.rfind(b"\n") + 1  # a line still being written is read next time
+            self._offset += end
+        out = []
+        for raw in data[:end].splitlines():
+            try:
+                out.append(json.loads(raw))
+            except ValueError:
+                continue
+        return out
+
+    def start(self, on_message) -> None:
+        pass  # polled from get()
+
+
+class RedisBus:
+    """Redis pub/sub; a daemon thread per process applies the messages."""
+
+    def __init__(self, client, channel: str):
+        self.client, self.channel = client, channel
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def publish(self, message: dict) -> None:
+        self.client.publish(self.channel, json.dumps(message, separators=(",", ":")))
+
+    def poll_messages(self) -> list:
+        return []
+
+    def start(self, on_message) -> None:
+        # a listener inherited through fork has no thread behind it: start one per process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, args=(on_message,), name="vf-cache-bus", daemon=True).start()
+
+    def _listen(self, on_message) -> None:
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                on_message({"k": _ALL})  # messages may have been missed while (re)connecting
+                for msg in pubsub.listen():
+                    if msg.get("type") == "message":
+                        on_message(json.loads(msg["data"]))
+            except Exception:
+                time.sleep(1.0)
+
+
+# ── Backend ─────────────────────────────────────────
+class TieredCache(BaseCache):
+    def __init__(self, remote: BaseCache, bus, local_max: int = 1024, local_ttl: float = 30.0,
+                 default_timeout: int = 300):
+        super().__init__(default_timeout=default_timeout)
+        self.remote, self.bus = remote, bus
+        self.local = LocalLRU(local_max, local_ttl)
+        self._token = uuid.uuid4().hex[:12]
+
+    @property
+    def origin(self) -> str:
+        # workers forked from one master share the token: the pid tells them apart
+        return f"{os.getpid()}:{self._token}"
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        from flask_caching.backends import FileSystemCache, RedisCache
+
+        remote_kwargs = dict(kwargs)
+        if config.get("CACHE_REDIS_URL"):
+            remote = RedisCache.factory(app, config, [], remote_kwargs)
+            bus = RedisBus(remote._write_client, config.get("CACHE_BUS_CHANNEL") or "vigi:cache:invalidate")
+        else:
+            cache_dir = config.get("CACHE_DIR") or os.path.join(app.instance_path, "cache")
+            remote = FileSystemCache(cache_dir, threshold=config.get("CACHE_THRESHOLD", 20000), **remote_kwargs)
+            bus_file = config.get("CACHE_BUS_FILE") or os.path.join(app.instance_path, "cache-invalidations.log")
+            bus = FileBus(bus_file, float(config.get("CACHE_BUS_POLL", 1.0)))
+        return cls(
+            remote,
+            bus,
+            local_max=int(config.get("CACHE_LOCAL_MAX", 1024)),
+            local_ttl=float(config.get("CACHE_LOCAL_TTL", 30)),
+            default_timeout=kwargs.get("default_timeout", 300),
+        )
+
+    # invalidation
+    def _apply(self, message: dict) -> None:
+        if message.get("o") == self.origin:
+            return
+        keys = message.get("k")
+        if keys == _ALL:
+            self.local.clear()
+        elif keys:
+            self.local.drop(keys)
+        CACHE_INVALIDATIONS.inc()
+
+    def _sync(self) -> None:
+        self.bus.start(self._apply)
+        for message in self.bus.poll_messages():
+            self._apply(message)
+
+    def _broadcast(self, keys) -> None:
+        try:
+            self.bus.publish({"o": self.origin, "k": keys})
+        except Exception:
+            pass  # without the message other workers serve their copy until CACHE_LOCAL_TTL
+
+    # BaseCache API
+    def get(self, key: str) -> Any:
+        self._sync()
+        value, found = self.local.get(key)
+        if found:
+            CACHE_REQUESTS.inc(namespace=namespace(key), result="local")
+            return value
+        value = self.remote.get(key)
+        if value is None:
+            CACHE_REQUESTS.inc(namespace=namespace(key), result="miss")
+            return None
+        CACHE_REQUESTS.inc(namespace=namespace(key), result="remote")
+        self.local.set(key, value, None)
+        return value
+
+    def has(self, key: str) -> bool:
+        self._sync()
+        return self.local.get(key)[1] or self.remote.has(key)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        ok = self.remote.set(key, value, timeout)
+        self.local.set(key, value, self._normalize_timeout(timeout))
+        self._broadcast([key])
+        return ok
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        ok = self.remote.add(key, value, timeout)
+        if ok:
+            self.local.set(key, value, self._normalize_timeout(timeout))
+            self._broadcast([key])
+        return ok
+
+    def delete(self, key: str) -> bool:
+        self.local.drop([key])
+        ok = self.remote.delete(key)
+        self._broadcast([key])
+        return ok
+
+    def delete_many(self, *keys: str) -> list:
+        self.local.drop(keys)
+        deleted = [k for k in keys if self.remote.delete(k)]
+        self._broadcast(list(keys))
+        return deleted
+
+    def clear(self) -> bool:
+        self.local.clear()
+        ok = self.remote.clear()
+        self._broadcast(_ALL)
+        return ok
+
+    def inc(self, key: str, delta: int = 1) -> Optional[int]:
+        self.local.drop([key])
+        value = self.remote.inc(key, delta)
+        self._broadcast([key])
+        return value
+
+    def dec(self, key: str, delta: int = 1) -> Optional[int]:
+        return self.inc(key, -delta)
@@ -1,5 +1,6 @@
 # vigi/utils.py
 import re
+from functools import lru_cache
 
 _EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
 
@@ -10,7 +11,11 @@ def parse_emails(raw_text: str) -> list[str]:
     """
     if not raw_text:
         return []
+    return list(_parse_emails(raw_text))  # copy: callers may append
 
+
+@lru_cache(maxsize=128)
+def _parse_emails(raw_text: str) -> tuple[str, ...]:
     parts = re.split(r"[,\n;]+", raw_text)
     seen = set()
     out = []
@@ -25,4 +30,4 @@ def parse_emails(raw_text: str) -> list[str]:
             seen.add(email)
             out.append(email)
 
-    return out
+    return tuple(out)
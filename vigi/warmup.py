@@ -0,0 +1,97 @@
+# ────────────────────────────────
+# vigi/warmup.py  —  pre-fork lifecycle: shared warm-up, per-worker reset
+# ────────────────────────────────
+"""
+Pre-fork servers (gunicorn --preload, see gunicorn.conf.py) build the app once
+in the master process and fork the workers from it:
+
+    master, before forking   warm_shared(app)    translations, Jinja templates,
+                                                 report stack (reportlab + fonts)
+                                                 → shared with workers copy-on-write
+    worker, right after fork  reset_after_fork(app)  drop inherited DB connections
+    worker, before serving    warm_worker(app)   settings row, status counters,
+                                                 first pooled connection
+
+No DB connection may be opened in the master: a socket inherited by several
+workers gets its protocol stream interleaved.
+"""
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+from flask_babel import force_locale, get_translations
+
+
+def _timed(phases: Dict[str, float], name: str, fn, app) -> None:
+    t0 = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:  # warm-up is best effort: never stop a worker from booting
+        app.logger.warning(f"[WARMUP] {name} failed: {e}")
+    phases[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _load_translations(app) -> None:
+    with app.test_request_context():
+        for lang in app.config.get("LANGUAGES", ["ar", "fr", "en"]):
+            with force_locale(lang):
+                get_translations()
+
+
+def _compile_templates(app) -> None:
+    env = app.jinja_env
+    for name in env.list_templates(filter_func=lambda n: n.endswith((".html", ".js"))):
+        env.get_template(name)
+
+
+def _load_report_stack(app) -> None:
+    from vigi.services.reports import _ensure_arabic_fonts, _get_arabic_shaper
+    import reportlab.platypus  # noqa: F401  (the import is the point)
+
+    with app.app_context():
+        _ensure_arabic_fonts()
+        _get_arabic_shaper()
+
+
+def warm_shared(app) -> Dict[str, float]:
+    """Process-independent warm-up: run once in the master, before fork."""
+    phases: Dict[str, float] = {}
+    _timed(phases, "translations", lambda: _load_translations(app), app)
+    _timed(phases, "templates", lambda: _compile_templates(app), app)
+    if app.config.get("WARMUP_REPORTS", True):
+        _timed(phases, "reports", lambda: _load_report_stack(app), app)
+    app.logger.info("[WARMUP] shared %s", phases, extra={"warmup": phases})
+    return phases
+
+
+def reset_after_fork(app) -> None:
+    """Forget connections inherited from the parent without closing them under its feet."""
+    from vigi.extensions import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def _load_db_state(app) -> None:
+    from datetime import date, timedelta
+
+    from vigi.extensions import db
+    from models import AppSettings, Lot
+
+    with app.app_context():
+        AppSettings.get()
+        today = date.today()
+        Lot.query.filter(Lot.expiry_date > today + timedelta(days=30)).count()
+        Lot.query.filter(Lot.expiry_date >= today, Lot.expiry_date <= today + timedelta(days=30)).count()
+        Lot.query.filter(Lot.expiry_date < today).count()
+        db.session.remove()
+
+
+def warm_worker(app) -> Dict[str, float]:
+    """Per-process warm-up (opens this worker's first pooled connection)."""
+    phases: Dict[str, float] = {}
+    _timed(phases, "db", lambda: _load_db_state(app), app)
+    app.logger.info("[WARMUP] worker %s", phases, extra={"warmup": phases})
+    return phases